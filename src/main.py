@@ -1,20 +1,136 @@
 import time
+import asyncio
 import logging
-from typing import Optional
+import threading
+from typing import List, Optional
 
+from modules import config
 from modules import flash_actions
 from modules import uart
+from modules import erase_allocator
+from modules import flash_journal
+from modules import index_records
+from modules import index_table
+from modules import checkpoint
+from modules import compactor as data_compactor
+from modules import retention
+from modules import uart_async
 from modules import flash_interface
 from modules import system_actions
 from modules import init_setup
 from modules import command_handler
 from modules import uart_protocol
+from modules import link_stats
 
 # Configure module logger
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
-MAIN_LOOP_INTERVAL = 0.1  # seconds
+STORE_INTERVAL = 1.0  # seconds between image storage cycles
+STATS_LOG_INTERVAL = 60.0  # seconds between link statistics reports
+STOP_CHECK_INTERVAL = 0.1  # seconds between stop_event checks when idle
+STORAGE_JOIN_TIMEOUT = 10.0  # seconds to let the storage thread finish a job
+
+
+def run_storage_loop(
+    flash: flash_interface.FlashMemory,
+    next_index_addr: Optional[int],
+    next_data_addr: Optional[int],
+    stop_event: threading.Event,
+    allocator: Optional[erase_allocator.EraseAheadAllocator] = None,
+    table: Optional[index_table.IndexTable] = None,
+    checkpoints: Optional[checkpoint.CheckpointStore] = None,
+    compactor: Optional[data_compactor.Compactor] = None,
+    heap: Optional[retention.RetentionHeap] = None,
+) -> None:
+    """
+    Store an image every STORE_INTERVAL seconds and do the idle flash work
+    in between: erase one block ahead of the write pointer per pass until
+    the erase-ahead window is ready, then compact one block of deleted data.
+
+    Runs on its own thread (started by run_main_loop) and owns the write
+    pointers, so the frame loop never waits for a program or an erase. Reads
+    from the command handlers go through the FlashScheduler, which suspends
+    an erase running here to serve them.
+
+    Args:
+        flash: FlashMemory instance (a FlashScheduler when shared)
+        next_index_addr: Next available index address in flash
+        next_data_addr: Next available data address in flash
+        stop_event: Event that ends the loop when set
+        allocator: Optional erase-ahead allocator for the data sectors
+        table: Optional in-RAM index table, updated by every store
+        checkpoints: Optional mount checkpoint store, updated by every store
+        compactor: Optional garbage collector of deleted images' data, run
+            when erase-ahead has nothing left to do
+        heap: Optional retention heap; the lowest-priority images are
+            evicted when a store finds the data section full
+
+    Flash and journal errors are logged and the work is retried on the next
+    interval. Any other error ends the loop.
+
+    Raises:
+        Exception: Any error other than FlashMemoryError or FlashJournalError
+    """
+    now = time.monotonic()
+    next_store_time = now + STORE_INTERVAL
+    next_stats_time = now + STATS_LOG_INTERVAL
+
+    while not stop_event.is_set():
+        try:
+            idle_work = False
+            if next_data_addr is not None and time.monotonic() < next_store_time:
+                if allocator is not None and allocator.erase_step(next_data_addr):
+                    idle_work = True
+                elif compactor is not None:
+                    moved = compactor.step(next_index_addr, next_data_addr)
+                    if moved:
+                        next_index_addr, next_data_addr = moved
+                        idle_work = True
+            if not idle_work:
+                stop_event.wait(
+                    max(min(next_store_time, next_stats_time) - time.monotonic(), 0.0)
+                )
+
+            now = time.monotonic()
+
+            # THIS ONE IS FOR LASC. Store on flash every STORE_INTERVAL seconds.
+            if now >= next_store_time:
+                # A full index gets its oldest sector reclaimed by the store
+                if next_data_addr is not None:
+                    logger.info("Storing image to flash...")
+                    result = flash_actions.store_image_to_flash(
+                        flash,
+                        next_index_addr,
+                        next_data_addr,
+                        allocator,
+                        table,
+                        checkpoints,
+                        heap,
+                    )
+                    if result:
+                        next_index_addr, next_data_addr = result
+                    else:
+                        logger.error(
+                            "Failed to store image. Will retry on the next interval."
+                        )
+                next_store_time = time.monotonic() + STORE_INTERVAL
+
+            if now >= next_stats_time:
+                if allocator is not None and next_data_addr is not None:
+                    logger.info(f"Erase-ahead: {allocator.summary(next_data_addr)}")
+                if compactor is not None:
+                    logger.info(f"Compactor: {compactor.summary()}")
+                next_stats_time = now + STATS_LOG_INTERVAL
+
+        except (
+            flash_journal.FlashJournalError,
+            flash_interface.FlashMemoryError,
+        ) as e:
+            logger.error(f"Flash error in storage loop: {e}")
+            logger.info("Will retry on the next interval.")
+            next_store_time = time.monotonic() + STORE_INTERVAL
+            stop_event.wait(STORE_INTERVAL)
 
 
 def run_main_loop(
@@ -22,6 +138,12 @@ def run_main_loop(
     flash: Optional[flash_interface.FlashMemory],
     next_index_addr: Optional[int],
     next_data_addr: Optional[int],
+    stop_event: Optional[threading.Event] = None,
+    allocator: Optional[erase_allocator.EraseAheadAllocator] = None,
+    table: Optional[index_table.IndexTable] = None,
+    checkpoints: Optional[checkpoint.CheckpointStore] = None,
+    compactor: Optional[data_compactor.Compactor] = None,
+    heap: Optional[retention.RetentionHeap] = None,
 ) -> None:
     """
     Run the main application loop.
@@ -31,16 +153,59 @@ def run_main_loop(
         flash: Optional FlashMemory instance for flash operations
         next_index_addr: Next available index address in flash
         next_data_addr: Next available data address in flash
+        stop_event: Optional event that ends the loop when set (used by the
+            PIC emulator and tests)
+        allocator: Optional erase-ahead allocator; it erases data sectors
+            ahead of the write pointer between stores
+        table: Optional in-RAM index table, updated by every store
+        checkpoints: Optional mount checkpoint store, updated by every store
+        compactor: Optional garbage collector of deleted images' data, run
+            when erase-ahead has nothing left to do
+        heap: Optional retention heap; the lowest-priority images are
+            evicted when a store finds the data section full
+
+    Image storage and the idle flash work run on a separate thread
+    (run_storage_loop), so command handling never waits for them.
 
     Raises:
         ShutdownRequested: If graceful shutdown is requested via command
+        Exception: The error that stopped the storage thread, if any
     """
     logger.info("Entering main loop (Press Ctrl+C to exit)")
 
-    loop_count = 0
+    next_stats_time = time.monotonic() + STATS_LOG_INTERVAL
+    frame_count = 0
+    frames_per_pass = link_stats.CountHistogram()
+
+    storage_stop = threading.Event()
+    storage_errors: List[Exception] = []
+    storage_thread = None
+
+    def run_storage() -> None:
+        try:
+            run_storage_loop(
+                flash,
+                next_index_addr,
+                next_data_addr,
+                storage_stop,
+                allocator,
+                table,
+                checkpoints,
+                compactor,
+                heap,
+            )
+        except Exception as e:
+            logger.exception("Storage loop stopped")
+            storage_errors.append(e)
+
+    if flash:
+        storage_thread = threading.Thread(
+            target=run_storage, name="storage", daemon=True
+        )
+        storage_thread.start()
 
     try:
-        while True:
+        while stop_event is None or not stop_event.is_set():
 
             #### Perform the main periodic tasks here ####
             #
@@ -57,69 +222,253 @@ def run_main_loop(
             ############################################
 
             ########## UART frame checking ##########
-            # It is not polling. The bytes received
-            # are queued and only checked and vali-
-            # -dated here if there's any to do so
+            # It is not polling. The listener thread
+            # wakes the loop up as soon as bytes are
+            # buffered; otherwise it sleeps until the
+            # next scheduled task is due. If the last
+            # pass handled frames, more may already
+            # be buffered, so don't sleep at all.
+            # Flash stores, erases and compaction
+            # run on the storage thread.
             ####
+            if storage_errors:
+                # Re-raise the error that stopped the storage thread
+                raise storage_errors[0]
+
+            if not frame_count:
+                timeout = next_stats_time - time.monotonic()
+                if stop_event is not None:
+                    timeout = min(timeout, STOP_CHECK_INTERVAL)
+                if storage_thread is not None:
+                    # Notice a failed storage thread within one store interval
+                    timeout = min(timeout, STORE_INTERVAL)
+                uart.wait_for_data(max(timeout, 0.0))
+
             # Pull all available data into the buffer
             protocol.pull_frame()
 
-            # Try to validate and extract a frame from the buffer
-            frame = protocol.validate_and_extract_frame()
+            # Classify, ACK/NACK and execute every complete frame
+            frame_count = 0
+            for frame in protocol.iter_frames():
+                protocol.process_frame(frame, flash)
+                frame_count += 1
+            frames_per_pass.record(frame_count)
+            ############################################
+
+            now = time.monotonic()
 
-            if frame:
-                # Classify the frame to determine the next action
-                frame_type = protocol.classify_frame(frame)
-                logging.info(
-                    f"Complete frame received: {frame.hex()} -> Type: {frame_type.name}"
+            if now >= next_stats_time:
+                logger.info(
+                    f"Command-to-ACK latency: {protocol.ack_latency.summary()} | "
+                    f"Parser: {protocol.stats()} | "
+                    f"Frames per pass: {frames_per_pass.summary()} | "
+                    f"RX buffer: {uart.get_rx_stats()} | "
+                    f"TX queue: {uart.get_tx_stats()}"
                 )
+                if flash:
+                    logger.info(
+                        f"Flash WIP polling: {flash.poll_summary()} | "
+                        f"Flash writes: {flash.write_stats} | "
+                        f"Flash {flash.read_summary()}"
+                    )
+                next_stats_time = now + STATS_LOG_INTERVAL
+
+    except KeyboardInterrupt:
+        logger.info("\nShutdown signal received (Ctrl+C)")
+        raise
+    finally:
+        storage_stop.set()
+        if storage_thread is not None:
+            # Let the flash job in progress finish before shutting down
+            storage_thread.join(STORAGE_JOIN_TIMEOUT)
+            if storage_thread.is_alive():
+                logger.warning(
+                    f"Storage thread still busy after {STORAGE_JOIN_TIMEOUT} s; "
+                    "shutting down anyway"
+                )
+
+
+async def run_main_loop_async(
+    protocol: uart_async.AsyncUARTProtocol,
+    flash: Optional[flash_interface.FlashMemory],
+    next_index_addr: Optional[int],
+    next_data_addr: Optional[int],
+    stop_event: Optional[asyncio.Event] = None,
+    allocator: Optional[erase_allocator.EraseAheadAllocator] = None,
+    table: Optional[index_table.IndexTable] = None,
+    checkpoints: Optional[checkpoint.CheckpointStore] = None,
+    compactor: Optional[data_compactor.Compactor] = None,
+    heap: Optional[retention.RetentionHeap] = None,
+) -> None:
+    """
+    Run the main application loop on the asyncio event loop.
+
+    Frames, periodic image storage and statistics each run as a task on the
+    same loop. Image storage runs in the default executor so long flash jobs
+    never hold up command handling. Between stores, the storage task also
+    erases ahead of the write pointer in the executor, so flash is only ever
+    touched from one job at a time.
+
+    Args:
+        protocol: The connected asyncio UART protocol.
+        flash: Optional FlashMemory instance for flash operations
+        next_index_addr: Next available index address in flash
+        next_data_addr: Next available data address in flash
+        stop_event: Optional event that ends the loop when set
+        allocator: Optional erase-ahead allocator for the data sectors
+        table: Optional in-RAM index table, updated by every store
+        checkpoints: Optional mount checkpoint store, updated by every store
+        compactor: Optional garbage collector of deleted images' data, run
+            when erase-ahead has nothing left to do
+        heap: Optional retention heap; the lowest-priority images are
+            evicted when a store finds the data section full
+
+    Raises:
+        ShutdownRequested: If graceful shutdown is requested via command
+        SerialError: If the serial link is lost
+    """
+    logger.info("Entering asyncio main loop (Press Ctrl+C to exit)")
+    loop = asyncio.get_running_loop()
 
-                # Evaluate frame based on its type
-                if frame_type == uart_protocol.FrameType.COMMAND:
-                    # Only COMMAND frames get a CRC check
-                    if protocol.evaluate_crc(frame):
-                        # If CRC is valid, execute the command
-                        cmd_byte = frame[uart_protocol.CMD_IDX]
-                        logging.info(f"Executing received command: {cmd_byte}")
-                        command_handler.execute_command(cmd_byte, flash)
-
-                elif frame_type == uart_protocol.FrameType.ACK:
-                    # Here it should be handled the logic for a successful command (Not much needed tbh)
-                    logging.info("ACK received. Previous command successful.")
+    async def handle_frames() -> None:
+        while True:
+            received = await protocol.get_frame()
+            if received is None:
+                raise uart.SerialError("Serial link lost")
+            frame, crc_ok = received
+            # Classify, ACK/NACK and execute the frame
+            protocol.parser.process_frame(frame, flash, crc_ok)
+
+    async def store_images() -> None:
+        nonlocal next_index_addr, next_data_addr
+        while True:
+            next_store_time = loop.time() + STORE_INTERVAL
+            while (
+                allocator is not None
+                and next_data_addr is not None
+                and loop.time() < next_store_time
+                and await loop.run_in_executor(
+                    None, allocator.erase_step, next_data_addr
+                )
+            ):
+                pass
+            while (
+                compactor is not None
+                and next_data_addr is not None
+                and loop.time() < next_store_time
+            ):
+                moved = await loop.run_in_executor(
+                    None, compactor.step, next_index_addr, next_data_addr
+                )
+                if not moved:
+                    break
+                next_index_addr, next_data_addr = moved
+            await asyncio.sleep(max(next_store_time - loop.time(), 0.0))
+            # THIS ONE IS FOR LASC. Store on flash every STORE_INTERVAL seconds.
+            if flash and next_data_addr is not None:
+                logger.info("Storing image to flash...")
+                result = await loop.run_in_executor(
+                    None,
+                    flash_actions.store_image_to_flash,
+                    flash,
+                    next_index_addr,
+                    next_data_addr,
+                    allocator,
+                    table,
+                    checkpoints,
+                    heap,
+                )
+                if result:
+                    next_index_addr, next_data_addr = result
                 else:
-                    # Here it should be handled NACKs, by re-transmitting.
-                    logging.warning(
-                        f"{frame_type.name} received. Previous command failed."
+                    logger.error(
+                        "Failed to store image. Will retry on the next interval."
                     )
-            ############################################
 
-            # THIS ONE IS FOR LASC. Store on flash every 10 iterations.
-            if (loop_count % 10 == 0) and (loop_count != 0):
-                if flash and next_index_addr is not None and next_data_addr is not None:
-                    logger.info(f"Loop {loop_count}: Storing image to flash...")
-                    result = flash_actions.store_image_to_flash(
-                        flash, next_index_addr, next_data_addr
-                    )
-                    if result:
-                        next_index_addr, next_data_addr = result
-                    else:
-                        logger.error(
-                            "Failed to store image. Will retry on the next interval."
-                        )
+    async def log_stats() -> None:
+        while True:
+            await asyncio.sleep(STATS_LOG_INTERVAL)
+            logger.info(
+                f"Command-to-ACK latency: {protocol.parser.ack_latency.summary()} | "
+                f"Parser: {protocol.parser.stats()} | "
+                f"Frames per read: {protocol.frames_per_read.summary()}"
+            )
+            if flash:
+                logger.info(
+                    f"Flash WIP polling: {flash.poll_summary()} | "
+                    f"Flash writes: {flash.write_stats} | "
+                    f"Flash {flash.read_summary()}"
+                )
+            if allocator is not None and next_data_addr is not None:
+                logger.info(f"Erase-ahead: {allocator.summary(next_data_addr)}")
+            if compactor is not None:
+                logger.info(f"Compactor: {compactor.summary()}")
+
+    tasks = [
+        asyncio.create_task(handle_frames(), name="frames"),
+        asyncio.create_task(store_images(), name="storage"),
+        asyncio.create_task(log_stats(), name="stats"),
+    ]
+    if stop_event is not None:
+        tasks.append(asyncio.create_task(stop_event.wait(), name="stop"))
 
-            loop_count += 1
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            # Re-raise ShutdownRequested, SerialError, ...
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-            # if loop_count % 100 == 0:
-            #     logger.debug(
-            #         f"Main loop heartbeat (iteration {loop_count}, "
-            #         f"queue size: {uart.get_queue_size()})"
-            #     )
 
-            time.sleep(MAIN_LOOP_INTERVAL)
+async def run_async(
+    flash: Optional[flash_interface.FlashMemory],
+    next_index_addr: Optional[int],
+    next_data_addr: Optional[int],
+    allocator: Optional[erase_allocator.EraseAheadAllocator] = None,
+    table: Optional[index_table.IndexTable] = None,
+    checkpoints: Optional[checkpoint.CheckpointStore] = None,
+    compactor: Optional[data_compactor.Compactor] = None,
+    heap: Optional[retention.RetentionHeap] = None,
+) -> None:
+    """
+    Open the PIC link with the asyncio transport and run the async main loop.
 
-    except KeyboardInterrupt:
-        logger.info("\nShutdown signal received (Ctrl+C)")
-        raise
+    Args:
+        flash: Optional FlashMemory instance for flash operations
+        next_index_addr: Next available index address in flash
+        next_data_addr: Next available data address in flash
+        allocator: Optional erase-ahead allocator for the data sectors
+        table: Optional in-RAM index table, updated by every store
+        checkpoints: Optional mount checkpoint store, updated by every store
+        compactor: Optional garbage collector of deleted images' data, run
+            when erase-ahead has nothing left to do
+        heap: Optional retention heap; the lowest-priority images are
+            evicted when a store finds the data section full
+    """
+    protocol = await init_setup.initialize_uart_async()
+    # Command handlers reply through uart.send_data(); route it to the transport
+    uart.attach_transport(protocol.send)
+
+    try:
+        await run_main_loop_async(
+            protocol,
+            flash,
+            next_index_addr,
+            next_data_addr,
+            allocator=allocator,
+            table=table,
+            checkpoints=checkpoints,
+            compactor=compactor,
+            heap=heap,
+        )
+    finally:
+        uart.detach_transport()
+        # Flush pending replies (e.g. the POWEROFF acknowledgment) and close
+        protocol.close()
+        await protocol.wait_closed()
 
 
 def main() -> None:
@@ -135,26 +484,70 @@ def main() -> None:
     flash = None
     shutdown_type = None  # Track what type of shutdown was requested
     next_index_addr, next_data_addr = None, None
+    allocator = None
+    checkpoints = None
+    compactor = None
+    table = None
+    heap = None
 
     try:
-        # Initialize UART and UART Protocol
-        init_setup.initialize_uart()
-        protocol = uart_protocol.UARTProtocol()
+        # Initialize UART and UART Protocol (the asyncio link opens later,
+        # inside its event loop)
+        if not config.UART_ASYNCIO:
+            init_setup.initialize_uart()
+            protocol = uart_protocol.UARTProtocol()
 
         # Initialize flash memory (optional)
         flash = init_setup.initialize_flash()
         if not flash:
             logger.warning("Running without flash memory support")
         else:
-            # Find next available flash addresses
-            addrs = flash_actions.find_next_available_address(flash)
+            # Find next available flash addresses from the mount checkpoint
+            checkpoints = checkpoint.CheckpointStore(flash)
+            addrs = flash_actions.mount_index(flash, checkpoints)
             if addrs:
                 next_index_addr, next_data_addr = addrs
             else:
                 logger.error("Flash memory is full, cannot store images.")
 
+            if next_data_addr is not None:
+                allocator = init_setup.initialize_allocator(flash, next_data_addr)
+            if allocator is not None:
+                # Eviction needs every live image, so share one loaded table
+                table = index_table.IndexTable.from_flash(flash)
+                heap = retention.RetentionHeap(
+                    index_records.RecordTable(flash, table)
+                )
+                compactor = data_compactor.Compactor(
+                    flash, allocator, table, checkpoints=checkpoints
+                )
+
         # Run main application loop
-        run_main_loop(protocol, flash, next_index_addr, next_data_addr)
+        if config.UART_ASYNCIO:
+            asyncio.run(
+                run_async(
+                    flash,
+                    next_index_addr,
+                    next_data_addr,
+                    allocator,
+                    table=table,
+                    checkpoints=checkpoints,
+                    compactor=compactor,
+                    heap=heap,
+                )
+            )
+        else:
+            run_main_loop(
+                protocol,
+                flash,
+                next_index_addr,
+                next_data_addr,
+                allocator=allocator,
+                table=table,
+                checkpoints=checkpoints,
+                compactor=compactor,
+                heap=heap,
+            )
 
     except uart.ShutdownRequested as e:
         logger.info(f"Graceful shutdown requested: {e}")
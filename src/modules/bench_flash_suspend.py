@@ -0,0 +1,72 @@
+"""
+Read latency benchmark for reads issued during erases.
+
+One thread erases 64KB blocks back to back on the simulator, with the
+datasheet typical erase time, while the main thread reads 4KB at random
+intervals. The run is repeated with and without erase suspend and the read
+latency distribution is printed; the worst case is the number that matters
+for a STATUS reply or a downlink chunk.
+
+Usage (from src/):
+    python -m modules.bench_flash_suspend --erases 10
+"""
+
+import argparse
+import random
+import threading
+import time
+from typing import List
+
+from .flash_interface import FlashMemory
+from .flash_scheduler import FlashScheduler
+from .flash_sim import SimulatedFlashSpi
+
+# --- Constants ---
+SIM_SIZE = 4 * 1024 * 1024
+DEFAULT_ERASES = 10
+READ_SIZE = 4 * 1024
+MAX_READ_INTERVAL = 0.05  # seconds, reads arrive uniformly in [0, this]
+
+
+def run(suspend: bool, erases: int) -> FlashScheduler:
+    """
+    Erase `erases` blocks in a thread while reading in this one.
+
+    Returns:
+        The scheduler, with its read latency statistics
+    """
+    spi = SimulatedFlashSpi(size=SIM_SIZE, timing=True)
+    scheduler = FlashScheduler(FlashMemory(spi=spi), suspend=suspend)
+    block = FlashMemory.SECTOR_SIZE_64KB
+    done = threading.Event()
+
+    def erase_blocks() -> None:
+        for number in range(erases):
+            scheduler.erase_sector((number * block) % SIM_SIZE, 64)
+        done.set()
+
+    eraser = threading.Thread(target=erase_blocks)
+    eraser.start()
+    rng = random.Random(0)
+    while not done.is_set():
+        time.sleep(rng.uniform(0, MAX_READ_INTERVAL))
+        scheduler.read(rng.randrange(0, SIM_SIZE - READ_SIZE), READ_SIZE)
+    eraser.join()
+    scheduler.close()
+    return scheduler
+
+
+def main(argv: List[str] | None = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Read latency during erases")
+    parser.add_argument("--erases", type=int, default=DEFAULT_ERASES)
+    args = parser.parse_args(argv)
+
+    for suspend in (False, True):
+        scheduler = run(suspend, args.erases)
+        name = "suspend" if suspend else "wait"
+        print(f"{name:<8} {scheduler.read_summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Micro-benchmark for the FlashMemory page programming path.
+
+Compares the current write path (any buffer is programmed through
+memoryview page slices and a preallocated command buffer) against the
+original one, where the caller converted the whole image with list(...) and
+every page command was rebuilt as `[cmd] + addr_bytes + data_chunk`.
+
+Both paths drive a null SPI device that accepts every command and never
+reports busy, so the numbers are the host-side cost only: CPU per page and
+peak Python heap (tracemalloc) while storing one image. --blank-ratio
+makes a share of the pages all 0xFF (padded or sparse payloads), which the
+current path skips.
+
+Usage (from src/):
+    python -m modules.bench_flash_write --size 6000000
+"""
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from .flash_interface import FlashMemory
+
+# --- Constants ---
+DEFAULT_IMAGE_SIZE = 6 * 1024 * 1024  # roughly a 12 MP JPEG
+DEFAULT_REPEAT = 3  # best of N runs is reported
+BENCH_ADDRESS = 0x00010000
+
+
+class NullSpi:
+    """SPI device that accepts every command and is never busy."""
+
+    mode = 0
+    max_speed_hz = 0
+
+    def open(self, bus: int, device: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def xfer2(self, data) -> list:
+        return [0] * len(data)
+
+    def xfer3(self, data) -> tuple:
+        return (0,) * len(data)
+
+    def writebytes2(self, data) -> None:
+        pass
+
+
+class LegacyFlashMemory(FlashMemory):
+    """The list-based page programming path, kept for comparison."""
+
+    def write_bytes(self, address: int, data: List[int]) -> bool:
+        data_len = len(data)
+        bytes_written = 0
+        while bytes_written < data_len:
+            current_address = address + bytes_written
+            bytes_to_page_end = self.PAGE_SIZE - current_address % self.PAGE_SIZE
+            chunk_size = min(bytes_to_page_end, data_len - bytes_written)
+            data_chunk = data[bytes_written : bytes_written + chunk_size]
+            self._write_page(current_address, data_chunk)
+            bytes_written += chunk_size
+        return True
+
+    def _write_page(self, address: int, data_chunk: List[int]) -> None:
+        self._write_enable()
+        addr_bytes = self._address_to_bytes(address)
+        command = [self.CMD_PAGE_PROGRAM_4B] + addr_bytes + data_chunk
+        self.spi.xfer2(command)
+        self._wait_for_write_complete("page_program")
+
+
+def open_flash(flash_class: type) -> FlashMemory:
+    """
+    Instantiate a FlashMemory subclass on a NullSpi device.
+
+    Args:
+        flash_class: FlashMemory or LegacyFlashMemory
+
+    Returns:
+        The flash instance
+    """
+    return flash_class(spi=NullSpi())
+
+
+def measure(store: Callable[[], None], repeat: int) -> Tuple[float, int]:
+    """
+    Time a store `repeat` times, then measure its peak heap once.
+
+    Returns:
+        Tuple of (best elapsed seconds, peak traced bytes)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        store()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    store()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def report(name: str, elapsed: float, peak: int, pages: int) -> None:
+    """Print one benchmark line."""
+    print(
+        f"{name:<8} {elapsed:7.3f} s, {elapsed / pages * 1e6:6.2f} us/page, "
+        f"peak heap {peak / 1e6:8.2f} MB"
+    )
+
+
+def main(argv: List[str] | None = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Flash page programming benchmark")
+    parser.add_argument("--size", type=int, default=DEFAULT_IMAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--blank-ratio", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    image = bytearray(os.urandom(args.size))
+    pages = -(-args.size // FlashMemory.PAGE_SIZE)
+    blank_pages = int(pages * args.blank_ratio)
+    page_size = FlashMemory.PAGE_SIZE
+    for page in random.Random(0).sample(range(pages), blank_pages):
+        chunk = image[page * page_size : (page + 1) * page_size]
+        image[page * page_size : (page + 1) * page_size] = b"\xff" * len(chunk)
+    image = bytes(image)
+    print(f"{args.size} byte image, {pages} pages ({blank_pages} blank)")
+
+    legacy = open_flash(LegacyFlashMemory)
+    current = open_flash(FlashMemory)
+
+    def legacy_store() -> None:
+        legacy.write_bytes(BENCH_ADDRESS, list(image))
+
+    def current_store() -> None:
+        current.write_bytes(BENCH_ADDRESS, image)
+
+    before, before_peak = measure(legacy_store, args.repeat)
+    after, after_peak = measure(current_store, args.repeat)
+    report("legacy", before, before_peak, pages)
+    report("current", after, after_peak, pages)
+    print(f"current write stats: {current.write_stats}")
+    print(
+        f"speed-up: {before / after:.2f}x, "
+        f"peak heap: {before_peak / max(after_peak, 1):.0f}x smaller"
+    )
+
+
+if __name__ == "__main__":
+    main()
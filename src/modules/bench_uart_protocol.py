@@ -0,0 +1,199 @@
+"""
+Micro-benchmark for UARTProtocol frame extraction.
+
+Compares the current parser (read-offset buffer, frames handed out as
+memoryviews, constant NACK patterns) against the original copy-based
+extractor, which copied every frame out with bytes(...), rebuilt the buffer
+with `buffer = buffer[n:]` and built the NACK patterns on each classification.
+
+Both parsers are fed the same stream in fixed-size chunks, the way the UART
+listener delivers it; every extracted frame is classified and CRC-checked,
+as process_frame() does.
+
+Usage (from src/):
+    python -m modules.bench_uart_protocol --frames 100000 --payload 8
+"""
+
+import argparse
+import time
+from typing import Callable, List
+
+from . import crc_16
+from .uart_protocol import (
+    DATA_LENGTH_IDX,
+    FRAME_OVERHEAD,
+    HEADER,
+    MINIMUM_BUFFER_SIZE,
+    STOP_BYTE,
+    FrameType,
+    UARTProtocol,
+)
+
+# --- Constants ---
+DEFAULT_FRAMES = 100_000
+DEFAULT_PAYLOAD = 8
+DEFAULT_CHUNK_SIZE = 256  # matches uart.RX_MAX_CHUNK_SIZE
+DEFAULT_REPEAT = 5  # best of N runs is reported
+BENCH_COMMAND = 0x41
+
+
+class LegacyExtractor:
+    """The copy-based extractor the parser used before, kept for comparison."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> None:
+        self.buffer.extend(data)
+
+    def validate_and_extract_frame(self) -> bytes | None:
+        if self.buffer and self.buffer[0] != HEADER:
+            self.buffer.clear()
+            return None
+        if len(self.buffer) < MINIMUM_BUFFER_SIZE:
+            return None
+
+        expected_length = self.buffer[DATA_LENGTH_IDX] + FRAME_OVERHEAD
+        if len(self.buffer) < expected_length:
+            return None
+        if self.buffer[expected_length - 1] != STOP_BYTE:
+            self.buffer.clear()
+            return None
+
+        valid_frame = bytes(self.buffer[:expected_length])
+        self.buffer = self.buffer[expected_length:]
+        return valid_frame
+
+    @staticmethod
+    def check_crc(frame: bytes) -> bool:
+        return crc_16.calculate_crc(frame) == crc_16.extract_checksum_received(frame)
+
+    @staticmethod
+    def classify_frame(frame: bytes) -> FrameType:
+        if len(frame) > MINIMUM_BUFFER_SIZE:
+            return FrameType.COMMAND
+        if frame == bytes([0x3E, 0xFF, 0x00, 0xFF, 0xFF, 0x0A]):
+            return FrameType.NACK_CHECKSUM
+        if frame == bytes([0x3E, 0x00, 0x00, 0x00, 0x00, 0x0A]):
+            return FrameType.NACK_FORMAT
+        return FrameType.ACK
+
+
+def build_stream(frames: int, payload: int) -> bytes:
+    """
+    Build a stream of back-to-back command frames with valid CRCs.
+
+    Args:
+        frames: Number of frames
+        payload: Payload length of each frame
+
+    Returns:
+        The encoded stream
+    """
+    out = bytearray()
+    for sequence in range(frames):
+        frame = bytes([HEADER, BENCH_COMMAND, payload]) + bytes(
+            (sequence + i) & 0xFF for i in range(payload)
+        )
+        crc_value = crc_16.calculate_crc(frame)
+        out += frame + bytes([crc_value >> 8, crc_value & 0xFF, STOP_BYTE])
+    return bytes(out)
+
+
+def run(
+    feed: Callable[[memoryview], int],
+    extract: Callable[[], object],
+    classify: Callable[[object], FrameType],
+    check_crc: Callable[[object], bool],
+    stream: bytes,
+    chunk_size: int,
+) -> int:
+    """
+    Push a stream through one parser, classify every frame and check the CRC
+    of every command, as process_frame() does.
+
+    Returns:
+        Number of frames extracted
+    """
+    view = memoryview(stream)
+    frames = 0
+    for offset in range(0, len(view), chunk_size):
+        chunk = view[offset : offset + chunk_size]
+        while chunk:
+            accepted = feed(chunk)
+            chunk = chunk[accepted:]
+            while (frame := extract()) is not None:
+                if classify(frame) == FrameType.COMMAND:
+                    check_crc(frame)
+                frames += 1
+    return frames
+
+
+def bench(name: str, runner: Callable[[], int], repeat: int) -> float:
+    """
+    Time a parser run `repeat` times and print the best throughput.
+
+    Returns:
+        Frames per second of the fastest run
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = runner()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    rate = frames / best
+    print(f"{name:<10} {frames:>9} frames in {best:6.3f} s -> {rate:12,.0f} frames/s")
+    return rate
+
+
+def main(argv: List[str] | None = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="UARTProtocol extraction benchmark")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--payload", type=int, default=DEFAULT_PAYLOAD)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    args = parser.parse_args(argv)
+
+    stream = build_stream(args.frames, args.payload)
+    print(
+        f"{args.frames} frames, {args.payload}-byte payload, "
+        f"{len(stream)} bytes in {args.chunk_size}-byte chunks"
+    )
+
+    def legacy_run() -> int:
+        legacy = LegacyExtractor()
+
+        def legacy_feed(chunk: memoryview) -> int:
+            legacy.feed(chunk)
+            return len(chunk)
+
+        return run(
+            legacy_feed,
+            legacy.validate_and_extract_frame,
+            legacy.classify_frame,
+            legacy.check_crc,
+            stream,
+            args.chunk_size,
+        )
+
+    def current_run() -> int:
+        current = UARTProtocol(send=lambda frame: True)
+        return run(
+            current.feed,
+            current.validate_and_extract_frame,
+            current.classify_frame,
+            current.check_crc,
+            stream,
+            args.chunk_size,
+        )
+
+    before = bench("legacy", legacy_run, args.repeat)
+    after = bench("current", current_run, args.repeat)
+    print(f"speed-up: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Persisted mount checkpoint of the image store.
+
+A checkpoint records where the next image goes: the next index slot, the
+next data address and the number of used index slots (deleted images
+included). Checkpoints are
+appended to a small FlashJournal in the META area. Each update is one page
+program. A 4KB sector is erased only when a half fills up, every
+CHECKPOINTS_PER_HALF updates.
+
+At boot, flash_actions.mount_index() starts from the latest checkpoint and
+reads only the index entries written after it, instead of the whole index.
+"""
+
+import logging
+from typing import List, Optional
+
+from modules import config
+from modules import flash_interface
+from modules import flash_journal
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+RECORD_CHECKPOINT = 0x01
+# next index(4) + next data(4) + used slots(4) + sequence(4)
+CHECKPOINT_PAYLOAD_SIZE = 16
+CHECKPOINTS_PER_HALF = (
+    config.CHECKPOINT_END + 1 - config.CHECKPOINT_1ST
+) // (2 * flash_interface.FlashMemory.PAGE_SIZE)
+
+
+class Checkpoint:
+    """Write pointers of the image store at one point in time."""
+
+    def __init__(
+        self,
+        next_index_addr: int,
+        next_data_addr: int,
+        used_slots: int,
+        sequence: int,
+    ):
+        self.next_index_addr = next_index_addr
+        self.next_data_addr = next_data_addr
+        self.used_slots = used_slots
+        self.sequence = sequence
+
+    def encode(self) -> bytes:
+        """Encode as a journal record payload."""
+        return b"".join(
+            value.to_bytes(4, "big")
+            for value in (
+                self.next_index_addr,
+                self.next_data_addr,
+                self.used_slots,
+                self.sequence,
+            )
+        )
+
+    @classmethod
+    def decode(cls, payload: bytes) -> Optional["Checkpoint"]:
+        """Decode a journal record payload (None if malformed)."""
+        if len(payload) != CHECKPOINT_PAYLOAD_SIZE:
+            return None
+        return cls(
+            *(int.from_bytes(payload[i : i + 4], "big") for i in range(0, 16, 4))
+        )
+
+
+class CheckpointStore:
+    """Double-buffered journal of mount checkpoints."""
+
+    def __init__(
+        self,
+        flash_chip: flash_interface.FlashMemory,
+        journal: Optional[flash_journal.FlashJournal] = None,
+    ):
+        """
+        Args:
+            flash_chip: FlashMemory instance
+            journal: Journal for the checkpoints (default: the checkpoint
+                area from config)
+        """
+        self.journal = journal or flash_journal.FlashJournal(
+            flash_chip, config.CHECKPOINT_1ST, config.CHECKPOINT_END + 1
+        )
+        self.journal.snapshot = self._snapshot
+        self.latest: Optional[Checkpoint] = None
+
+    def _snapshot(self) -> List[flash_journal.Record]:
+        """Only the latest checkpoint survives a compaction."""
+        if self.latest is None:
+            return []
+        return [(RECORD_CHECKPOINT, self.latest.encode())]
+
+    def load(self) -> Optional[Checkpoint]:
+        """
+        Read the latest valid checkpoint back.
+
+        Returns:
+            Latest checkpoint, or None if there is none
+        """
+        self.latest = None
+        for record_type, payload in self.journal.load():
+            if record_type != RECORD_CHECKPOINT:
+                continue
+            checkpoint = Checkpoint.decode(payload)
+            if checkpoint is not None:
+                self.latest = checkpoint
+        return self.latest
+
+    def update(
+        self, next_index_addr: int, next_data_addr: int, used_slots: int
+    ) -> None:
+        """
+        Append a checkpoint for the current write pointers.
+
+        Args:
+            next_index_addr: Next free index slot
+            next_data_addr: Next free data address
+            used_slots: Number of used index slots, tombstones included
+
+        Raises:
+            FlashJournalError: If the checkpoint cannot be written
+        """
+        sequence = self.latest.sequence + 1 if self.latest is not None else 0
+        self.latest = Checkpoint(next_index_addr, next_data_addr, used_slots, sequence)
+        self.journal.append(RECORD_CHECKPOINT, self.latest.encode())
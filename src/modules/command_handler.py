@@ -89,11 +89,13 @@ def handle_status(flash: Optional[flash_interface.FlashMemory] = None) -> str:
     """
     logger.info("STATUS command received - reporting system status")
 
+    rx_stats = uart.get_rx_stats()
     status_parts = [
         "STATUS:",
         f"UART: {'OK' if uart.is_running() else 'STOPPED'}",
         f"Flash: {'OK' if flash and flash.is_open else 'N/A'}",
-        f"Queue: {uart.get_queue_size()} msgs",
+        f"RX: {rx_stats['size']} B (max {rx_stats['high_water_mark']} B, "
+        f"lost {rx_stats['overflow_bytes']} B)",
     ]
 
     status_msg = " | ".join(status_parts)
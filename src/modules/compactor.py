@@ -0,0 +1,343 @@
+"""
+Garbage collection of the data section.
+
+Deleting an image only writes a tombstone into its index entry, so its data
+stays LIVE in the erase-ahead allocator. Compactor finds the bytes of LIVE
+sectors that no live image covers (dead bytes) and reclaims them, one 64KB
+block per idle step, the block with the most dead bytes first:
+
+- Sectors with no live data are erased right away.
+- A sector shared between dead and live data can only be erased once the
+  live image is moved out of it. Images are relocated to the write pointer
+  (stored bytes and trailer copied verbatim, a new index entry and a copy
+  of the old record written, the old entry tombstoned) only while they
+  total at most `max_relocate` bytes per step, so a large image is never
+  copied to save a few KB.
+
+Reclaimed sectors are reused by EraseAheadAllocator.find_space() once the
+write pointer wraps around, so stores can go on after DATA_END is reached.
+"""
+
+import bisect
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from modules import checkpoint
+from modules import config
+from modules import erase_allocator
+from modules import flash_actions
+from modules import flash_interface
+from modules import flash_journal
+from modules import image_integrity
+from modules import index_records
+from modules import index_table
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+BLOCK_SIZE = flash_interface.FlashMemory.SECTOR_SIZE_64KB
+SECTOR_SIZE = erase_allocator.SECTOR_SIZE
+COPY_CHUNK_SIZE = 64 * 1024  # bytes per read/write when relocating an image
+
+Extent = Tuple[int, int, int]  # (index address, start, end of stored bytes)
+
+
+class CompactorError(Exception):
+    """Custom exception for data section garbage collection."""
+
+    pass
+
+
+class Compactor:
+    """Reclaims data section space held by deleted images."""
+
+    def __init__(
+        self,
+        flash_chip: flash_interface.FlashMemory,
+        allocator: erase_allocator.EraseAheadAllocator,
+        table: Optional[index_table.IndexTable] = None,
+        checkpoints: Optional[checkpoint.CheckpointStore] = None,
+        max_relocate: int = config.COMPACT_MAX_RELOCATE_BYTES,
+    ):
+        """
+        Args:
+            flash_chip: FlashMemory instance
+            allocator: Erase-ahead allocator that owns the data sectors
+            table: Index table shared with the store and delete paths
+                (default: loaded from flash on the first step)
+            checkpoints: Optional mount checkpoint store, updated after a
+                relocation
+            max_relocate: Largest number of bytes relocated in one step
+        """
+        self.flash = flash_chip
+        self.allocator = allocator
+        self.table = table
+        self.checkpoints = checkpoints
+        self.max_relocate = max_relocate
+
+        self._sizes: Dict[Tuple[int, int], int] = {}  # (start, end) -> stored size
+        self._idle_at: Optional[Tuple[int, int, int]] = None
+
+        self.blocks_reclaimed = 0
+        self.bytes_reclaimed = 0
+        self.images_relocated = 0
+        self.bytes_relocated = 0
+
+    # --- Accounting ---
+
+    def _extents(self) -> List[Extent]:
+        """Stored extents of every live image, sorted by start address."""
+        extents = []
+        for index_addr, start, end in self.table:
+            if (start, end) not in self._sizes:
+                self._sizes[start, end] = image_integrity.stored_size(
+                    self.flash, start, end
+                )
+            extents.append((index_addr, start, start + self._sizes[start, end]))
+        extents.sort(key=lambda extent: extent[1])
+        return extents
+
+    def _coverage(self, extents: List[Extent], starts: List[int], sector: int) -> int:
+        """Bytes of the sector at `sector` that live images occupy."""
+        sector_end = sector + SECTOR_SIZE
+        covered = 0
+        # Extents never overlap, so their ends are sorted too
+        for number in range(bisect.bisect_left(starts, sector_end) - 1, -1, -1):
+            _, start, end = extents[number]
+            if end <= sector:
+                break
+            covered += min(end, sector_end) - max(start, sector)
+        return covered
+
+    def _sector_dead(
+        self, extents: List[Extent], starts: List[int], sector: int, write_addr: int
+    ) -> int:
+        """Dead bytes of one sector (0 unless it is LIVE)."""
+        index = (sector - self.allocator.start) // SECTOR_SIZE
+        if self.allocator.states[index] != erase_allocator.SectorState.LIVE:
+            return 0
+        if sector <= write_addr < sector + SECTOR_SIZE:
+            # Its tail is erased space the next store will use
+            return 0
+        return SECTOR_SIZE - self._coverage(extents, starts, sector)
+
+    def dead_bytes(self, write_addr: int) -> Dict[int, Dict[int, int]]:
+        """
+        Find the dead bytes of every LIVE sector.
+
+        Args:
+            write_addr: Current data write pointer
+
+        Returns:
+            Dictionary of block address -> {sector address: dead bytes}
+        """
+        extents = self._extents()
+        starts = [start for _, start, _ in extents]
+        live = bytes([erase_allocator.SectorState.LIVE])
+
+        blocks: Dict[int, Dict[int, int]] = {}
+        index = self.allocator.states.find(live)
+        while index >= 0:
+            sector = self.allocator.start + index * SECTOR_SIZE
+            dead = self._sector_dead(extents, starts, sector, write_addr)
+            if dead:
+                blocks.setdefault(sector - sector % BLOCK_SIZE, {})[sector] = dead
+            index = self.allocator.states.find(live, index + 1)
+        return blocks
+
+    def summary(self) -> str:
+        """
+        Get a one-line summary of the work done so far.
+
+        Returns:
+            Summary string
+        """
+        return (
+            f"blocks_reclaimed={self.blocks_reclaimed}, "
+            f"bytes_reclaimed={self.bytes_reclaimed}, "
+            f"images_relocated={self.images_relocated}, "
+            f"bytes_relocated={self.bytes_relocated}"
+        )
+
+    # --- Collection ---
+
+    def _relocate(
+        self, extent: Extent, next_index_addr: int, next_data_addr: int
+    ) -> Tuple[Optional[int], int]:
+        """
+        Copy one live image to free space and move its index entry there.
+
+        Returns:
+            Tuple of (new_index_address, new_data_address); the index address
+            is None once every slot is used
+
+        Raises:
+            CompactorError: If there is no room or the copy fails
+        """
+        index_addr, start, stored_end = extent
+        number = self.table.number_of(index_addr)
+        _, end = self.table[number]
+        size = stored_end - start
+
+        target = self.allocator.find_space(next_data_addr, size)
+        if target is None or not self.allocator.prepare(target, size):
+            raise CompactorError(f"No room to relocate the image at 0x{start:08X}")
+
+        buffer = bytearray(min(COPY_CHUNK_SIZE, size))
+        view = memoryview(buffer)
+        for offset in range(0, size, len(buffer)):
+            chunk = view[: min(len(buffer), size - offset)]
+            self.flash.readinto(start + offset, chunk)
+            if not self.flash.write_bytes(target + offset, chunk):
+                raise CompactorError(f"Failed to copy the image at 0x{start:08X}")
+
+        # Never replace a good image with a bad copy
+        copy_status, _ = image_integrity.verify_image(
+            self.flash, target, target + end - start
+        )
+        if copy_status == image_integrity.IntegrityStatus.CORRUPT:
+            original_status, _ = image_integrity.verify_image(self.flash, start, end)
+            if original_status != image_integrity.IntegrityStatus.CORRUPT:
+                raise CompactorError(f"Copy of the image at 0x{start:08X} is corrupt")
+
+        entry = flash_actions.create_index_entry(target, target + end - start)
+        if not self.flash.write_bytes(next_index_addr, entry):
+            raise CompactorError("Failed to write the relocated index entry")
+        self.table.append(target, target + end - start)
+        # Keep the image's class, capture time, priority and age
+        record = index_records.read_record(
+            self.flash,
+            self.table.slot_of(number),
+            start,
+            end,
+            self.table.sequence(number),
+        )
+        record.start_addr, record.end_addr = target, target + end - start
+        new_slot = self.table.slot_of(len(self.table) - 1)
+        if not index_records.write_record(self.flash, new_slot, record):
+            logger.error("Failed to write the relocated image's record")
+        self._sizes[target, target + end - start] = size
+        flash_actions.delete_image(self.flash, index_addr, self.table)
+
+        self.images_relocated += 1
+        self.bytes_relocated += size
+        logger.info(
+            f"Relocated image 0x{start:08X} -> 0x{target:08X} ({size:,} bytes)"
+        )
+
+        next_index_addr = self.table.next_index_addr
+        next_data_addr = target + size
+        if self.checkpoints is not None and next_index_addr is not None:
+            try:
+                self.checkpoints.update(
+                    next_index_addr, next_data_addr, len(self.table)
+                )
+            except (
+                flash_journal.FlashJournalError,
+                flash_interface.FlashMemoryError,
+            ) as e:
+                logger.error(f"Failed to write mount checkpoint: {e}")
+        return next_index_addr, next_data_addr
+
+    def _reclaim(self, sectors: List[int]) -> int:
+        """Erase runs of dead sectors; returns the bytes reclaimed."""
+        reclaimed = 0
+        run_start = None
+        for position, sector in enumerate(sectors):
+            if run_start is None:
+                run_start = sector
+            if (
+                position + 1 < len(sectors)
+                and sectors[position + 1] == sector + SECTOR_SIZE
+            ):
+                continue
+            size = sector + SECTOR_SIZE - run_start
+            if self.allocator.reclaim(run_start, size):
+                reclaimed += size
+            run_start = None
+        return reclaimed
+
+    def step(
+        self, next_index_addr: Optional[int], next_data_addr: int
+    ) -> Optional[Tuple[Optional[int], int]]:
+        """
+        Reclaim the dead bytes of one 64KB block.
+
+        Blocks are tried from the most dead bytes down until one yields
+        something: sectors without live data are erased, and live images
+        sharing a sector with dead data are relocated first if they total
+        at most max_relocate bytes.
+
+        Args:
+            next_index_addr: Next free index slot (None if the index is full;
+                then nothing is relocated)
+            next_data_addr: Current data write pointer
+
+        Returns:
+            Tuple of (next_index_address, next_data_address), moved on if an
+            image was relocated, or None if there was nothing to reclaim
+        """
+        if self.table is None:
+            self.table = index_table.IndexTable.from_flash(self.flash)
+        elif self.table.next_index_addr != next_index_addr:
+            # Reload in place, the table may be shared
+            self.table.load(self.flash)
+        state = (next_index_addr, next_data_addr, self.table.deleted_count)
+        if state == self._idle_at:
+            return None
+
+        blocks = self.dead_bytes(next_data_addr)
+        for block in sorted(blocks, key=lambda block: -sum(blocks[block].values())):
+            extents = self._extents()
+            # Live images that share a sector with dead bytes of this block
+            shared = [
+                sector for sector, dead in blocks[block].items() if dead < SECTOR_SIZE
+            ]
+            movers = [
+                extent
+                for extent in extents
+                if any(
+                    extent[1] < sector + SECTOR_SIZE and extent[2] > sector
+                    for sector in shared
+                )
+            ]
+            moved = 0
+            if (
+                movers
+                and next_index_addr is not None
+                and sum(end - start for _, start, end in movers) <= self.max_relocate
+            ):
+                try:
+                    for extent in movers:
+                        next_index_addr, next_data_addr = self._relocate(
+                            extent, next_index_addr, next_data_addr
+                        )
+                        moved += 1
+                        next_index_addr = self.table.next_index_addr
+                        if next_index_addr is None:
+                            break
+                except (CompactorError, flash_interface.FlashMemoryError) as e:
+                    logger.warning(f"Relocation for block 0x{block:08X} stopped: {e}")
+                extents = self._extents()
+
+            starts = [start for _, start, _ in extents]
+            erasable = [
+                sector
+                for sector in range(block, block + BLOCK_SIZE, SECTOR_SIZE)
+                if self.allocator.start <= sector < self.allocator.end
+                and self._sector_dead(extents, starts, sector, next_data_addr)
+                == SECTOR_SIZE
+            ]
+            reclaimed = self._reclaim(erasable)
+            if reclaimed or moved:
+                self.blocks_reclaimed += 1
+                self.bytes_reclaimed += reclaimed
+                logger.info(
+                    f"Compacted block 0x{block:08X}: {moved} images relocated, "
+                    f"{reclaimed:,} bytes reclaimed"
+                )
+                return next_index_addr, next_data_addr
+
+        self._idle_at = state
+        return None
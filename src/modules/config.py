@@ -4,6 +4,24 @@ UART_PORT = "/dev/ttyAMA0"
 BAUD_RATE = 9600
 SPI_BUS = 0
 SPI_DEVICE = 1
+# Use the asyncio transport/main loop instead of the listener thread
+UART_ASYNCIO = False
+# Flash backend: "spi" (MT25QL01GBBB on SPI) or "sim" (file-backed simulator)
+FLASH_BACKEND = "spi"
+FLASH_SIM_PATH = "/var/tmp/icu_flash.img"
+# Make the simulator hold WIP for the datasheet typical times
+FLASH_SIM_TIMING = False
+# Erased 4KB data sectors kept ready past the write pointer (8MB)
+ERASE_AHEAD_SECTORS = 2048
+# Suspend erases in progress to serve flash reads (False: reads wait)
+FLASH_ERASE_SUSPEND = True
+# Most bytes of live images the compactor copies per step to free a block
+COMPACT_MAX_RELOCATE_BYTES = 1024 * 1024
+# Retention priority (0-254, higher is kept longer) of each classification;
+# images are evicted lowest priority first when the data section is full
+CLASS_PRIORITIES = {"Forests": 200, "Plains": 150, "Sky": 50}
+DEFAULT_PRIORITY = 100  # unknown class, or stored before priorities existed
+RETENTION_AGE_WEIGHT = 0.5  # priority points gained per newer image stored
 
 """ --- Memory Sections ---"""
 # Index Section boundaries
@@ -11,7 +29,19 @@ INDEX_1ST = 0x00000000
 INDEX_END = 0x00002FFF
 # Data Section boundaries
 DATA_1ST = 0x00003000
-DATA_END = 0x07FFFFFF
+DATA_END = 0x07FBFFFF
+# Metadata Section (journals), the top 256KB of the chip
+META_1ST = 0x07FC0000
+META_END = 0x07FFFFFF
+# Erase-ahead allocator sector state journal (two 64KB halves)
+ALLOC_JOURNAL_1ST = 0x07FC0000
+ALLOC_JOURNAL_END = 0x07FDFFFF
+# Mount checkpoint journal (two 4KB halves)
+CHECKPOINT_1ST = 0x07FE0000
+CHECKPOINT_END = 0x07FE1FFF
+# Index slot metadata records (class, time, priority...), 32 bytes per slot
+INDEX_RECORD_1ST = 0x07FE2000
+INDEX_RECORD_END = 0x07FEDFFF
 
 """ --- Project Settings ---"""
 SLEEP_TIME = 0.1
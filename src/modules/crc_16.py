@@ -8,8 +8,17 @@ appreciate it if you could report them. Thank you!
 
 Original C author: Ariel Manabe
 Python conversion: Gemini
+
+The CRC itself is computed by a selectable backend:
+ - "table":  the original byte-at-a-time table loop
+ - "slice8": slice-by-8 tables, eight bytes per loop iteration
+ - "hqx":    binascii.crc_hqx, which implements this exact CRC in C (default)
+All backends are checked against the reference values below at import time.
 """
 
+import binascii
+from typing import Callable, Dict
+
 # CRC-16 CCITT TABLE DRIVEN ALGORITHM
 # Configuration:
 #  - Width         = 16
@@ -61,6 +70,199 @@ CRC_TABLE = [
     0x6e17, 0x7e36, 0x4e55, 0x5e74, 0x2e93, 0x3eb2, 0x0ed1, 0x1ef0
 ]
 
+CRC_INIT = 0x1D0F  # initial CRC value. DO NOT CHANGE this value.
+SLICE_WIDTH = 8  # bytes consumed per iteration by the slice-by-N backend
+DEFAULT_BACKEND = "hqx"
+
+# Reference values from the header above: (data, expected checksum).
+# The "0x65" arrays there are the decimal byte 65, i.e. 0x41 ('A').
+CHECK_VALUES = (
+    (b"", 0x1D0F),
+    (b"\x41", 0x9479),
+    (b"123456789", 0xE5CC),
+    (b"\x41" * 256, 0xE938),
+)
+
+
+class CRCSelfTestError(Exception):
+    """Raised when a CRC backend does not reproduce the reference values."""
+
+    pass
+
+
+def _build_slice_tables(width: int) -> list:
+    """
+    Build the tables for slice-by-N: table k holds the CRC contribution of a
+    byte followed by k zero bytes.
+    """
+    tables = [list(CRC_TABLE)]
+    for _ in range(1, width):
+        previous = tables[-1]
+        tables.append(
+            [((value << 8) & 0xFFFF) ^ CRC_TABLE[value >> 8] for value in previous]
+        )
+    return tables
+
+
+_SLICE_TABLES = _build_slice_tables(SLICE_WIDTH)
+
+
+def _crc_table(data: bytes, crc: int) -> int:
+    """Byte-at-a-time table-driven CRC (the original algorithm)."""
+    for byte in data:
+        table_index = ((crc >> 8) ^ byte) & 0xFF
+        crc = (CRC_TABLE[table_index] ^ (crc << 8)) & 0xFFFF
+    return crc
+
+
+def _crc_slice8(data: bytes, crc: int) -> int:
+    """Slice-by-8 table-driven CRC: eight bytes per loop iteration."""
+    t0, t1, t2, t3, t4, t5, t6, t7 = _SLICE_TABLES
+    data = memoryview(data).cast("B")
+    full = len(data) - len(data) % SLICE_WIDTH
+
+    for i in range(0, full, SLICE_WIDTH):
+        b0, b1, b2, b3, b4, b5, b6, b7 = data[i : i + SLICE_WIDTH]
+        crc = (
+            t7[b0 ^ (crc >> 8)]
+            ^ t6[b1 ^ (crc & 0xFF)]
+            ^ t5[b2]
+            ^ t4[b3]
+            ^ t3[b4]
+            ^ t2[b5]
+            ^ t1[b6]
+            ^ t0[b7]
+        )
+
+    return _crc_table(data[full:], crc)
+
+
+def _crc_hqx(data: bytes, crc: int) -> int:
+    """CRC computed in C by the standard library."""
+    return binascii.crc_hqx(data, crc)
+
+
+BACKENDS: Dict[str, Callable[[bytes, int], int]] = {
+    "table": _crc_table,
+    "slice8": _crc_slice8,
+    "hqx": _crc_hqx,
+}
+
+_backend = BACKENDS[DEFAULT_BACKEND]
+_backend_name = DEFAULT_BACKEND
+
+
+def set_backend(name: str) -> None:
+    """
+    Select the CRC backend used by every function in this module.
+
+    Args:
+        name: One of BACKENDS ("table", "slice8", "hqx")
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    global _backend, _backend_name
+
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown CRC backend '{name}', expected one of {sorted(BACKENDS)}"
+        )
+    _backend = BACKENDS[name]
+    _backend_name = name
+
+
+def get_backend() -> str:
+    """Name of the CRC backend in use."""
+    return _backend_name
+
+
+def crc16(data: bytes, crc: int = CRC_INIT) -> int:
+    """
+    Calculate the CRC of raw data.
+
+    Args:
+        data: Bytes-like object to checksum
+        crc: CRC of the preceding data, to continue a running checksum
+
+    Returns:
+        The CRC value.
+    """
+    return _backend(data, crc)
+
+
+class CRC16:
+    """
+    Incremental CRC-16, for data that arrives or is written in pieces.
+
+    Example:
+        crc = CRC16()
+        crc.update(first_chunk)
+        crc.update(second_chunk)
+        value = crc.value
+    """
+
+    def __init__(self, data: bytes = b"", crc: int = CRC_INIT):
+        """
+        Args:
+            data: Optional first chunk of data
+            crc: Starting CRC value
+        """
+        self.value = crc
+        if data:
+            self.update(data)
+
+    def update(self, data: bytes) -> "CRC16":
+        """
+        Add data to the checksum.
+
+        Args:
+            data: Bytes-like object
+
+        Returns:
+            self, so calls can be chained
+        """
+        self.value = _backend(data, self.value)
+        return self
+
+    def reset(self, crc: int = CRC_INIT) -> None:
+        """
+        Start a new checksum.
+
+        Args:
+            crc: Starting CRC value
+        """
+        self.value = crc
+
+    def digest(self) -> bytes:
+        """CRC as two bytes, MSB first (the order used in frames)."""
+        return self.value.to_bytes(2, "big")
+
+    def copy(self) -> "CRC16":
+        """Independent copy of the running checksum."""
+        return CRC16(crc=self.value)
+
+
+def self_test() -> None:
+    """
+    Check every backend, in one piece and incrementally, against the
+    reference values.
+
+    Raises:
+        CRCSelfTestError: If any backend gives a wrong result
+    """
+    for name, backend in BACKENDS.items():
+        for data, expected in CHECK_VALUES:
+            whole = backend(data, CRC_INIT)
+            third = len(data) // 3
+            split = backend(data[third:], backend(data[:third], CRC_INIT))
+            if whole != expected or split != expected:
+                raise CRCSelfTestError(
+                    f"CRC backend '{name}' failed self-test on {data[:9]!r}: "
+                    f"expected 0x{expected:04X}, got 0x{whole:04X}/0x{split:04X}"
+                )
+
+
 def calculate_crc(data: bytes) -> int:
     """
     Calculate the CRC value with new data.
@@ -75,23 +277,16 @@ def calculate_crc(data: bytes) -> int:
     This function calculates the CRC over [Command, LEN, Payload].
 
     Args:
-        data: A bytes object representing the frame, without the CRC.
+        data: A bytes-like object representing the frame, without the CRC.
 
     Returns:
         The calculated CRC value.
     """
-    crc = 0x1D0F  # initial CRC value. DO NOT CHANGE this value.
-
     # The C code iterates from index 1 up to and including index (payload_length + 2).
     # This corresponds to the command, length, and payload.
     payload_length = data[2]
-    data_to_process = data[1 : payload_length + 3]
-
-    for byte in data_to_process:
-        table_index = ((crc >> 8) ^ byte) & 0xFF
-        crc = (CRC_TABLE[table_index] ^ (crc << 8)) & 0xFFFF
+    return _backend(data[1 : payload_length + 3], CRC_INIT)
 
-    return crc & 0xFFFF
 
 def extract_checksum_received(data: bytes) -> int:
     """
@@ -107,4 +302,8 @@ def extract_checksum_received(data: bytes) -> int:
     crc_msb = data[payload_length + 3]
     crc_lsb = data[payload_length + 4]
 
-    return ((crc_msb << 8) & 0xFF00) | (crc_lsb & 0xFF)
\ No newline at end of file
+    return ((crc_msb << 8) & 0xFF00) | (crc_lsb & 0xFF)
+
+
+# Refuse to run with a backend that does not reproduce the reference values
+self_test()
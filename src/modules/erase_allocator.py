@@ -0,0 +1,375 @@
+"""
+Erase-ahead allocation of data section sectors.
+
+Flash can only be programmed after it is erased, and an erase takes
+50-150 ms per 4-64 KB. EraseAheadAllocator tracks the state of every 4 KB
+sector of the data section and keeps `ahead_sectors` erased sectors ready
+past the write pointer. It erases them one step at a time while the main
+loop is idle, so a store finds its space already erased.
+
+Sector states are persisted in a FlashJournal in the META area, so a
+reboot neither forgets erased sectors nor trusts sectors it never saw
+erased.
+
+Once the write pointer reaches the end of the region, find_space() places
+the next store in the first run of reclaimed (not LIVE) sectors, wrapping
+around to the start, so space freed by the compactor is reused.
+"""
+
+import logging
+from enum import IntEnum
+from typing import List, Optional, Sequence, Tuple
+
+from modules import config
+from modules import flash_interface
+from modules import flash_journal
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+SECTOR_SIZE = flash_interface.FlashMemory.SECTOR_SIZE_4KB
+MAX_STEP_SIZE = flash_interface.FlashMemory.SECTOR_SIZE_64KB  # per idle step
+
+# Journal record types
+RECORD_SNAPSHOT = 0x01  # run-length encoded states of every sector
+RECORD_STATE = 0x02  # state(1) + first sector(4) + sector count(4)
+
+RUN_SIZE = 5  # state(1) + run length(4)
+
+
+class SectorState(IntEnum):
+    """State of one data section sector."""
+
+    ERASED = 0  # Blank, ready to be programmed
+    LIVE = 1  # Holds (or is reserved for) stored data
+    DIRTY = 2  # Unknown or no longer needed, must be erased before use
+
+
+class EraseAheadAllocator:
+    """Keeps erased sectors ready ahead of the data write pointer."""
+
+    def __init__(
+        self,
+        flash_chip: flash_interface.FlashMemory,
+        start: int = config.DATA_1ST,
+        end: int = config.DATA_END + 1,
+        ahead_sectors: int = config.ERASE_AHEAD_SECTORS,
+        journal: Optional[flash_journal.FlashJournal] = None,
+    ):
+        """
+        Args:
+            flash_chip: FlashMemory instance
+            start: First address of the managed region (4KB-aligned)
+            end: End of the managed region (exclusive, 4KB-aligned)
+            ahead_sectors: Erased sectors to keep ready past the write pointer
+            journal: Journal for the sector states (default: the allocator
+                journal area from config)
+        """
+        self.flash = flash_chip
+        self.start = start
+        self.end = end
+        self.ahead_sectors = ahead_sectors
+        self.states = bytearray([SectorState.DIRTY]) * ((end - start) // SECTOR_SIZE)
+        self.journal = journal or flash_journal.FlashJournal(
+            flash_chip,
+            config.ALLOC_JOURNAL_1ST,
+            config.ALLOC_JOURNAL_END + 1,
+        )
+        self.journal.snapshot = self._snapshot
+
+        self.idle_erases = 0
+        self.sectors_erased = 0
+        self.critical_erases = 0
+
+    # --- Persistence ---
+
+    def _snapshot(self) -> List[flash_journal.Record]:
+        """Encode every sector state as runs, for journal compaction."""
+        payload = bytearray()
+        index = 0
+        count = len(self.states)
+        while index < count:
+            state = self.states[index]
+            run_end = index + 1
+            while run_end < count and self.states[run_end] == state:
+                run_end += 1
+            payload.append(state)
+            payload += (run_end - index).to_bytes(4, "big")
+            index = run_end
+        return [(RECORD_SNAPSHOT, bytes(payload))]
+
+    def _replay(self, record_type: int, payload: bytes) -> None:
+        """Apply one journal record to the in-RAM states."""
+        if record_type == RECORD_SNAPSHOT:
+            index = 0
+            for offset in range(0, len(payload), RUN_SIZE):
+                state = payload[offset]
+                length = int.from_bytes(payload[offset + 1 : offset + RUN_SIZE], "big")
+                self.states[index : index + length] = bytes([state]) * length
+                index += length
+        elif record_type == RECORD_STATE:
+            state = payload[0]
+            first = int.from_bytes(payload[1:5], "big")
+            count = int.from_bytes(payload[5:9], "big")
+            self.states[first : first + count] = bytes([state]) * count
+        else:
+            logger.warning(f"Unknown allocator journal record 0x{record_type:02X}")
+
+    def load(self, write_addr: int) -> None:
+        """
+        Restore the sector states from the journal.
+
+        Without a journal (first boot), sectors below the write pointer are
+        taken as LIVE and the rest as DIRTY; erase_step() blank-checks
+        before erasing, so sectors that are already blank cost only a read.
+
+        Args:
+            write_addr: Current data write pointer
+        """
+        records = self.journal.load()
+        if records:
+            for record_type, payload in records:
+                self._replay(record_type, payload)
+        else:
+            live = self._sector(max(write_addr - 1, self.start - 1)) + 1
+            self.states[:live] = bytes([SectorState.LIVE]) * live
+            self.journal.compact()
+
+        logger.info(f"Erase-ahead allocator loaded: {self.summary(write_addr)}")
+
+    def _set(self, first: int, count: int, state: SectorState) -> None:
+        """Change the state of a run of sectors and journal it."""
+        self.states[first : first + count] = bytes([state]) * count
+        payload = bytes([state]) + first.to_bytes(4, "big") + count.to_bytes(4, "big")
+        self.journal.append(RECORD_STATE, payload)
+
+    # --- Queries ---
+
+    def _sector(self, address: int) -> int:
+        return (address - self.start) // SECTOR_SIZE
+
+    def _sectors_inside(self, address: int, size: int) -> Tuple[int, int]:
+        """First and end sector fully inside [address, address + size)."""
+        first = -(-(address - self.start) // SECTOR_SIZE)
+        end = (address + size - self.start) // SECTOR_SIZE
+        return first, end
+
+    def _first_free_sector(self, write_addr: int) -> int:
+        """First sector a store at write_addr cannot share with older data."""
+        first = self._sector(write_addr)
+        if (write_addr - self.start) % SECTOR_SIZE:
+            # The pointer's own sector already holds the previous image
+            first += 1
+        return first
+
+    def erased_ahead(self, write_addr: int) -> int:
+        """
+        Count the contiguous erased sectors past the write pointer.
+
+        Args:
+            write_addr: Current data write pointer
+
+        Returns:
+            Number of sectors, at most the end of the region
+        """
+        index = self._first_free_sector(write_addr)
+        count = 0
+        while index + count < len(self.states):
+            if self.states[index + count] != SectorState.ERASED:
+                break
+            count += 1
+        return count
+
+    def summary(self, write_addr: int) -> str:
+        """
+        Get a one-line, human readable summary.
+
+        Args:
+            write_addr: Current data write pointer
+
+        Returns:
+            Summary string
+        """
+        return (
+            f"ready={self.erased_ahead(write_addr)}/{self.ahead_sectors} sectors, "
+            f"live={self.states.count(SectorState.LIVE)}, "
+            f"dirty={self.states.count(SectorState.DIRTY)}, "
+            f"idle_erases={self.idle_erases}, "
+            f"critical_erases={self.critical_erases}"
+        )
+
+    def find_space(
+        self,
+        write_addr: int,
+        size: int,
+        released: Sequence[Tuple[int, int]] = (),
+    ) -> Optional[int]:
+        """
+        Find where a store of `size` bytes can go.
+
+        The write pointer itself is preferred, so stores stay packed back
+        to back. Otherwise the first run of sectors that are not LIVE and
+        is long enough is used, searching forward and wrapping around.
+
+        Args:
+            write_addr: Current data write pointer
+            size: Bytes the store will program
+            released: (address, size) ranges to treat as already released,
+                to plan a reclaim without doing it
+
+        Returns:
+            Start address for the store, or None if no run is long enough
+        """
+        states = bytearray(self.states) if released else self.states
+        for address, length in released:
+            begin, end = self._sectors_inside(address, length)
+            if end > begin:
+                states[begin:end] = bytes([SectorState.DIRTY]) * (end - begin)
+
+        first = self._first_free_sector(write_addr)
+        last = self._sector(write_addr + size - 1)
+        if (
+            self.start <= write_addr
+            and last < len(states)
+            and states.find(bytes([SectorState.LIVE]), first, last + 1) < 0
+        ):
+            return write_addr
+
+        needed = -(-size // SECTOR_SIZE)
+        count = len(states)
+        origin = min(max(first, 0), count)
+        for begin, end in ((origin, count), (0, origin)):
+            index = begin
+            while index < end:
+                live = states.find(bytes([SectorState.LIVE]), index, end)
+                run_end = end if live < 0 else live
+                if run_end - index >= needed:
+                    return self.start + index * SECTOR_SIZE
+                if live < 0:
+                    break
+                index = live + 1
+        return None
+
+    # --- Erasing ---
+
+    def _erase(self, first: int, count: int) -> bool:
+        start = self.start + first * SECTOR_SIZE
+        if not self.flash.erase_range(start, start + count * SECTOR_SIZE):
+            return False
+        self.sectors_erased += count
+        self._set(first, count, SectorState.ERASED)
+        return True
+
+    def erase_step(self, write_addr: int) -> bool:
+        """
+        Erase the next dirty run inside the erase-ahead window.
+
+        One step erases at most MAX_STEP_SIZE (one 64KB block, ~150 ms), so
+        the caller gets control back quickly.
+
+        Args:
+            write_addr: Current data write pointer
+
+        Returns:
+            True if an erase was done, False if the window is already ready
+        """
+        first = self._first_free_sector(write_addr)
+        window_end = min(first + self.ahead_sectors, len(self.states))
+
+        index = self.states.find(bytes([SectorState.DIRTY]), first, window_end)
+        if index < 0:
+            return False
+
+        # Stop at the next 64KB boundary so erase_range can use one block
+        step = MAX_STEP_SIZE // SECTOR_SIZE
+        offset = (self.start // SECTOR_SIZE + index) % step
+        run_end = min(index + step - offset, window_end)
+        for scan in range(index + 1, run_end):
+            if self.states[scan] != SectorState.DIRTY:
+                run_end = scan
+                break
+
+        if not self._erase(index, run_end - index):
+            return False
+        self.idle_erases += 1
+        return True
+
+    def prepare(self, address: int, size: int) -> bool:
+        """
+        Make sure [address, address + size) can be programmed, and reserve it.
+
+        Dirty sectors are erased on the spot, which is what erase-ahead
+        exists to avoid and is counted in critical_erases.
+
+        Args:
+            address: Data address of the store
+            size: Bytes the store will program
+
+        Returns:
+            True if the range is erased and now LIVE, False if it overlaps
+            live data
+        """
+        first = self._first_free_sector(address)
+        last = self._sector(address + size - 1)
+        if last >= len(self.states) or address < self.start:
+            logger.error(f"Store at 0x{address:08X} is outside the data section")
+            return False
+
+        for index in range(first, last + 1):
+            if self.states[index] == SectorState.LIVE:
+                logger.error(
+                    f"Store at 0x{address:08X} would overwrite live sector "
+                    f"0x{self.start + index * SECTOR_SIZE:08X}"
+                )
+                return False
+
+        dirty = [
+            index
+            for index in range(first, last + 1)
+            if self.states[index] != SectorState.ERASED
+        ]
+        if dirty:
+            logger.warning(
+                f"{len(dirty)} sectors for the store at 0x{address:08X} were not "
+                "erased ahead; erasing on the critical path"
+            )
+            self.critical_erases += 1
+            if not self._erase(dirty[0], dirty[-1] - dirty[0] + 1):
+                return False
+
+        if last >= first:
+            self._set(first, last - first + 1, SectorState.LIVE)
+        return True
+
+    def release(self, address: int, size: int) -> None:
+        """
+        Mark the sectors fully inside [address, address + size) DIRTY, so
+        they are erased and reused.
+
+        Args:
+            address: Start of the freed data
+            size: Bytes freed
+        """
+        first, end = self._sectors_inside(address, size)
+        if end > first:
+            self._set(first, end - first, SectorState.DIRTY)
+
+    def reclaim(self, address: int, size: int) -> bool:
+        """
+        Release the sectors fully inside [address, address + size) and erase
+        them now.
+
+        Args:
+            address: Start of the freed data
+            size: Bytes freed
+
+        Returns:
+            True if the sectors are erased, False if the erase failed (they
+            stay DIRTY)
+        """
+        first, end = self._sectors_inside(address, size)
+        if end <= first:
+            return True
+        self._set(first, end - first, SectorState.DIRTY)
+        return self._erase(first, end - first)
@@ -1,9 +1,17 @@
 import logging
-from typing import Optional, Tuple, List
+import time
+from typing import Container, Dict, List, Optional, Set, Tuple
 
 from modules import flash_interface
+from modules import flash_journal
+from modules import checkpoint
 from modules import config
+from modules import erase_allocator
+from modules import image_integrity
+from modules import index_records
+from modules import index_table
 from modules import photo_cnn_mockup
+from modules import retention
 
 # Configure module logger
 logger = logging.getLogger(__name__)
@@ -12,6 +20,9 @@ logger = logging.getLogger(__name__)
 INDEX_ENTRY_SIZE = 8  # bytes (4-byte start + 4-byte end address)
 ADDRESS_SIZE = 4  # bytes
 ERASED_BYTE = 0xFF
+WRITE_CHUNK_SIZE = image_integrity.DEFAULT_BLOCK_SIZE  # bytes per streamed write
+MOUNT_VERIFY_ENTRIES = 8  # entries read past a checkpoint before a binary search
+INDEX_SLOTS = (config.INDEX_END + 1 - config.INDEX_1ST) // INDEX_ENTRY_SIZE
 
 
 class FlashStorageError(Exception):
@@ -66,41 +77,174 @@ def create_index_entry(start_addr: int, end_addr: int) -> List[int]:
 
 def find_next_available_address(
     flash_chip: flash_interface.FlashMemory,
+    table: Optional[index_table.IndexTable] = None,
 ) -> Tuple[Optional[int], Optional[int]]:
     """
-    Scan the Index Section to find the next free slot for an image.
+    Find the next free index slot and data address for an image.
 
     Args:
         flash_chip: FlashMemory instance
+        table: Loaded index table (default: read the Index Section now)
 
     Returns:
         Tuple of (next_index_address, next_data_address) or (None, None) if full
     """
     logger.info("Scanning index for next available address...")
+    if table is None:
+        table = index_table.IndexTable.from_flash(flash_chip)
 
-    current_index_addr = config.INDEX_1ST
+    current_index_addr = table.next_index_addr
+    if current_index_addr is None:
+        logger.error("Index section is full!")
+        return None, None
+
+    # The next data starts after the last image and its trailer
     last_data_end_addr = config.DATA_1ST
+    if len(table):
+        start_addr, end_addr = table[-1]
+        last_data_end_addr = start_addr + image_integrity.stored_size(
+            flash_chip, start_addr, end_addr
+        )
 
-    while current_index_addr <= config.INDEX_END:
-        # Read an 8-byte index entry
-        entry_bytes = flash_chip.read_bytes(current_index_addr, INDEX_ENTRY_SIZE)
+    logger.info(
+        f"Found free index slot at 0x{current_index_addr:08X}, "
+        f"next data address: 0x{last_data_end_addr:08X}"
+    )
+    return current_index_addr, last_data_end_addr
+
+
+def _slot_address(slot: int) -> int:
+    """Index address of a slot number, wrapping around the index."""
+    return config.INDEX_1ST + slot % INDEX_SLOTS * INDEX_ENTRY_SIZE
+
+
+def _slot_empty(flash_chip: flash_interface.FlashMemory, slot: int) -> bool:
+    """True if the index slot (wrapping around the index) is erased."""
+    return is_index_entry_empty(
+        flash_chip.read_bytes(_slot_address(slot), INDEX_ENTRY_SIZE)
+    )
 
-        # Check if this slot is empty
-        if is_index_entry_empty(entry_bytes):
-            logger.info(
-                f"Found free index slot at 0x{current_index_addr:08X}, "
-                f"next data address: 0x{last_data_end_addr:08X}"
-            )
-            return current_index_addr, last_data_end_addr
 
-        # Parse the end address to find where the next data starts
-        _, last_data_end_addr = parse_index_entry(entry_bytes)
+def _next_data_after(
+    flash_chip: flash_interface.FlashMemory, entry_bytes: bytes
+) -> int:
+    """Data address following the image of the newest index entry."""
+    if is_index_entry_empty(entry_bytes):
+        return config.DATA_1ST
+    start_addr, end_addr = parse_index_entry(entry_bytes)
+    return start_addr + image_integrity.stored_size(flash_chip, start_addr, end_addr)
 
-        # Move to next index slot
-        current_index_addr += INDEX_ENTRY_SIZE
 
-    logger.error("Index section is full!")
-    return None, None
+def _search_free_slot(
+    flash_chip: flash_interface.FlashMemory,
+) -> Tuple[int, int, bytes]:
+    """
+    Find the slot after the newest index entry with binary searches over
+    the ring of index sectors (index_table.locate_used_slots()).
+
+    Returns:
+        Tuple of (slot after the newest entry, number of used slots, newest
+        entry bytes)
+    """
+    entries: Dict[int, bytes] = {}
+
+    def is_empty(slot: int) -> bool:
+        if slot not in entries:
+            entries[slot] = flash_chip.read_bytes(_slot_address(slot), INDEX_ENTRY_SIZE)
+        return is_index_entry_empty(entries[slot])
+
+    first, used = index_table.locate_used_slots(is_empty, INDEX_SLOTS)
+    next_slot = (first + used) % INDEX_SLOTS
+    newest = (next_slot - 1) % INDEX_SLOTS
+    if newest not in entries:
+        is_empty(newest)
+    return next_slot, used, entries[newest]
+
+
+def _verify_checkpoint(
+    flash_chip: flash_interface.FlashMemory, latest: checkpoint.Checkpoint
+) -> Optional[Tuple[int, int]]:
+    """
+    Find the slot after the newest index entry by reading only the entries
+    written after a checkpoint.
+
+    Returns:
+        Tuple of (first empty slot, number of used slots), or None if the
+        checkpoint is stale
+    """
+    index_addr = latest.next_index_addr
+    if (
+        not config.INDEX_1ST <= index_addr <= config.INDEX_END
+        or (index_addr - config.INDEX_1ST) % INDEX_ENTRY_SIZE
+    ):
+        return None
+    slot = (index_addr - config.INDEX_1ST) // INDEX_ENTRY_SIZE
+    if latest.used_slots and _slot_empty(flash_chip, slot - 1):
+        # The index has fewer entries than the checkpoint claims
+        return None
+
+    for walked in range(MOUNT_VERIFY_ENTRIES):
+        if latest.used_slots + walked >= INDEX_SLOTS:
+            break
+        if _slot_empty(flash_chip, slot + walked):
+            return (slot + walked) % INDEX_SLOTS, latest.used_slots + walked
+    # More stores than expected since the checkpoint; all of them are used
+    return None
+
+
+def mount_index(
+    flash_chip: flash_interface.FlashMemory, checkpoints: checkpoint.CheckpointStore
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Find the next free slot for an image from the latest mount checkpoint.
+
+    Only the entries written after the checkpoint are read. If it is
+    missing or stale, the newest entry is found with a binary search over
+    the index, and a fresh checkpoint is written.
+
+    Args:
+        flash_chip: FlashMemory instance
+        checkpoints: Checkpoint store of the image store
+
+    Returns:
+        Tuple of (next_index_address, next_data_address). The index address
+        is None if every slot is used; the oldest index sector is then
+        reclaimed by the next store (make_index_room()).
+    """
+    latest = checkpoints.load()
+    mounted = None
+    if latest is not None:
+        mounted = _verify_checkpoint(flash_chip, latest)
+    newest_entry = None
+    if mounted is None:
+        logger.warning("Mount checkpoint missing or stale, searching the index...")
+        next_slot, used_slots, newest_entry = _search_free_slot(flash_chip)
+    else:
+        next_slot, used_slots = mounted
+    next_index_addr = _slot_address(next_slot)
+
+    if latest is not None and latest.next_index_addr == next_index_addr:
+        next_data_addr = latest.next_data_addr
+    else:
+        if newest_entry is None:
+            newest_entry = flash_chip.read_bytes(
+                _slot_address(next_slot - 1), INDEX_ENTRY_SIZE
+            )
+        next_data_addr = _next_data_after(flash_chip, newest_entry)
+        try:
+            checkpoints.update(next_index_addr, next_data_addr, used_slots)
+        except (flash_journal.FlashJournalError, flash_interface.FlashMemoryError) as e:
+            logger.error(f"Failed to write mount checkpoint: {e}")
+
+    if used_slots >= INDEX_SLOTS:
+        logger.error("Index section is full!")
+        return None, next_data_addr
+
+    logger.info(
+        f"Mounted: next index slot 0x{next_index_addr:08X}, "
+        f"next data address: 0x{next_data_addr:08X}"
+    )
+    return next_index_addr, next_data_addr
 
 
 def read_image_data(image_path: str) -> Optional[bytes]:
@@ -160,32 +304,66 @@ def _store_image_to_flash(
     image_data: bytes,
     next_index_addr: int,
     next_data_addr: int,
-) -> Tuple[int, int]:
+    allocator: Optional[erase_allocator.EraseAheadAllocator] = None,
+    table: Optional[index_table.IndexTable] = None,
+    record: Optional[index_records.IndexRecord] = None,
+) -> Tuple[Optional[int], int]:
     """
     Store image data to flash and update the index.
 
+    The image is written in WRITE_CHUNK_SIZE pieces while its integrity
+    checksums are computed, and the integrity trailer is written right after
+    the image data before the index entry is committed.
+
     Args:
         flash_chip: FlashMemory instance
         image_data: Image data to store
         next_index_addr: Address for the index entry
         next_data_addr: Address for the image data
+        allocator: Optional erase-ahead allocator that reserves (and if
+            needed erases) the data sectors before they are written
+        table: Optional index table, updated with the new entry
+        record: Optional metadata record; its addresses and origin (the
+            slot's sequence number) are filled in and it is written after
+            the index entry
 
     Returns:
-        Tuple of (new_index_address, new_data_address) for next operation
+        Tuple of (new_index_address, new_data_address) for next operation.
+        With a table, the index address is None once every slot is used.
 
     Raises:
         FlashStorageError: If write operation fails
     """
     image_size = len(image_data)
+    if table is not None and table.next_index_addr != next_index_addr:
+        raise FlashStorageError(
+            f"Index address 0x{next_index_addr:08X} is not the table's next slot"
+        )
 
-    # Write image data
+    # Make sure the data sectors are erased before programming them
+    stored_size = image_size + image_integrity.trailer_size(image_size)
+    if allocator is not None and not allocator.prepare(next_data_addr, stored_size):
+        raise FlashStorageError("Data sectors for the image are not available")
+
+    # Write image data, checksumming each chunk as it goes out
     logger.info(f"Writing {image_size} bytes to data address 0x{next_data_addr:08X}...")
-    if not flash_chip.write_bytes(next_data_addr, list(image_data)):
-        raise FlashStorageError("Failed to write image data to flash")
+    checksum = image_integrity.ImageChecksum()
+    view = memoryview(image_data)
+    for offset in range(0, image_size, WRITE_CHUNK_SIZE):
+        chunk = view[offset : offset + WRITE_CHUNK_SIZE]
+        checksum.update(chunk)
+        if not flash_chip.write_bytes(next_data_addr + offset, chunk):
+            raise FlashStorageError("Failed to write image data to flash")
 
-    # Create and write index entry
     start_addr = next_data_addr
     end_addr = next_data_addr + image_size
+
+    # Write the integrity trailer right after the image
+    trailer = checksum.trailer()
+    if not flash_chip.write_bytes(end_addr, trailer):
+        raise FlashStorageError("Failed to write integrity trailer to flash")
+
+    # Create and write index entry
     index_entry = create_index_entry(start_addr, end_addr)
 
     logger.info(
@@ -194,34 +372,297 @@ def _store_image_to_flash(
     )
     if not flash_chip.write_bytes(next_index_addr, index_entry):
         raise FlashStorageError("Failed to write index entry to flash")
+    slot = (next_index_addr - config.INDEX_1ST) // INDEX_ENTRY_SIZE
+    sequence = slot
+    if table is not None:
+        sequence = table.next_sequence
+        table.append(start_addr, end_addr)
+
+    # A lost record only turns the image into a legacy entry, so it goes last
+    if record is not None:
+        record.start_addr, record.end_addr = start_addr, end_addr
+        record.origin = sequence
+        if not index_records.write_record(flash_chip, slot, record):
+            logger.error(f"Failed to write the record of index slot {slot}")
 
     # Return updated addresses for next operation
-    return next_index_addr + INDEX_ENTRY_SIZE, end_addr
+    if table is not None:
+        next_index_addr = table.next_index_addr
+    else:
+        next_index_addr += INDEX_ENTRY_SIZE
+    return next_index_addr, end_addr + len(trailer)
+
+
+def delete_image(
+    flash_chip: flash_interface.FlashMemory,
+    index_addr: int,
+    table: Optional[index_table.IndexTable] = None,
+) -> bool:
+    """
+    Delete a stored image by writing a tombstone over its index entry.
+
+    The start address of the entry is programmed to zero, which only clears
+    bits, so nothing is erased. The data stays on flash until the compactor
+    reclaims it.
+
+    Args:
+        flash_chip: FlashMemory instance
+        index_addr: Address of the image's index entry
+        table: Optional index table, updated with the tombstone
+
+    Returns:
+        True if the tombstone was written, False otherwise
+    """
+    if (
+        not config.INDEX_1ST <= index_addr <= config.INDEX_END
+        or (index_addr - config.INDEX_1ST) % INDEX_ENTRY_SIZE
+    ):
+        logger.error(f"0x{index_addr:08X} is not an index entry address")
+        return False
+
+    entry_bytes = flash_chip.read_bytes(index_addr, INDEX_ENTRY_SIZE)
+    if is_index_entry_empty(entry_bytes):
+        logger.error(f"No image at index entry 0x{index_addr:08X}")
+        return False
+
+    tombstone = index_table.TOMBSTONE_START.to_bytes(ADDRESS_SIZE, "big")
+    if not flash_chip.write_bytes(index_addr, tombstone):
+        logger.error(f"Failed to write tombstone at 0x{index_addr:08X}")
+        return False
+    # The tombstone is what counts; the record flag only mirrors it
+    number = (index_addr - config.INDEX_1ST) // INDEX_ENTRY_SIZE
+    if not index_records.mark_record_deleted(flash_chip, number):
+        logger.warning(f"Failed to flag the record of index slot {number}")
+
+    if table is not None:
+        table.mark_deleted(table.number_of(index_addr))
+    logger.info(f"Deleted image at index entry 0x{index_addr:08X}")
+    return True
+
+
+def reclaim_index_sector(
+    flash_chip: flash_interface.FlashMemory, table: index_table.IndexTable
+) -> bool:
+    """
+    Erase the oldest index sector so its slots can be used again.
 
+    The live images of the sector first get new entries after the newest
+    one, with their records (and so their age) copied, and their old
+    entries are tombstoned. A power loss in between leaves an image with
+    two entries, never with none. The sector's records are erased before
+    the sector itself, so a slot is never used with a stale record.
 
-def print_index_summary(flash_chip: flash_interface.FlashMemory) -> None:
+    Args:
+        flash_chip: FlashMemory instance
+        table: Loaded index table, updated as entries move
+
+    Returns:
+        True if the sector was erased and dropped from the table
+    """
+    if len(table) < index_table.SLOTS_PER_SECTOR:
+        logger.error("The oldest index sector is still being filled")
+        return False
+    live = [
+        number
+        for number in range(index_table.SLOTS_PER_SECTOR)
+        if not table.is_deleted(number)
+    ]
+    if len(live) > table.free_slots:
+        logger.error(
+            f"No room for the {len(live)} live entries of the oldest index sector"
+        )
+        return False
+
+    for number in live:
+        start_addr, end_addr = table[number]
+        record = index_records.read_record(
+            flash_chip,
+            table.slot_of(number),
+            start_addr,
+            end_addr,
+            table.sequence(number),
+        )
+        new_slot = table.slot_of(len(table))
+        entry = create_index_entry(start_addr, end_addr)
+        if not flash_chip.write_bytes(table.next_index_addr, entry):
+            logger.error(f"Failed to move the index entry of 0x{start_addr:08X}")
+            return False
+        table.append(start_addr, end_addr)
+        if not index_records.write_record(flash_chip, new_slot, record):
+            logger.error(f"Failed to write the record of index slot {new_slot}")
+        if not delete_image(flash_chip, table.address_of(number), table):
+            return False
+
+    index_addr = table.address_of(0)
+    records_addr = index_records.record_address(table.slot_of(0))
+    records_size = index_table.SLOTS_PER_SECTOR * index_records.RECORD_SIZE
+    if not flash_chip.erase_range(records_addr, records_addr + records_size):
+        logger.error(f"Failed to erase the records of index sector 0x{index_addr:08X}")
+        return False
+    if not flash_chip.erase_sector(index_addr):
+        logger.error(f"Failed to erase index sector 0x{index_addr:08X}")
+        return False
+    table.drop_sector()
+    logger.info(
+        f"Reclaimed index sector 0x{index_addr:08X}, {len(live)} entries moved"
+    )
+    return True
+
+
+def make_index_room(
+    flash_chip: flash_interface.FlashMemory, table: index_table.IndexTable
+) -> Optional[int]:
+    """
+    Find the index slot for the next image, reclaiming the oldest index
+    sector once at most one sector's worth of slots is left.
+
+    The sector is only reclaimed if it frees at least one slot and its
+    live entries fit in the free slots, so the index is only full when
+    nearly every slot holds a live image.
+
+    Args:
+        flash_chip: FlashMemory instance
+        table: Loaded index table
+
+    Returns:
+        Address of the next free index slot, or None if the index is full
+    """
+    if (
+        table.free_slots <= index_table.SLOTS_PER_SECTOR
+        and len(table) >= index_table.SLOTS_PER_SECTOR
+    ):
+        live = sum(
+            1
+            for number in range(index_table.SLOTS_PER_SECTOR)
+            if not table.is_deleted(number)
+        )
+        if live < index_table.SLOTS_PER_SECTOR and live <= table.free_slots:
+            reclaim_index_sector(flash_chip, table)
+
+    if table.next_index_addr is None:
+        logger.error("Index section is full!")
+    return table.next_index_addr
+
+
+def _sector_in_use(
+    table: index_table.IndexTable, sector: int, ignored: Container[int] = ()
+) -> bool:
+    """Whether any live image (with its trailer) overlaps the sector."""
+    sector_end = sector + erase_allocator.SECTOR_SIZE
+    return any(
+        start < sector_end
+        and end + image_integrity.trailer_size(end - start) > sector
+        for index_addr, start, end in table
+        if index_addr not in ignored
+    )
+
+
+def evict_for_space(
+    flash_chip: flash_interface.FlashMemory,
+    heap: retention.RetentionHeap,
+    allocator: erase_allocator.EraseAheadAllocator,
+    next_data_addr: int,
+    size: int,
+    priority: int,
+) -> Optional[int]:
+    """
+    Delete the lowest-priority images until `size` bytes of data space fit.
+
+    Victims are popped from the retention heap into a plan until the
+    sectors they would free, minus those a live image shares, make room.
+    Only then are they tombstoned and their sectors erased at once, so
+    neighbouring victims merge into one contiguous run. If evicting every
+    image whose retention key is below the new image's is not enough, the
+    victims go back on the heap and nothing is evicted.
+
+    Args:
+        flash_chip: FlashMemory instance
+        heap: Retention heap over the live images
+        allocator: Erase-ahead allocator that owns the data sectors
+        next_data_addr: Current data write pointer
+        size: Stored size of the new image
+        priority: Retention priority of the new image
+
+    Returns:
+        Data address with room for the image, or None if evicting every
+        lower-valued image is not enough
+    """
+    table = heap.table
+    if table.next_index_addr is None:
+        return None
+    new_key = heap.key(priority, table.next_sequence)
+    sector_size = erase_allocator.SECTOR_SIZE
+
+    victims: Dict[int, Tuple[int, int]] = {}  # slot -> start, end of stored bytes
+    victim_addrs: Set[int] = set()
+    while True:
+        number = heap.pop_victim(new_key)
+        if number is None:
+            logger.error(
+                f"No room for {size:,} bytes even after evicting "
+                f"{len(victims)} images; evicting none"
+            )
+            for victim in victims:
+                heap.push(victim)
+            return None
+
+        start, end = table[number]
+        stored_end = start + image_integrity.stored_size(flash_chip, start, end)
+        victims[number] = (start, stored_end)
+        victim_addrs.add(table.address_of(number))
+
+        # Whole sectors of every victim, minus those a live image shares
+        freed = []
+        for start, stored_end in victims.values():
+            first = max(start - start % sector_size, allocator.start)
+            last = min(-(-stored_end // sector_size) * sector_size, allocator.end)
+            if first < last and _sector_in_use(table, first, victim_addrs):
+                first += sector_size
+            if first < last and _sector_in_use(
+                table, last - sector_size, victim_addrs
+            ):
+                last -= sector_size
+            if first < last:
+                freed.append((first, last - first))
+
+        if allocator.find_space(next_data_addr, size, freed) is not None:
+            break
+
+    for done, number in enumerate(victims):
+        if not delete_image(flash_chip, table.address_of(number), table):
+            # Put back the victims not deleted yet; pop_victim() skips the rest
+            for victim in list(victims)[done:]:
+                heap.push(victim)
+            return None
+    for first, length in freed:
+        if not allocator.reclaim(first, length):
+            logger.warning(f"Erase of evicted sectors at 0x{first:08X} failed")
+
+    logger.info(f"Evicted {len(victims)} images to make room for {size:,} bytes")
+    return allocator.find_space(next_data_addr, size)
+
+
+def print_index_summary(
+    flash_chip: flash_interface.FlashMemory,
+    table: Optional[index_table.IndexTable] = None,
+) -> None:
     """
     Read and print a summary of all valid image entries in the flash index.
 
     Args:
         flash_chip: FlashMemory instance
+        table: Loaded index table (default: read the Index Section now)
     """
     logger.info("\n" + "=" * 50)
     logger.info("Flash Index Summary")
     logger.info("=" * 50)
 
-    current_index_addr = config.INDEX_1ST
+    if table is None:
+        table = index_table.IndexTable.from_flash(flash_chip)
     image_count = 0
 
-    while current_index_addr <= config.INDEX_END:
-        entry_bytes = flash_chip.read_bytes(current_index_addr, INDEX_ENTRY_SIZE)
-
-        # Check for empty slot (end of valid entries)
-        if is_index_entry_empty(entry_bytes):
-            break
-
+    for current_index_addr, start_addr, end_addr in table:
         image_count += 1
-        start_addr, end_addr = parse_index_entry(entry_bytes)
         image_size = end_addr - start_addr
 
         logger.info(f"\nImage {image_count}:")
@@ -230,8 +671,6 @@ def print_index_summary(flash_chip: flash_interface.FlashMemory) -> None:
         logger.info(f"  Data end addr:   0x{end_addr:08X}")
         logger.info(f"  Image size:      {image_size:,} bytes")
 
-        current_index_addr += INDEX_ENTRY_SIZE
-
     if image_count == 0:
         logger.info("No valid image entries found in the index")
     else:
@@ -242,27 +681,40 @@ def print_index_summary(flash_chip: flash_interface.FlashMemory) -> None:
 
 def store_image_to_flash(
     flash_chip: flash_interface.FlashMemory,
-    next_index_addr: int,
+    next_index_addr: Optional[int],
     next_data_addr: int,
+    allocator: Optional[erase_allocator.EraseAheadAllocator] = None,
+    table: Optional[index_table.IndexTable] = None,
+    checkpoints: Optional[checkpoint.CheckpointStore] = None,
+    heap: Optional[retention.RetentionHeap] = None,
 ) -> Optional[Tuple[int, int]]:
     """
     Performs a single cycle of simulating, capturing, and storing an image to flash.
 
     Args:
         flash_chip: FlashMemory instance.
-        next_index_addr: The address for the next index entry.
+        next_index_addr: The address for the next index entry (None if the
+            index was full; with a table, the next slot is taken from it).
         next_data_addr: The address for the next data block.
+        allocator: Optional erase-ahead allocator for the data sectors.
+        table: Optional index table, updated with the new entry. The oldest
+            index sector is reclaimed when the index runs low on slots.
+        checkpoints: Optional mount checkpoint store, updated after the store.
+        heap: Optional retention heap; with an allocator, the lowest-priority
+            images are evicted when the data section is full. Its table is
+            used if `table` is None.
 
     Returns:
         A tuple of (new_index_address, new_data_address) for the next operation,
-        or None if the operation failed.
+        or None if the operation failed. The index address is None if the
+        index is full.
     """
     logger.info("\n" + "=" * 50)
     logger.info("Starting image storage cycle")
     logger.info("=" * 50)
 
     # Simulate image capture
-    classification, image_path = photo_cnn_mockup.simulate_image_capture(
+    classification, image_path, confidence = photo_cnn_mockup.simulate_image_capture(
         photo_cnn_mockup.MOCK_IMAGE_DIR
     )
     if not image_path:
@@ -278,19 +730,102 @@ def store_image_to_flash(
     image_size = len(image_data)
     logger.info(f"Image size: {image_size:,} bytes")
 
-    # Validate storage capacity
-    if not validate_storage_capacity(next_data_addr, image_size, next_index_addr):
+    record = index_records.IndexRecord(
+        0,
+        0,
+        classification,
+        confidence,
+        int(time.time()),
+        retention.priority_score(classification, confidence),
+    )
+    if heap is not None:
+        # Moves the table's sequence numbers past those of earlier laps
+        heap.sync()
+        if table is None:
+            table = heap.table
+    if table is not None:
+        next_index_addr = make_index_room(flash_chip, table)
+    if next_index_addr is None:
+        logger.error("No free index slot. Halting.")
+        return None
+
+    # Validate storage capacity (the image is followed by its trailer)
+    stored_size = image_size + image_integrity.trailer_size(image_size)
+    if allocator is not None:
+        # Past DATA_END, or next to live data, reuse reclaimed sectors
+        free_addr = allocator.find_space(next_data_addr, stored_size)
+        if free_addr is None and heap is not None:
+            free_addr = evict_for_space(
+                flash_chip,
+                heap,
+                allocator,
+                next_data_addr,
+                stored_size,
+                record.priority,
+            )
+        if free_addr is None:
+            logger.error("No free data space until the compactor reclaims some")
+            return None
+        next_data_addr = free_addr
+    if not validate_storage_capacity(next_data_addr, stored_size, next_index_addr):
         logger.error("Insufficient storage capacity. Halting.")
         return None
 
     # Store image and update index
     try:
         new_next_index_addr, new_next_data_addr = _store_image_to_flash(
-            flash_chip, image_data, next_index_addr, next_data_addr
+            flash_chip,
+            image_data,
+            next_index_addr,
+            next_data_addr,
+            allocator,
+            table,
+            record,
         )
-        logger.info("Cycle complete")
-        return new_next_index_addr, new_next_data_addr
-
     except FlashStorageError as e:
         logger.error(f"Storage operation failed: {e}")
         return None
+
+    # A missed checkpoint only costs a longer mount, never the image
+    if checkpoints is not None and new_next_index_addr is not None:
+        used_slots = (new_next_index_addr - config.INDEX_1ST) // INDEX_ENTRY_SIZE
+        if table is not None:
+            used_slots = len(table)
+        try:
+            checkpoints.update(new_next_index_addr, new_next_data_addr, used_slots)
+        except (flash_journal.FlashJournalError, flash_interface.FlashMemoryError) as e:
+            logger.error(f"Failed to write mount checkpoint: {e}")
+
+    logger.info("Cycle complete")
+    return new_next_index_addr, new_next_data_addr
+
+
+def verify_all(
+    flash_chip: flash_interface.FlashMemory,
+    table: Optional[index_table.IndexTable] = None,
+) -> List[Tuple[int, image_integrity.IntegrityStatus, List[int]]]:
+    """
+    Verify every stored image against its integrity trailer.
+
+    Args:
+        flash_chip: FlashMemory instance
+        table: Loaded index table (default: read the Index Section now)
+
+    Returns:
+        List of (index_address, status, bad_block_indices), one per image
+    """
+    if table is None:
+        table = index_table.IndexTable.from_flash(flash_chip)
+    results = []
+
+    for current_index_addr, start_addr, end_addr in table:
+        status, bad_blocks = image_integrity.verify_image(
+            flash_chip, start_addr, end_addr
+        )
+        results.append((current_index_addr, status, bad_blocks))
+
+    counts = {}
+    for _, status, _ in results:
+        counts[status.name] = counts.get(status.name, 0) + 1
+    logger.info(f"Verified {len(results)} images: {counts}")
+    return results
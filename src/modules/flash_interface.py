@@ -1,15 +1,21 @@
 import spidev
 import time
+import bisect
 import logging
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple, Union
 
 from modules import config
+from modules import link_stats
 
 """Interface with flash memory."""
 
 # Configure module logger
 logger = logging.getLogger(__name__)
 
+# --- Constants ---
+SPIDEV_BUFSIZ_PATH = "/sys/module/spidev/parameters/bufsiz"
+DEFAULT_SPI_BUFSIZ = 4096  # spidev default, bytes per transfer (CS held low)
+
 
 class FlashMemoryError(Exception):
     """Custom exception for flash memory operations."""
@@ -17,6 +23,103 @@ class FlashMemoryError(Exception):
     pass
 
 
+class PollProfile:
+    """
+    How to poll the WIP bit while one kind of operation completes.
+
+    The first status read happens after `initial_delay`. Until `spin_time`
+    has elapsed the status register is read back to back; after that the
+    poller sleeps between reads, starting at `min_interval` and multiplying
+    by `backoff` up to `max_interval`.
+    """
+
+    def __init__(
+        self,
+        typical: float,
+        maximum: float,
+        initial_delay: float = 0.0,
+        spin_time: float = 0.0,
+        min_interval: float = 0.001,
+        max_interval: float = 0.001,
+        backoff: float = 1.0,
+        timeout: float = 10.0,
+    ):
+        """
+        Args:
+            typical: Datasheet typical duration in seconds (for reference)
+            maximum: Datasheet maximum duration in seconds (for reference)
+            initial_delay: Sleep before the first status read
+            spin_time: Time during which the status is polled without sleeping
+            min_interval: First sleep between status reads once spinning ends
+            max_interval: Upper bound of the sleep between status reads
+            backoff: Factor applied to the sleep after every busy read
+            timeout: Give up after this many seconds
+        """
+        self.typical = typical
+        self.maximum = maximum
+        self.initial_delay = initial_delay
+        self.spin_time = spin_time
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+
+
+class PollStats:
+    """Status register polls and wait times of one kind of operation."""
+
+    def __init__(self):
+        self.operations = 0
+        self.polls = 0
+        self.max_polls = 0
+        self.timeouts = 0
+        self.wait = link_stats.LatencyStats()
+
+    def record(self, polls: int, seconds: float) -> None:
+        """
+        Add one completed (or timed out) wait.
+
+        Args:
+            polls: Status register reads issued
+            seconds: Time from the command until WIP cleared
+        """
+        self.operations += 1
+        self.polls += polls
+        if polls > self.max_polls:
+            self.max_polls = polls
+        self.wait.record(seconds)
+
+    def summary(self) -> str:
+        """
+        Get a one-line, human readable summary.
+
+        Returns:
+            Summary string
+        """
+        if not self.operations:
+            return "no samples"
+
+        return (
+            f"polls/op={self.polls / self.operations:.1f} "
+            f"(max {self.max_polls}), timeouts={self.timeouts}, "
+            f"wait {self.wait.summary()}"
+        )
+
+
+def get_spi_bufsiz() -> int:
+    """
+    Get the spidev driver's maximum transfer size.
+
+    Returns:
+        The bufsiz module parameter, or DEFAULT_SPI_BUFSIZ if it is unavailable
+    """
+    try:
+        with open(SPIDEV_BUFSIZ_PATH) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return DEFAULT_SPI_BUFSIZ
+
+
 class FlashMemory:
     # Command Set
     CMD_WRITE_ENABLE = 0x06
@@ -27,16 +130,28 @@ class FlashMemory:
     CMD_BLOCK_ERASE_32KB_4B = 0x5C
     CMD_BLOCK_ERASE_64KB_4B = 0xDC
     CMD_DIE_ERASE_4B = 0xC4
+    CMD_READ_FLAG_STATUS = 0x70
+    CMD_PROGRAM_ERASE_SUSPEND = 0x75
+    CMD_PROGRAM_ERASE_RESUME = 0x7A
 
     # Status Register Bits
     STATUS_WIP_BIT = 0b00000001
 
+    # Flag Status Register Bits
+    FLAG_READY_BIT = 0b10000000  # program/erase controller ready
+    FLAG_ERASE_SUSPEND_BIT = 0b01000000
+    FLAG_PROGRAM_SUSPEND_BIT = 0b00000100
+
     # Memory Layout
     PAGE_SIZE = 256  # bytes
+    READ_HEADER_SIZE = 5  # command byte + 4 address bytes
+    PROGRAM_HEADER_SIZE = 5  # command byte + 4 address bytes
     SECTOR_SIZE_4KB = 4 * 1024
     SECTOR_SIZE_32KB = 32 * 1024
     SECTOR_SIZE_64KB = 64 * 1024
     DIE_SIZE = 0x04000000  # 64MB per die for 1Gbit chip
+    FLASH_SIZE = 2 * DIE_SIZE
+    BLANK_CHECK_READ_SIZE = 64 * 1024  # bytes read per blank-check step
 
     # Erase size mapping
     ERASE_SIZES = {
@@ -45,9 +160,73 @@ class FlashMemory:
         64: (CMD_BLOCK_ERASE_64KB_4B, SECTOR_SIZE_64KB),
     }
 
+    # Erase block sizes from largest to smallest, for erase_range()
+    ERASE_LEVELS = (DIE_SIZE, SECTOR_SIZE_64KB, SECTOR_SIZE_32KB, SECTOR_SIZE_4KB)
+
     # Timing constants
     WIP_POLL_INTERVAL = 0.001  # seconds
-    DIE_ERASE_TIMEOUT = 60  # seconds
+    DIE_ERASE_TIMEOUT = 600  # seconds (datasheet max is 460 s)
+    # Datasheet suspend latency is 30 us max; the margin covers the thread
+    # being preempted while it polls
+    SUSPEND_TIMEOUT = 0.010  # seconds
+
+    # WIP polling per operation, from the MT25Q 1Gb datasheet (tPP, tSSE,
+    # tSE, tBE). Page programs finish within a couple of status reads, so
+    # they are spun on; erases sleep most of their typical time, then back
+    # off exponentially; a die erase is only checked once a second.
+    POLL_PROFILES = {
+        "default": PollProfile(
+            typical=0.001, maximum=0.01, min_interval=WIP_POLL_INTERVAL
+        ),
+        "page_program": PollProfile(
+            typical=0.00012,
+            maximum=0.0018,
+            spin_time=0.002,
+            timeout=1.0,
+        ),
+        "erase_4kb": PollProfile(
+            typical=0.05,
+            maximum=0.4,
+            initial_delay=0.025,
+            min_interval=0.001,
+            max_interval=0.016,
+            backoff=2.0,
+            timeout=30.0,
+        ),
+        "erase_32kb": PollProfile(
+            typical=0.1,
+            maximum=1.0,
+            initial_delay=0.05,
+            min_interval=0.002,
+            max_interval=0.032,
+            backoff=2.0,
+            timeout=30.0,
+        ),
+        "erase_64kb": PollProfile(
+            typical=0.15,
+            maximum=1.0,
+            initial_delay=0.075,
+            min_interval=0.002,
+            max_interval=0.05,
+            backoff=2.0,
+            timeout=30.0,
+        ),
+        "erase_die": PollProfile(
+            typical=153.0,
+            maximum=460.0,
+            min_interval=1.0,
+            max_interval=1.0,
+            timeout=DIE_ERASE_TIMEOUT,
+        ),
+    }
+
+    # Erase block size -> operation name in POLL_PROFILES
+    ERASE_OPERATIONS = {
+        SECTOR_SIZE_4KB: "erase_4kb",
+        SECTOR_SIZE_32KB: "erase_32kb",
+        SECTOR_SIZE_64KB: "erase_64kb",
+        DIE_SIZE: "erase_die",
+    }
 
     def __init__(
         self,
@@ -55,6 +234,7 @@ class FlashMemory:
         device: int = config.SPI_DEVICE,
         max_speed_hz: int = 10_000_000,
         mode: int = 0,
+        spi: Optional[spidev.SpiDev] = None,
     ):
         """
         Initialize the SPI connection to flash memory.
@@ -64,6 +244,8 @@ class FlashMemory:
             device: SPI device number
             max_speed_hz: Maximum SPI speed in Hz (default: 10MHz)
             mode: SPI mode (default: 0)
+            spi: Unopened SpiDev-compatible device to use instead of the
+                spidev driver (e.g. flash_sim.SimulatedFlashSpi)
 
         Raises:
             FlashMemoryError: If SPI initialization fails
@@ -73,8 +255,28 @@ class FlashMemory:
         self.bus = bus
         self.device = device
 
+        # A read command and its data must fit in one transfer, because the
+        # chip select is released between transfers
+        self.max_transfer = getattr(spi, "bufsiz", None) or get_spi_bufsiz()
+        self.read_chunk_size = self.max_transfer - self.READ_HEADER_SIZE
+
+        # Page program commands are assembled in place in this buffer
+        self._program_buffer = bytearray(self.PROGRAM_HEADER_SIZE + self.PAGE_SIZE)
+        self._program_buffer[0] = self.CMD_PAGE_PROGRAM_4B
+        self._program_view = memoryview(self._program_buffer)
+        self._status_command = bytes([self.CMD_READ_STATUS_REG1, 0x00])
+
+        self.write_stats: Dict[str, int] = {
+            "pages_programmed": 0,
+            "pages_skipped": 0,
+            "bytes_skipped": 0,
+        }
+        self.poll_stats: Dict[str, PollStats] = {
+            operation: PollStats() for operation in self.POLL_PROFILES
+        }
+
         try:
-            self.spi = spidev.SpiDev()
+            self.spi = spi if spi is not None else spidev.SpiDev()
             self.spi.open(bus, device)
             self.is_open = True
             self.spi.max_speed_hz = max_speed_hz
@@ -128,12 +330,18 @@ class FlashMemory:
         """
         return list(address.to_bytes(4, "big"))
 
-    def _wait_for_write_complete(self, timeout: float = 10.0) -> bool:
+    def _wait_for_write_complete(
+        self, operation: str = "default", timeout: Optional[float] = None
+    ) -> bool:
         """
         Poll the status register until the WIP bit is cleared.
 
+        Polling follows the operation's entry in POLL_PROFILES, and the
+        number of status reads and the time waited are added to poll_stats.
+
         Args:
-            timeout: Maximum time to wait in seconds
+            operation: Key of POLL_PROFILES for the operation in progress
+            timeout: Maximum time to wait in seconds (default: the profile's)
 
         Returns:
             True if write completed, False if timeout
@@ -141,24 +349,100 @@ class FlashMemory:
         Raises:
             FlashMemoryError: If operation times out
         """
-        start_time = time.time()
+        profile = self.POLL_PROFILES[operation]
+        stats = self.poll_stats[operation]
+        if timeout is None:
+            timeout = profile.timeout
+        transfer = getattr(self.spi, "xfer3", None) or self.spi.xfer2
+
+        start_time = time.monotonic()
+        if profile.initial_delay:
+            time.sleep(profile.initial_delay)
+
+        interval = profile.min_interval
+        polls = 0
         while True:
-            status = self.spi.xfer2([self.CMD_READ_STATUS_REG1, 0x00])[1]
+            polls += 1
+            status = transfer(self._status_command)[1]
+            elapsed = time.monotonic() - start_time
             if (status & self.STATUS_WIP_BIT) == 0:
+                stats.record(polls, elapsed)
                 return True
 
-            if time.time() - start_time > timeout:
+            if elapsed > timeout:
+                stats.record(polls, elapsed)
+                stats.timeouts += 1
                 raise FlashMemoryError(
                     f"Write operation timeout after {timeout} seconds"
                 )
 
-            time.sleep(self.WIP_POLL_INTERVAL)
+            if elapsed < profile.spin_time:
+                continue
+
+            time.sleep(interval)
+            interval = min(interval * profile.backoff, profile.max_interval)
+
+    def poll_summary(self) -> Dict[str, str]:
+        """
+        Get the WIP polling statistics of every operation seen so far.
+
+        Returns:
+            Dictionary of operation -> one-line summary
+        """
+        return {
+            operation: stats.summary()
+            for operation, stats in self.poll_stats.items()
+            if stats.operations
+        }
 
     def _write_enable(self) -> None:
         """Send the Write Enable (WREN) command."""
         self.spi.xfer2([self.CMD_WRITE_ENABLE])
 
-    def read_bytes(self, address: int, length: int) -> List[int]:
+    def readinto(self, address: int, buffer: Union[bytearray, memoryview]) -> int:
+        """
+        Read flash memory straight into a preallocated buffer.
+
+        Reads larger than the spidev transfer size are split transparently
+        into several read commands.
+
+        Args:
+            address: Starting address to read from
+            buffer: Writable bytes-like object to fill completely
+
+        Returns:
+            Number of bytes read (len(buffer))
+
+        Raises:
+            FlashMemoryError: If connection is not open
+        """
+        self._check_connection()
+
+        view = memoryview(buffer).cast("B")
+        length = len(view)
+        # xfer3 takes the transmit bytes as-is; older spidev only has xfer2
+        transfer = getattr(self.spi, "xfer3", None) or self.spi.xfer2
+        command = bytearray(self.READ_HEADER_SIZE + min(length, self.read_chunk_size))
+        command[0] = self.CMD_READ_DATA_4B
+
+        offset = 0
+        while offset < length:
+            chunk_size = min(self.read_chunk_size, length - offset)
+            if chunk_size + self.READ_HEADER_SIZE != len(command):
+                del command[self.READ_HEADER_SIZE + chunk_size :]
+            command[1 : self.READ_HEADER_SIZE] = (address + offset).to_bytes(4, "big")
+
+            # Skip command byte (1) + address bytes (4) = 5 bytes
+            response = transfer(command)
+            view[offset : offset + chunk_size] = bytes(
+                response[self.READ_HEADER_SIZE :]
+            )
+            offset += chunk_size
+
+        logger.debug(f"Read {length} bytes from address 0x{address:08X}")
+        return length
+
+    def read(self, address: int, length: int) -> bytes:
         """
         Read a specified number of bytes from flash memory.
 
@@ -167,7 +451,7 @@ class FlashMemory:
             length: Number of bytes to read
 
         Returns:
-            List of bytes read from memory
+            Bytes read from memory
 
         Raises:
             FlashMemoryError: If connection is not open
@@ -176,25 +460,47 @@ class FlashMemory:
 
         if length <= 0:
             logger.warning("Read length must be positive")
-            return []
+            return b""
 
-        addr_bytes = self._address_to_bytes(address)
-        dummy_bytes = [0x00] * length
-        command = [self.CMD_READ_DATA_4B] + addr_bytes + dummy_bytes
+        buffer = bytearray(length)
+        self.readinto(address, buffer)
+        return bytes(buffer)
 
-        # Skip command byte (1) + address bytes (4) = 5 bytes
-        response = self.spi.xfer2(command)[5:]
+    def read_bytes(self, address: int, length: int) -> List[int]:
+        """
+        Read a specified number of bytes from flash memory.
 
-        logger.debug(f"Read {len(response)} bytes from address 0x{address:08X}")
-        return response
+        Kept for callers that work with lists of ints; prefer read() or
+        readinto() for anything larger than a few bytes.
 
-    def write_bytes(self, address: int, data: List[int]) -> bool:
+        Args:
+            address: Starting address to read from
+            length: Number of bytes to read
+
+        Returns:
+            List of bytes read from memory
+
+        Raises:
+            FlashMemoryError: If connection is not open
+        """
+        self._check_connection()
+        return list(self.read(address, length))
+
+    def write_bytes(
+        self, address: int, data: Union[bytes, bytearray, memoryview, List[int]]
+    ) -> bool:
         """
         Write data to flash memory, handling page boundaries correctly.
 
+        Any buffer-protocol object is programmed page by page through
+        memoryview slices, so no per-byte copy of the data is made. Pages
+        that are entirely 0xFF are skipped and 0xFF runs at either end of a
+        page are trimmed, since programming 0xFF does not change NOR flash;
+        write_stats counts what was skipped.
+
         Args:
             address: Starting address to write to
-            data: List of bytes to write
+            data: Bytes-like object (or legacy list of ints) to write
 
         Returns:
             True if write successful, False otherwise
@@ -204,11 +510,14 @@ class FlashMemory:
         """
         self._check_connection()
 
-        if not data:
+        if not len(data):
             logger.warning("No data to write")
             return False
 
-        data_len = len(data)
+        if isinstance(data, list):
+            data = bytes(data)
+        view = memoryview(data).cast("B")
+        data_len = len(view)
         bytes_written = 0
 
         logger.debug(f"Writing {data_len} bytes to address 0x{address:08X}")
@@ -224,9 +533,25 @@ class FlashMemory:
 
                 # Write up to page boundary or remaining data
                 chunk_size = min(bytes_to_page_end, bytes_left_to_write)
-                data_chunk = data[bytes_written : bytes_written + chunk_size]
+                data_chunk = view[bytes_written : bytes_written + chunk_size]
+
+                # 0xFF leaves erased NOR cells untouched, so blank runs at
+                # either end of the chunk need not be programmed at all
+                if data_chunk[0] == 0xFF or data_chunk[-1] == 0xFF:
+                    stripped = bytes(data_chunk)
+                    lead = chunk_size - len(stripped.lstrip(b"\xff"))
+                    if lead == chunk_size:
+                        self.write_stats["pages_skipped"] += 1
+                        self.write_stats["bytes_skipped"] += chunk_size
+                        bytes_written += chunk_size
+                        continue
+                    trail = chunk_size - len(stripped.rstrip(b"\xff"))
+                    self.write_stats["bytes_skipped"] += lead + trail
+                    current_address += lead
+                    data_chunk = data_chunk[lead : chunk_size - trail]
 
                 self._write_page(current_address, data_chunk)
+                self.write_stats["pages_programmed"] += 1
                 bytes_written += chunk_size
 
             logger.info(f"Successfully wrote {data_len} bytes to 0x{address:08X}")
@@ -236,32 +561,53 @@ class FlashMemory:
             logger.error(f"Write failed at byte {bytes_written}: {e}")
             return False
 
-    def _write_page(self, address: int, data_chunk: List[int]) -> None:
+    def _write_page(self, address: int, data_chunk: memoryview) -> None:
         """
         Write a single page-aligned chunk to flash.
 
+        The command header and data are assembled in the preallocated
+        program buffer, so no list or bytes object is built per page.
+
         Args:
             address: Page-aligned starting address
-            data_chunk: Data to write (up to PAGE_SIZE bytes)
+            data_chunk: Data to write (up to PAGE_SIZE bytes), bytes-like
 
         Raises:
             FlashMemoryError: If connection is not open or chunk is too large
         """
         self._check_connection()
 
-        if not data_chunk:
+        chunk_size = len(data_chunk)
+        if not chunk_size:
             return
 
-        if len(data_chunk) > self.PAGE_SIZE:
+        if chunk_size > self.PAGE_SIZE:
             raise FlashMemoryError(
-                f"Chunk size {len(data_chunk)} exceeds page size {self.PAGE_SIZE}"
+                f"Chunk size {chunk_size} exceeds page size {self.PAGE_SIZE}"
             )
 
+        buffer = self._program_buffer
+        buffer[1 : self.PROGRAM_HEADER_SIZE] = address.to_bytes(4, "big")
+        end = self.PROGRAM_HEADER_SIZE + chunk_size
+        buffer[self.PROGRAM_HEADER_SIZE : end] = data_chunk
+
         self._write_enable()
-        addr_bytes = self._address_to_bytes(address)
-        command = [self.CMD_PAGE_PROGRAM_4B] + addr_bytes + data_chunk
-        self.spi.xfer2(command)
-        self._wait_for_write_complete()
+        self._send(self._program_view[:end])
+        self._wait_for_write_complete("page_program")
+
+    def _send(self, command: memoryview) -> None:
+        """
+        Clock a command out without reading the response back.
+
+        Args:
+            command: Bytes-like command, at most max_transfer bytes
+        """
+        writebytes2 = getattr(self.spi, "writebytes2", None)
+        if writebytes2 is not None:
+            writebytes2(command)
+        else:
+            # Older spidev only accepts lists
+            self.spi.xfer2(list(command))
 
     def erase_sector(self, address: int, size_kb: int = 4) -> bool:
         """
@@ -284,7 +630,7 @@ class FlashMemory:
                 f"Invalid erase size {size_kb}KB. Must be 4, 32, or 64."
             )
 
-        erase_cmd, sector_size = self.ERASE_SIZES[size_kb]
+        _, sector_size = self.ERASE_SIZES[size_kb]
 
         # Align address to sector boundary for logging
         aligned_address = (address // sector_size) * sector_size
@@ -295,11 +641,8 @@ class FlashMemory:
         )
 
         try:
-            self._write_enable()
-            addr_bytes = self._address_to_bytes(address)
-            command = [erase_cmd] + addr_bytes
-            self.spi.xfer2(command)
-            self._wait_for_write_complete(timeout=30.0)
+            operation = self.start_erase(address, sector_size)
+            self._wait_for_write_complete(operation)
 
             logger.info(f"Successfully erased {size_kb}KB sector")
             return True
@@ -338,11 +681,8 @@ class FlashMemory:
         )
 
         try:
-            self._write_enable()
-            addr_bytes = self._address_to_bytes(address)
-            command = [self.CMD_DIE_ERASE_4B] + addr_bytes
-            self.spi.xfer2(command)
-            self._wait_for_write_complete(timeout=self.DIE_ERASE_TIMEOUT)
+            operation = self.start_erase(address, self.DIE_SIZE)
+            self._wait_for_write_complete(operation)
 
             logger.info(f"Die {die_number} erase complete")
             return True
@@ -350,3 +690,276 @@ class FlashMemory:
         except Exception as e:
             logger.error(f"Die erase failed: {e}")
             return False
+
+    def start_erase(self, address: int, block_size: int) -> str:
+        """
+        Issue an erase command without waiting for it to finish.
+
+        Args:
+            address: Address inside the block to erase
+            block_size: SECTOR_SIZE_4KB, SECTOR_SIZE_32KB, SECTOR_SIZE_64KB
+                or DIE_SIZE
+
+        Returns:
+            Operation name in POLL_PROFILES, for polling the erase
+
+        Raises:
+            FlashMemoryError: If connection is not open or invalid size
+        """
+        self._check_connection()
+
+        if block_size == self.DIE_SIZE:
+            erase_cmd = self.CMD_DIE_ERASE_4B
+        elif block_size // 1024 in self.ERASE_SIZES:
+            erase_cmd = self.ERASE_SIZES[block_size // 1024][0]
+        else:
+            raise FlashMemoryError(f"Invalid erase block size {block_size}")
+
+        self._write_enable()
+        addr_bytes = self._address_to_bytes(address)
+        self.spi.xfer2([erase_cmd] + addr_bytes)
+        return self.ERASE_OPERATIONS[block_size]
+
+    def read_status(self) -> int:
+        """Read status register 1 (bit 0 is WIP)."""
+        transfer = getattr(self.spi, "xfer3", None) or self.spi.xfer2
+        return transfer(self._status_command)[1]
+
+    def read_flag_status(self) -> int:
+        """Read the flag status register (ready and suspend bits)."""
+        return self.spi.xfer2([self.CMD_READ_FLAG_STATUS, 0x00])[1]
+
+    def suspend_state(self) -> Optional[bool]:
+        """
+        Check once whether a SUSPEND command has taken effect.
+
+        Returns:
+            None if the chip is still busy, True if an operation is
+            suspended, False if none is (it completed before the suspend)
+        """
+        flags = self.read_flag_status()
+        if not flags & self.FLAG_READY_BIT:
+            return None
+        return bool(
+            flags & (self.FLAG_ERASE_SUSPEND_BIT | self.FLAG_PROGRAM_SUSPEND_BIT)
+        )
+
+    def suspend(self) -> bool:
+        """
+        Suspend the program or erase in progress so the array can be read.
+
+        Returns:
+            True if an operation is now suspended, False if there was
+            nothing left to suspend (it completed meanwhile)
+
+        Raises:
+            FlashMemoryError: If connection is not open or the chip does not
+                become ready within SUSPEND_TIMEOUT
+        """
+        self._check_connection()
+        self.spi.xfer2([self.CMD_PROGRAM_ERASE_SUSPEND])
+
+        deadline = time.monotonic() + self.SUSPEND_TIMEOUT
+        while True:
+            # Poll once more after the deadline, in case this thread was
+            # preempted past it
+            expired = time.monotonic() > deadline
+            state = self.suspend_state()
+            if state is not None:
+                return state
+            if expired:
+                raise FlashMemoryError(
+                    f"Suspend not acknowledged within {self.SUSPEND_TIMEOUT} seconds"
+                )
+
+    def resume(self) -> None:
+        """
+        Resume a suspended program or erase.
+
+        Raises:
+            FlashMemoryError: If connection is not open
+        """
+        self._check_connection()
+        self.spi.xfer2([self.CMD_PROGRAM_ERASE_RESUME])
+
+    def find_dirty_sectors(self, start: int, end: int) -> List[int]:
+        """
+        Read a region back and list the 4KB sectors that are not blank.
+
+        Args:
+            start: 4KB-aligned start address
+            end: 4KB-aligned end address (exclusive)
+
+        Returns:
+            Sorted start addresses of sectors holding any non-0xFF byte
+        """
+        sector = self.SECTOR_SIZE_4KB
+        blank = bytes([0xFF]) * sector
+        buffer = bytearray(min(self.BLANK_CHECK_READ_SIZE, max(end - start, 0)))
+        view = memoryview(buffer)
+
+        dirty = []
+        for address in range(start, end, len(buffer) or 1):
+            length = min(len(buffer), end - address)
+            self.readinto(address, view[:length])
+            for offset in range(0, length, sector):
+                if view[offset : offset + sector] != blank:
+                    dirty.append(address + offset)
+        return dirty
+
+    def plan_erase(
+        self, start: int, end: int, dirty: Optional[List[int]] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Choose the cheapest set of erases that clears every dirty sector.
+
+        The region is split into the largest aligned blocks that fit in it.
+        Inside each block, erasing it whole is compared with erasing its
+        children separately, using the datasheet typical erase times, and
+        blank parts are left alone.
+
+        Args:
+            start: 4KB-aligned start address
+            end: 4KB-aligned end address (exclusive)
+            dirty: Sorted addresses of the sectors that need erasing
+                (default: every sector in the region)
+
+        Returns:
+            List of (address, block_size) erases in address order
+        """
+        sector = self.SECTOR_SIZE_4KB
+        if dirty is None:
+            dirty = list(range(start, end, sector))
+
+        def has_dirty(address: int, size: int) -> bool:
+            index = bisect.bisect_left(dirty, address)
+            return index < len(dirty) and dirty[index] < address + size
+
+        def best(address: int, level: int) -> Tuple[float, List[Tuple[int, int]]]:
+            size = self.ERASE_LEVELS[level]
+            if not has_dirty(address, size):
+                return 0.0, []
+
+            whole = self.POLL_PROFILES[self.ERASE_OPERATIONS[size]].typical
+            if level == len(self.ERASE_LEVELS) - 1:
+                return whole, [(address, size)]
+
+            split_cost = 0.0
+            split_plan: List[Tuple[int, int]] = []
+            child_size = self.ERASE_LEVELS[level + 1]
+            for child in range(address, address + size, child_size):
+                cost, plan = best(child, level + 1)
+                split_cost += cost
+                split_plan += plan
+
+            if whole <= split_cost:
+                return whole, [(address, size)]
+            return split_cost, split_plan
+
+        plan: List[Tuple[int, int]] = []
+        address = start
+        while address < end:
+            for level, size in enumerate(self.ERASE_LEVELS):
+                if address % size == 0 and address + size <= end:
+                    plan += best(address, level)[1]
+                    address += size
+                    break
+        return plan
+
+    def check_erase_range(self, start: int, end: int) -> None:
+        """
+        Validate a region for erase_range().
+
+        Args:
+            start: Start address
+            end: End address (exclusive)
+
+        Raises:
+            FlashMemoryError: If connection is not open or the range is invalid
+        """
+        self._check_connection()
+
+        sector = self.SECTOR_SIZE_4KB
+        if start % sector or end % sector or not 0 <= start <= end <= self.FLASH_SIZE:
+            raise FlashMemoryError(
+                f"Invalid erase range 0x{start:08X}-0x{end:08X}: "
+                "must be 4KB-aligned and inside the chip"
+            )
+
+    def erase_range(self, start: int, end: int, skip_blank: bool = True) -> bool:
+        """
+        Erase an arbitrary 4KB-aligned region with the cheapest mix of
+        die, 64KB, 32KB and 4KB erases.
+
+        Args:
+            start: 4KB-aligned start address
+            end: 4KB-aligned end address (exclusive)
+            skip_blank: Read the region back first and leave sectors that
+                are already blank alone
+
+        Returns:
+            True if the whole region is erased, False otherwise
+
+        Raises:
+            FlashMemoryError: If connection is not open or the range is invalid
+        """
+        self.check_erase_range(start, end)
+
+        dirty = self.find_dirty_sectors(start, end) if skip_blank else None
+        plan = self.plan_erase(start, end, dirty)
+
+        estimate = sum(
+            self.POLL_PROFILES[self.ERASE_OPERATIONS[size]].typical
+            for _, size in plan
+        )
+        logger.info(
+            f"Erasing 0x{start:08X}-0x{end:08X} with {len(plan)} erase(s), "
+            f"about {estimate:.2f} s"
+            + (f" ({len(dirty)} dirty 4KB sectors)" if dirty is not None else "")
+        )
+
+        for address, size in plan:
+            if size == self.DIE_SIZE:
+                erased = self.erase_die(address // self.DIE_SIZE)
+            else:
+                erased = self.erase_sector(address, size // 1024)
+            if not erased:
+                logger.error(f"Range erase stopped at 0x{address:08X}")
+                return False
+
+        return True
+
+
+def open_flash(
+    bus: int = config.SPI_BUS, device: int = config.SPI_DEVICE
+) -> FlashMemory:
+    """
+    Open the flash backend selected by config.FLASH_BACKEND.
+
+    "spi" talks to the MT25QL01GBBB through spidev; "sim" runs the same
+    FlashMemory class against the file-backed NOR flash simulator at
+    config.FLASH_SIM_PATH.
+
+    Args:
+        bus: SPI bus number
+        device: SPI device number
+
+    Returns:
+        Opened FlashMemory instance
+
+    Raises:
+        FlashMemoryError: If the backend is unknown or fails to open
+    """
+    if config.FLASH_BACKEND == "spi":
+        return FlashMemory(bus=bus, device=device)
+
+    if config.FLASH_BACKEND == "sim":
+        # Imported here: the simulator is only needed off-target
+        from modules import flash_sim
+
+        spi = flash_sim.SimulatedFlashSpi(
+            config.FLASH_SIM_PATH, timing=config.FLASH_SIM_TIMING
+        )
+        return FlashMemory(bus=bus, device=device, spi=spi)
+
+    raise FlashMemoryError(f"Unknown flash backend '{config.FLASH_BACKEND}'")
@@ -0,0 +1,246 @@
+"""
+Append-only, power-loss tolerant record journal on NOR flash.
+
+The journal region is split into two halves. Records are appended to the
+active half, each starting on a page boundary:
+
+    Offset  Size  Field
+    0       1     RECORD_MAGIC
+    1       1     Record type (owner defined, 0x00-0xFE)
+    2       2     Payload length (big-endian)
+    4       4     Sequence number (big-endian, increasing)
+    8       N     Payload
+    8+N     2     CRC-16 of bytes 0 .. 8+N
+
+When the active half is full, the owner's snapshot callback provides
+records describing the complete current state. They are written to the
+other half, which is erased first, and that half becomes active. The old
+half is left alone until the journal needs it again; on load, the half
+whose first record has the higher sequence number wins. A record torn by
+power loss fails its CRC and ends the replay, and the next append starts
+a fresh half, so nothing after a torn record is ever trusted.
+"""
+
+import logging
+from typing import Callable, List, Optional, Tuple
+
+from modules import crc_16
+from modules import flash_interface
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+RECORD_MAGIC = 0x4A
+RECORD_HEADER_SIZE = 8
+RECORD_CRC_SIZE = 2
+ERASED_BYTE = 0xFF
+
+Record = Tuple[int, bytes]  # (record type, payload)
+
+
+class FlashJournalError(Exception):
+    """Custom exception for flash journal operations."""
+
+    pass
+
+
+def encode_record(record_type: int, sequence: int, payload: bytes) -> bytes:
+    """
+    Encode one journal record.
+
+    Args:
+        record_type: Owner-defined type, 0x00-0xFE
+        sequence: Sequence number of the record
+        payload: Record payload
+
+    Returns:
+        Encoded record bytes
+    """
+    body = bytearray([RECORD_MAGIC, record_type])
+    body += len(payload).to_bytes(2, "big")
+    body += sequence.to_bytes(4, "big")
+    body += payload
+    body += crc_16.crc16(body).to_bytes(RECORD_CRC_SIZE, "big")
+    return bytes(body)
+
+
+class FlashJournal:
+    """Double-buffered record journal in a dedicated flash region."""
+
+    def __init__(
+        self,
+        flash_chip: flash_interface.FlashMemory,
+        start: int,
+        end: int,
+        snapshot: Optional[Callable[[], List[Record]]] = None,
+    ):
+        """
+        Args:
+            flash_chip: FlashMemory instance
+            start: Start address of the journal region (4KB-aligned)
+            end: End address of the region (exclusive); each half must be a
+                whole number of 4KB sectors
+            snapshot: Callback returning records that rebuild the owner's
+                whole state, written when the journal is compacted
+
+        Raises:
+            FlashJournalError: If the region cannot be split into halves
+        """
+        half = (end - start) // 2
+        sector = flash_interface.FlashMemory.SECTOR_SIZE_4KB
+        if start % sector or half <= 0 or half % sector:
+            raise FlashJournalError(
+                f"Journal region 0x{start:08X}-0x{end:08X} must be two whole "
+                "sets of 4KB sectors"
+            )
+
+        self.flash = flash_chip
+        self.snapshot = snapshot
+        self.halves = (start, start + half)
+        self.half_size = half
+        self.page_size = flash_interface.FlashMemory.PAGE_SIZE
+
+        self.active = 0
+        self.sequence = 0
+        self._append_addr = start
+        self._needs_compaction = True
+        self.compactions = 0
+
+    def _scan_half(self, half: int) -> Tuple[List[Tuple[int, Record]], int, bool]:
+        """
+        Parse the records of one half.
+
+        Returns:
+            Tuple of (list of (sequence, record), next append address,
+            clean) where clean is False if the scan ended on a damaged record
+        """
+        base = self.halves[half]
+        data = self.flash.read(base, self.half_size)
+        records = []
+        offset = 0
+
+        while offset + RECORD_HEADER_SIZE + RECORD_CRC_SIZE <= self.half_size:
+            if data[offset] == ERASED_BYTE:
+                return records, base + offset, True
+            if data[offset] != RECORD_MAGIC:
+                return records, base + offset, False
+
+            length = int.from_bytes(data[offset + 2 : offset + 4], "big")
+            end = offset + RECORD_HEADER_SIZE + length
+            if end + RECORD_CRC_SIZE > self.half_size:
+                return records, base + offset, False
+
+            stored_crc = int.from_bytes(data[end : end + RECORD_CRC_SIZE], "big")
+            if crc_16.crc16(data[offset:end]) != stored_crc:
+                return records, base + offset, False
+
+            sequence = int.from_bytes(data[offset + 4 : offset + 8], "big")
+            record_type = data[offset + 1]
+            payload = bytes(data[offset + RECORD_HEADER_SIZE : end])
+            records.append((sequence, (record_type, payload)))
+
+            # Next record starts on the next page boundary
+            size = end + RECORD_CRC_SIZE - offset
+            offset += -(-size // self.page_size) * self.page_size
+
+        return records, base + offset, True
+
+    def load(self) -> List[Record]:
+        """
+        Read the journal back.
+
+        Returns:
+            Records of the active half, oldest first
+        """
+        scans = [self._scan_half(half) for half in (0, 1)]
+        candidates = [half for half in (0, 1) if scans[half][0]]
+
+        if not candidates:
+            logger.info("Flash journal is empty")
+            self.active = 0
+            self.sequence = 0
+            self._needs_compaction = True
+            return []
+
+        self.active = max(candidates, key=lambda half: scans[half][0][0][0])
+        records, self._append_addr, clean = scans[self.active]
+        self.sequence = records[-1][0] + 1
+        # A damaged tail means the rest of the half cannot be trusted
+        self._needs_compaction = not clean
+        if not clean:
+            logger.warning(
+                f"Flash journal damaged at 0x{self._append_addr:08X}, "
+                "will compact on next append"
+            )
+
+        logger.info(
+            f"Flash journal loaded: {len(records)} records in half {self.active}"
+        )
+        return [record for _, record in records]
+
+    def _write(self, record_type: int, payload: bytes) -> bool:
+        """Write one record at the append address if it fits in the half."""
+        record = encode_record(record_type, self.sequence, payload)
+        half_end = self.halves[self.active] + self.half_size
+        if self._append_addr + len(record) > half_end:
+            return False
+
+        if not self.flash.write_bytes(self._append_addr, record):
+            raise FlashJournalError(
+                f"Failed to write journal record at 0x{self._append_addr:08X}"
+            )
+
+        self.sequence += 1
+        pages = -(-len(record) // self.page_size)
+        self._append_addr += pages * self.page_size
+        return True
+
+    def compact(self) -> None:
+        """
+        Write a snapshot of the owner's state into the other half and make
+        it the active one.
+
+        Raises:
+            FlashJournalError: If there is no snapshot callback, or the
+                snapshot does not fit in a half, or flash access fails
+        """
+        if self.snapshot is None:
+            raise FlashJournalError("Journal is full and has no snapshot callback")
+
+        target = 1 - self.active
+        start = self.halves[target]
+        if not self.flash.erase_range(start, start + self.half_size):
+            raise FlashJournalError(f"Failed to erase journal half at 0x{start:08X}")
+
+        self.active = target
+        self._append_addr = start
+        for record_type, payload in self.snapshot():
+            if not self._write(record_type, payload):
+                raise FlashJournalError("Journal snapshot does not fit in one half")
+
+        self._needs_compaction = False
+        self.compactions += 1
+        logger.info(f"Flash journal compacted into half {target}")
+
+    def append(self, record_type: int, payload: bytes) -> None:
+        """
+        Append a record, compacting first if the active half is full.
+
+        Args:
+            record_type: Owner-defined type, 0x00-0xFE
+            payload: Record payload
+
+        Raises:
+            FlashJournalError: If the record cannot be written
+        """
+        if self._needs_compaction:
+            self.compact()
+        if self._write(record_type, payload):
+            return
+
+        self.compact()
+        if not self._write(record_type, payload):
+            raise FlashJournalError(
+                f"Record of {len(payload)} bytes does not fit after compaction"
+            )
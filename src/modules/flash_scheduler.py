@@ -0,0 +1,320 @@
+"""
+Suspend-aware scheduling of flash operations shared between threads.
+
+A 64KB erase keeps the MT25Q busy for ~150 ms and a die erase for minutes,
+during which the array cannot be read. FlashScheduler wraps a FlashMemory
+so that a read arriving during an erase (an index lookup, a STATUS reply,
+a downlink chunk) wakes the erasing thread. That thread issues
+PROGRAM/ERASE SUSPEND and steps aside, the read is served, and the erase
+is resumed. Read latency during an erase then drops from the erase time
+to roughly the suspend latency plus the read itself.
+
+All SPI traffic goes through one lock. Image writes are split into
+WRITE_SLICE_SIZE pieces so a read waits for at most one slice of page
+programs; page programs are too short to be worth suspending.
+
+FlashScheduler has the FlashMemory method names used by the rest of the
+application, so it can be passed wherever a FlashMemory is expected.
+"""
+
+import logging
+import threading
+import time
+from typing import List, Union
+
+from modules import flash_interface
+from modules import link_stats
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+WRITE_SLICE_SIZE = 4 * 1024  # bytes programmed per lock hold (16 pages)
+RESUME_HOLD_TIME = 0.002  # seconds an erase runs after a resume before the
+#                           next suspend, so back-to-back reads cannot starve it
+SUSPEND_POLL_INTERVAL = 0.0005  # seconds between checks of a late suspend
+
+
+class FlashScheduler:
+    """Thread-safe FlashMemory front end that suspends erases for reads."""
+
+    def __init__(
+        self, flash_chip: flash_interface.FlashMemory, suspend: bool = True
+    ):
+        """
+        Args:
+            flash_chip: Opened FlashMemory instance
+            suspend: Suspend erases for reads (False serves reads only after
+                the erase completes, for comparison)
+        """
+        self.flash = flash_chip
+        self.suspend_enabled = suspend
+
+        self._lock = threading.Lock()
+        self._state = threading.Condition()
+        self._read_requested = threading.Event()
+        self._readers = 0
+        self._erasing = False
+        self._suspended = False
+
+        self.read_latency = link_stats.LatencyStats()
+        self.suspend_latency = link_stats.LatencyStats()
+        self.suspends = 0
+
+    def __getattr__(self, name: str):
+        # Statistics and constants (is_open, write_stats, PAGE_SIZE, ...)
+        return getattr(self.flash, name)
+
+    # --- Reads ---
+
+    def _begin_access(self) -> float:
+        """Register a pending access and wait until the array is usable."""
+        start = time.monotonic()
+        with self._state:
+            self._readers += 1
+            self._read_requested.set()
+            while self._erasing and not self._suspended:
+                self._state.wait()
+        return start
+
+    def _end_access(self) -> None:
+        with self._state:
+            self._readers -= 1
+            if not self._readers:
+                self._read_requested.clear()
+                self._state.notify_all()
+
+    def readinto(self, address: int, buffer: Union[bytearray, memoryview]) -> int:
+        """FlashMemory.readinto(), served between erase suspend and resume."""
+        start = self._begin_access()
+        try:
+            with self._lock:
+                return self.flash.readinto(address, buffer)
+        finally:
+            self._end_access()
+            self.read_latency.record(time.monotonic() - start)
+
+    def read(self, address: int, length: int) -> bytes:
+        """FlashMemory.read(), served between erase suspend and resume."""
+        start = self._begin_access()
+        try:
+            with self._lock:
+                return self.flash.read(address, length)
+        finally:
+            self._end_access()
+            self.read_latency.record(time.monotonic() - start)
+
+    def read_bytes(self, address: int, length: int) -> List[int]:
+        """FlashMemory.read_bytes(), served between erase suspend and resume."""
+        return list(self.read(address, length))
+
+    # --- Writes ---
+
+    def write_bytes(self, address: int, data) -> bool:
+        """
+        FlashMemory.write_bytes(), releasing the bus every WRITE_SLICE_SIZE
+        bytes so pending reads are served in between. Like a read, a write
+        that arrives during an erase is served while the erase is suspended.
+        """
+        if isinstance(data, list):
+            data = bytes(data)
+        view = memoryview(data).cast("B")
+        if not len(view):
+            return self.flash.write_bytes(address, view)
+
+        for offset in range(0, len(view), WRITE_SLICE_SIZE):
+            self._begin_access()
+            try:
+                with self._lock:
+                    if not self.flash.write_bytes(
+                        address + offset, view[offset : offset + WRITE_SLICE_SIZE]
+                    ):
+                        return False
+            finally:
+                self._end_access()
+        return True
+
+    # --- Erases ---
+
+    def _await_suspend(self, deadline: float) -> bool:
+        """
+        Keep checking a suspend the chip has not acknowledged in time.
+
+        Args:
+            deadline: time.monotonic() after which the chip counts as hung
+
+        Returns:
+            True if the erase is now suspended, False if it completed
+
+        Raises:
+            FlashMemoryError: If the chip is still busy at the deadline
+        """
+        while True:
+            with self._lock:
+                state = self.flash.suspend_state()
+            if state is not None:
+                return state
+            if time.monotonic() > deadline:
+                raise flash_interface.FlashMemoryError(
+                    "Erase suspend never acknowledged"
+                )
+            time.sleep(SUSPEND_POLL_INTERVAL)
+
+    def _suspend_for_readers(self, deadline: float) -> float:
+        """
+        Suspend the erase in progress, let the waiting readers through, then
+        resume it.
+
+        Args:
+            deadline: time.monotonic() after which an unacknowledged suspend
+                counts as a hung chip
+
+        Returns:
+            Seconds the erase spent suspended
+        """
+        start = time.monotonic()
+        try:
+            with self._lock:
+                suspended = self.flash.suspend()
+        except flash_interface.FlashMemoryError as e:
+            # Late, e.g. this thread was preempted: the suspend is still coming
+            logger.warning(f"{e}; still waiting for it")
+            suspended = self._await_suspend(deadline)
+        self.suspend_latency.record(time.monotonic() - start)
+        if not suspended:
+            # The erase finished meanwhile; the readers go through as usual
+            return 0.0
+
+        self.suspends += 1
+        with self._state:
+            self._suspended = True
+            self._state.notify_all()
+            while self._readers:
+                self._state.wait()
+            self._suspended = False
+
+        with self._lock:
+            self.flash.resume()
+        return time.monotonic() - start
+
+    def _run_erase(self, address: int, block_size: int) -> bool:
+        """Start one erase and poll it to completion, suspending for reads."""
+        # Let waiting readers through first, so back-to-back erases cannot
+        # starve them, then hold new readers back before the chip goes busy
+        with self._state:
+            while self._readers:
+                self._state.wait()
+            self._erasing = True
+
+        try:
+            with self._lock:
+                operation = self.flash.start_erase(address, block_size)
+            profile = self.flash.POLL_PROFILES[operation]
+            stats = self.flash.poll_stats[operation]
+
+            start = time.monotonic()
+            suspended_time = 0.0
+            resumed_at = start
+            interval = profile.min_interval
+            polls = 0
+
+            while True:
+                with self._lock:
+                    status = self.flash.read_status()
+                polls += 1
+                now = time.monotonic()
+                if not status & self.flash.STATUS_WIP_BIT:
+                    stats.record(polls, now - start - suspended_time)
+                    return True
+
+                if now - start - suspended_time > profile.timeout:
+                    stats.timeouts += 1
+                    raise flash_interface.FlashMemoryError(
+                        f"Erase timeout after {profile.timeout} seconds"
+                    )
+
+                if self.suspend_enabled and self._readers:
+                    hold = RESUME_HOLD_TIME - (now - resumed_at)
+                    if hold > 0:
+                        # Let the erase make progress before suspending again
+                        time.sleep(hold)
+                        continue
+                    suspended_time += self._suspend_for_readers(
+                        start + suspended_time + profile.timeout
+                    )
+                    resumed_at = time.monotonic()
+                    continue
+
+                # Sleep like the poll profile, but wake up for a read request
+                if self.suspend_enabled:
+                    self._read_requested.wait(interval)
+                else:
+                    time.sleep(interval)
+                interval = min(interval * profile.backoff, profile.max_interval)
+        finally:
+            with self._state:
+                self._erasing = False
+                self._state.notify_all()
+
+    def erase_sector(self, address: int, size_kb: int = 4) -> bool:
+        """FlashMemory.erase_sector(), suspendable for reads."""
+        if size_kb not in self.flash.ERASE_SIZES:
+            raise flash_interface.FlashMemoryError(
+                f"Invalid erase size {size_kb}KB. Must be 4, 32, or 64."
+            )
+        try:
+            return self._run_erase(address, size_kb * 1024)
+        except flash_interface.FlashMemoryError as e:
+            logger.error(f"Sector erase failed: {e}")
+            return False
+
+    def erase_die(self, die_number: int) -> bool:
+        """FlashMemory.erase_die(), suspendable for reads."""
+        if die_number not in (0, 1):
+            raise flash_interface.FlashMemoryError(
+                f"Invalid die number {die_number}. Must be 0 or 1."
+            )
+        try:
+            return self._run_erase(
+                die_number * self.flash.DIE_SIZE, self.flash.DIE_SIZE
+            )
+        except flash_interface.FlashMemoryError as e:
+            logger.error(f"Die erase failed: {e}")
+            return False
+
+    def find_dirty_sectors(self, start: int, end: int) -> List[int]:
+        """FlashMemory.find_dirty_sectors(), one locked read per chunk."""
+        dirty = []
+        step = self.flash.BLANK_CHECK_READ_SIZE
+        for chunk_start in range(start, end, step):
+            with self._lock:
+                dirty += self.flash.find_dirty_sectors(
+                    chunk_start, min(chunk_start + step, end)
+                )
+        return dirty
+
+    def erase_range(self, start: int, end: int, skip_blank: bool = True) -> bool:
+        """FlashMemory.erase_range(), with every erase suspendable for reads."""
+        self.flash.check_erase_range(start, end)
+        dirty = self.find_dirty_sectors(start, end) if skip_blank else None
+        for address, size in self.flash.plan_erase(start, end, dirty):
+            if size == self.flash.DIE_SIZE:
+                erased = self.erase_die(address // size)
+            else:
+                erased = self.erase_sector(address, size // 1024)
+            if not erased:
+                logger.error(f"Range erase stopped at 0x{address:08X}")
+                return False
+        return True
+
+    def read_summary(self) -> str:
+        """
+        Get a one-line summary of read latency and erase suspends.
+
+        Returns:
+            Summary string
+        """
+        return (
+            f"reads {self.read_latency.summary()}, suspends={self.suspends}, "
+            f"suspend latency {self.suspend_latency.summary()}"
+        )
@@ -0,0 +1,452 @@
+"""
+File-backed NOR flash simulator for the MT25QL01GBBB.
+
+SimulatedFlashSpi stands in for spidev.SpiDev and decodes the same SPI
+commands FlashMemory sends to the real chip, over a 128 MB memory-mapped
+file. Passing it to FlashMemory(spi=...) (or setting config.FLASH_BACKEND
+to "sim") runs flash_actions, recover_images and main unchanged without
+the chip wired to SPI bus 0.
+
+NOR semantics that are modelled:
+- Erased bytes read 0xFF; a page program can only clear bits.
+- Page programs wrap inside their 256-byte page; if more than 256 bytes
+  are sent, only the last 256 are kept.
+- Erases clear the whole aligned 4 KB, 32 KB, 64 KB block or 64 MB die.
+- Program and erase need the write enable latch, which they reset.
+- With timing enabled, WIP stays set for the operation's datasheet typical
+  time and commands other than status reads are ignored meanwhile.
+- PROGRAM/ERASE SUSPEND and RESUME, with the suspend latency and the flag
+  status register: a suspended operation keeps its remaining time, the
+  array can be read meanwhile, and another erase is refused.
+- Faults (failed programs and erases, read bit flips, torn programs) are
+  injected from a seeded FaultPlan, so every run is reproducible.
+
+Bytes are stored inverted in the file, so a new sparse (zero-filled) file
+reads as fully erased flash and costs no disk space until written.
+"""
+
+import logging
+import mmap
+import os
+import random
+import time
+from typing import Dict, Iterable, Optional, Union
+
+from modules.flash_interface import FlashMemory
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+FLASH_SIZE = 128 * 1024 * 1024  # MT25QL01GBBB, 1 Gbit
+DEFAULT_BUFSIZ = 4096  # bytes per transfer, like the spidev default
+ERASE_CHUNK_SIZE = 1024 * 1024  # bytes cleared per step of a large erase
+DEFAULT_SUSPEND_LATENCY = 30e-6  # seconds, datasheet tSUS max
+
+CMD_WRITE_DISABLE = 0x04
+
+STATUS_WEL_BIT = 0b00000010
+
+# Flips every bit; applied on the way in and out of the backing file
+INVERT = bytes(255 - value for value in range(256))
+
+# Erase command -> (operation name, block size)
+ERASE_COMMANDS = {
+    FlashMemory.CMD_SECTOR_ERASE_4KB_4B: ("erase_4kb", FlashMemory.SECTOR_SIZE_4KB),
+    FlashMemory.CMD_BLOCK_ERASE_32KB_4B: ("erase_32kb", FlashMemory.SECTOR_SIZE_32KB),
+    FlashMemory.CMD_BLOCK_ERASE_64KB_4B: ("erase_64kb", FlashMemory.SECTOR_SIZE_64KB),
+    FlashMemory.CMD_DIE_ERASE_4B: ("erase_die", FlashMemory.DIE_SIZE),
+}
+
+# Operation -> busy time in seconds, the datasheet typical values
+DEFAULT_TIMINGS = {
+    operation: FlashMemory.POLL_PROFILES[operation].typical
+    for operation in (
+        "page_program",
+        "erase_4kb",
+        "erase_32kb",
+        "erase_64kb",
+        "erase_die",
+    )
+}
+
+
+class FlashSimError(Exception):
+    """Custom exception for flash simulator misuse."""
+
+    pass
+
+
+class FaultPlan:
+    """
+    Deterministic fault injection for the simulator.
+
+    Rates are probabilities per operation, drawn from a generator seeded
+    with `seed`, so the same plan against the same workload always fails
+    in the same places.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        program_error_rate: float = 0.0,
+        erase_error_rate: float = 0.0,
+        read_error_rate: float = 0.0,
+        torn_programs: Iterable[int] = (),
+    ):
+        """
+        Args:
+            seed: Seed of the fault generator
+            program_error_rate: Chance that a page program leaves one bit
+                unprogrammed
+            erase_error_rate: Chance that an erase leaves one bit programmed
+            read_error_rate: Chance that a read returns one flipped bit (the
+                stored data is not changed)
+            torn_programs: Page program numbers (0-based, in order of
+                execution) that stop halfway, as on a power loss
+        """
+        self.seed = seed
+        self.program_error_rate = program_error_rate
+        self.erase_error_rate = erase_error_rate
+        self.read_error_rate = read_error_rate
+        self.torn_programs = set(torn_programs)
+        self.rng = random.Random(seed)
+
+
+class SimulatedFlashSpi:
+    """SpiDev-compatible device that behaves like the MT25QL01GBBB."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        size: int = FLASH_SIZE,
+        timing: Union[bool, Dict[str, float]] = False,
+        time_scale: float = 1.0,
+        faults: Optional[FaultPlan] = None,
+        bufsiz: int = DEFAULT_BUFSIZ,
+        suspend_latency: float = DEFAULT_SUSPEND_LATENCY,
+    ):
+        """
+        Args:
+            path: Backing file, created sparse if missing (None = anonymous
+                memory, discarded on close)
+            size: Flash size in bytes, a multiple of 64 KB
+            timing: False for instant operations, True for DEFAULT_TIMINGS,
+                or a dictionary of operation -> busy seconds
+            time_scale: Factor applied to every busy time
+            faults: Optional fault injection plan
+            bufsiz: Largest transfer accepted, like the spidev bufsiz
+            suspend_latency: Time from SUSPEND until the array can be read
+                (scaled by time_scale like the busy times)
+        """
+        if size % FlashMemory.SECTOR_SIZE_64KB:
+            raise FlashSimError(f"Flash size {size} is not a multiple of 64 KB")
+
+        self.path = path
+        self.size = size
+        self.bufsiz = bufsiz
+        self.faults = faults
+        self.time_scale = time_scale
+        self.suspend_latency = suspend_latency
+        if timing is True:
+            self.timings = dict(DEFAULT_TIMINGS)
+        else:
+            self.timings = dict(timing) if timing else {}
+
+        # spidev attributes FlashMemory sets
+        self.mode = 0
+        self.max_speed_hz = 0
+
+        self.write_enabled = False
+        self.busy_until = 0.0
+        self.operation: Optional[str] = None
+        self.suspended: Optional[str] = None
+        self._remaining = 0.0
+        self.memory: Optional[mmap.mmap] = None
+        self._file = None
+        self._programs = 0
+
+        self.counters: Dict[str, int] = {
+            "reads": 0,
+            "bytes_read": 0,
+            "page_program": 0,
+            "bytes_programmed": 0,
+            "erase_4kb": 0,
+            "erase_32kb": 0,
+            "erase_64kb": 0,
+            "erase_die": 0,
+            "rejected_busy": 0,
+            "rejected_not_enabled": 0,
+            "rejected_suspended": 0,
+            "suspends": 0,
+            "resumes": 0,
+            "injected_faults": 0,
+        }
+
+    # --- spidev interface ---
+
+    def open(self, bus: int, device: int) -> None:
+        """Map the backing file (bus and device are ignored)."""
+        if self.memory is not None:
+            return
+
+        if self.path is None:
+            self.memory = mmap.mmap(-1, self.size)
+        else:
+            self._file = open(self.path, "a+b")
+            current = os.fstat(self._file.fileno()).st_size
+            if current == 0:
+                self._file.truncate(self.size)
+            elif current != self.size:
+                self._file.close()
+                self._file = None
+                raise FlashSimError(
+                    f"{self.path} holds {current} bytes, expected {self.size}"
+                )
+            self.memory = mmap.mmap(self._file.fileno(), self.size)
+
+        logger.info(
+            f"Simulated flash opened ({self.size // (1024 * 1024)} MB, "
+            f"{self.path or 'in memory'})"
+        )
+
+    def close(self) -> None:
+        """Flush and unmap the backing file."""
+        if self.memory is None:
+            return
+        if self.path is not None:
+            self.memory.flush()
+        self.memory.close()
+        self.memory = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def xfer2(self, data) -> list:
+        """Full-duplex transfer, response as a list of ints."""
+        return list(self._transfer(bytes(data)))
+
+    def xfer3(self, data) -> tuple:
+        """Full-duplex transfer, response as a tuple of ints."""
+        return tuple(self._transfer(bytes(data)))
+
+    def writebytes2(self, data) -> None:
+        """Write-only transfer."""
+        self._transfer(bytes(data))
+
+    # --- Direct access for tests and tools ---
+
+    def peek(self, address: int, length: int) -> bytes:
+        """
+        Read the array contents without going through SPI or faults.
+
+        Args:
+            address: Start address
+            length: Number of bytes
+
+        Returns:
+            Stored bytes
+        """
+        return self.memory[address : address + length].translate(INVERT)
+
+    @property
+    def busy(self) -> bool:
+        """True while a program or erase is in progress."""
+        return time.monotonic() < self.busy_until
+
+    # --- Command decoding ---
+
+    def _transfer(self, data: bytes) -> bytes:
+        """
+        Execute one chip-select window.
+
+        Args:
+            data: Bytes clocked out to the chip
+
+        Returns:
+            Bytes clocked back in, the same length as data
+        """
+        if self.memory is None:
+            raise FlashSimError("Simulated flash is not open")
+        if len(data) > self.bufsiz:
+            # spidev would split this with chip select released in between
+            raise FlashSimError(
+                f"Transfer of {len(data)} bytes exceeds bufsiz {self.bufsiz}"
+            )
+        if not data:
+            return b""
+
+        command = data[0]
+        if command == FlashMemory.CMD_READ_STATUS_REG1:
+            return bytes(1) + bytes([self._status()]) * (len(data) - 1)
+        if command == FlashMemory.CMD_READ_FLAG_STATUS:
+            return bytes(1) + bytes([self._flag_status()]) * (len(data) - 1)
+        if command == FlashMemory.CMD_PROGRAM_ERASE_SUSPEND:
+            self._suspend()
+            return bytes(len(data))
+
+        if self.busy:
+            self.counters["rejected_busy"] += 1
+            return bytes([0xFF]) * len(data)
+
+        if command == FlashMemory.CMD_READ_DATA_4B:
+            return bytes(5) + self._read(self._address(data), len(data) - 5)
+        if command == FlashMemory.CMD_WRITE_ENABLE:
+            self.write_enabled = True
+        elif command == CMD_WRITE_DISABLE:
+            self.write_enabled = False
+        elif command == FlashMemory.CMD_PROGRAM_ERASE_RESUME:
+            self._resume()
+        elif command in ERASE_COMMANDS and self.suspended is not None:
+            # No erase may start while another operation is suspended
+            self.counters["rejected_suspended"] += 1
+        elif command == FlashMemory.CMD_PAGE_PROGRAM_4B:
+            self._program(self._address(data), data[5:])
+        elif command in ERASE_COMMANDS:
+            self._erase(self._address(data), *ERASE_COMMANDS[command])
+        else:
+            logger.debug(f"Simulated flash ignored command 0x{command:02X}")
+
+        return bytes(len(data))
+
+    def _status(self) -> int:
+        status = STATUS_WEL_BIT if self.write_enabled else 0
+        if self.busy:
+            status |= FlashMemory.STATUS_WIP_BIT
+        return status
+
+    def _flag_status(self) -> int:
+        if self.busy:
+            return 0
+        flags = FlashMemory.FLAG_READY_BIT
+        if self.suspended == "page_program":
+            flags |= FlashMemory.FLAG_PROGRAM_SUSPEND_BIT
+        elif self.suspended is not None:
+            flags |= FlashMemory.FLAG_ERASE_SUSPEND_BIT
+        return flags
+
+    def _suspend(self) -> None:
+        """Pause the operation in progress after the suspend latency."""
+        if not self.busy or self.suspended is not None:
+            return
+        stop = time.monotonic() + self.suspend_latency * self.time_scale
+        if stop >= self.busy_until:
+            # Completes before the suspend takes effect
+            return
+        self._remaining = self.busy_until - stop
+        self.busy_until = stop
+        self.suspended = self.operation
+        self.counters["suspends"] += 1
+
+    def _resume(self) -> None:
+        """Continue a suspended operation with its remaining time."""
+        if self.suspended is None:
+            return
+        self.busy_until = time.monotonic() + self._remaining
+        self.operation = self.suspended
+        self.suspended = None
+        self.counters["resumes"] += 1
+
+    def _address(self, data: bytes) -> int:
+        if len(data) < 5:
+            raise FlashSimError(f"Command 0x{data[0]:02X} without a 4-byte address")
+        return int.from_bytes(data[1:5], "big") % self.size
+
+    def _start(self, operation: str) -> bool:
+        """Consume the write enable latch and start the busy timer."""
+        if not self.write_enabled:
+            self.counters["rejected_not_enabled"] += 1
+            return False
+        self.write_enabled = False
+        self.counters[operation] += 1
+        duration = self.timings.get(operation, 0.0) * self.time_scale
+        if duration:
+            self.busy_until = time.monotonic() + duration
+            self.operation = operation
+        return True
+
+    def _fault(self, rate: float) -> bool:
+        """Draw whether the current operation fails, and count it if so."""
+        if not rate or self.faults.rng.random() >= rate:
+            return False
+        self.counters["injected_faults"] += 1
+        return True
+
+    def _read(self, address: int, length: int) -> bytes:
+        self.counters["reads"] += 1
+        self.counters["bytes_read"] += length
+
+        end = address + length
+        data = self.memory[address:end].translate(INVERT)
+        if end > self.size:
+            # Reads wrap around the top of the array
+            data += self.memory[: end - self.size].translate(INVERT)
+
+        if self.faults is not None and self._fault(self.faults.read_error_rate):
+            flipped = bytearray(data)
+            bit = self.faults.rng.randrange(len(flipped) * 8)
+            flipped[bit // 8] ^= 1 << (bit % 8)
+            data = bytes(flipped)
+        return data
+
+    def _program(self, address: int, data: bytes) -> None:
+        if not self._start("page_program"):
+            return
+
+        page_size = FlashMemory.PAGE_SIZE
+        page = address - address % page_size
+        offset = address % page_size
+        if len(data) > page_size:
+            # Only the last 256 bytes clocked in are latched
+            offset = (offset + len(data) - page_size) % page_size
+            data = data[-page_size:]
+
+        program_number = self._programs
+        self._programs += 1
+        if self.faults is not None:
+            if program_number in self.faults.torn_programs:
+                self.counters["injected_faults"] += 1
+                data = data[: len(data) // 2]
+            elif data.count(0xFF) < len(data) and self._fault(
+                self.faults.program_error_rate
+            ):
+                # One of the bits that should have been cleared stays set
+                broken = bytearray(data)
+                index = self.faults.rng.choice(
+                    [i for i, value in enumerate(broken) if value != 0xFF]
+                )
+                zero_bits = [b for b in range(8) if not broken[index] >> b & 1]
+                broken[index] |= 1 << self.faults.rng.choice(zero_bits)
+                data = bytes(broken)
+
+        self.counters["bytes_programmed"] += len(data)
+        first = min(len(data), page_size - offset)
+        self._and_into(page + offset, data[:first])
+        if first < len(data):
+            # Wrap to the start of the same page
+            self._and_into(page, data[first:])
+
+    def _and_into(self, address: int, data: bytes) -> None:
+        """Program data at address: stored bits can only go from 1 to 0."""
+        if not data:
+            return
+        end = address + len(data)
+        stored = int.from_bytes(self.memory[address:end], "big")
+        stored |= int.from_bytes(data.translate(INVERT), "big")
+        self.memory[address:end] = stored.to_bytes(len(data), "big")
+
+    def _erase(self, address: int, operation: str, block_size: int) -> None:
+        if not self._start(operation):
+            return
+
+        start = address - address % block_size
+        end = min(start + block_size, self.size)
+        zeros = bytes(min(ERASE_CHUNK_SIZE, end - start))
+        for chunk_start in range(start, end, len(zeros)):
+            chunk_end = min(chunk_start + len(zeros), end)
+            self.memory[chunk_start:chunk_end] = zeros[: chunk_end - chunk_start]
+
+        if self.faults is not None and self._fault(self.faults.erase_error_rate):
+            # One bit stays programmed
+            position = self.faults.rng.randrange(start, end)
+            self.memory[position] |= 1 << self.faults.rng.randrange(8)
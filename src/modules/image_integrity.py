@@ -0,0 +1,297 @@
+"""
+End-to-end integrity checksums for images stored on flash.
+
+Each image is followed on flash by an integrity trailer (big-endian):
+
+    Offset  Size  Field
+    0       4     TRAILER_MAGIC
+    4       1     TRAILER_VERSION
+    5       1     Block size in KB (0 = no per-block CRCs)
+    6       2     Number of blocks (N)
+    8       4     Image size in bytes
+    12      2     CRC-16 of the whole image
+    14      2*N   CRC-16 of each block (the last block may be short)
+    14+2N   2     CRC-16 of the trailer itself (bytes 0 .. 14+2N)
+
+The index entry keeps pointing at [start, end) of the image data only, so
+older readers still see the plain image; the trailer starts at `end`.
+Images written before trailers existed have none and are reported as
+unverifiable rather than corrupt.
+"""
+
+import logging
+from enum import Enum
+from typing import List, Optional, Tuple
+
+from modules import crc_16
+from modules import flash_interface
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+TRAILER_MAGIC = b"ICRC"
+TRAILER_VERSION = 1
+TRAILER_HEADER_SIZE = 14  # bytes before the block CRCs
+TRAILER_CRC_SIZE = 2
+BLOCK_CRC_SIZE = 2
+DEFAULT_BLOCK_SIZE = 4 * 1024  # bytes covered by each block CRC
+
+
+class IntegrityStatus(Enum):
+    """Outcome of verifying a stored image."""
+
+    OK = 0
+    CORRUPT = 1  # Trailer is sound but the data does not match it
+    NO_TRAILER = 2  # Legacy image, nothing to verify against
+    BAD_TRAILER = 3  # Trailer present but damaged or inconsistent
+
+
+class ImageChecksum:
+    """
+    Streaming checksum of an image while it is being written.
+
+    Feed the image through update() in any chunk sizes; whole-image and
+    per-block CRCs are computed on the fly, so no second pass is needed.
+    """
+
+    def __init__(self, block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Args:
+            block_size: Bytes per block CRC, a multiple of 1 KB
+                (0 = whole-image CRC only)
+        """
+        if block_size % 1024 or block_size > 255 * 1024:
+            raise ValueError(f"Invalid integrity block size {block_size}")
+
+        self.block_size = block_size
+        self.size = 0
+        self.block_crcs: List[int] = []
+        self._image_crc = crc_16.CRC16()
+        self._block_crc = crc_16.CRC16()
+        self._block_fill = 0
+
+    def update(self, data: bytes) -> None:
+        """
+        Add the next piece of the image.
+
+        Args:
+            data: Bytes-like object
+        """
+        data = memoryview(data)
+        self._image_crc.update(data)
+        self.size += len(data)
+
+        if not self.block_size:
+            return
+
+        while data:
+            take = min(self.block_size - self._block_fill, len(data))
+            self._block_crc.update(data[:take])
+            self._block_fill += take
+            data = data[take:]
+            if self._block_fill == self.block_size:
+                self.block_crcs.append(self._block_crc.value)
+                self._block_crc.reset()
+                self._block_fill = 0
+
+    def trailer(self) -> bytes:
+        """
+        Build the integrity trailer for everything fed so far.
+
+        Returns:
+            Encoded trailer bytes
+        """
+        block_crcs = list(self.block_crcs)
+        if self._block_fill:
+            block_crcs.append(self._block_crc.value)
+
+        body = bytearray(TRAILER_MAGIC)
+        body.append(TRAILER_VERSION)
+        body.append(self.block_size // 1024)
+        body += len(block_crcs).to_bytes(2, "big")
+        body += self.size.to_bytes(4, "big")
+        body += self._image_crc.value.to_bytes(2, "big")
+        for value in block_crcs:
+            body += value.to_bytes(BLOCK_CRC_SIZE, "big")
+        body += crc_16.crc16(body).to_bytes(TRAILER_CRC_SIZE, "big")
+        return bytes(body)
+
+
+def trailer_size(image_size: int, block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    """
+    Size of the trailer stored after an image.
+
+    Args:
+        image_size: Image size in bytes
+        block_size: Bytes per block CRC (0 = no block CRCs)
+
+    Returns:
+        Trailer size in bytes
+    """
+    blocks = -(-image_size // block_size) if block_size else 0
+    return TRAILER_HEADER_SIZE + BLOCK_CRC_SIZE * blocks + TRAILER_CRC_SIZE
+
+
+class Trailer:
+    """Decoded integrity trailer."""
+
+    def __init__(
+        self, block_size: int, image_size: int, image_crc: int, block_crcs: List[int]
+    ):
+        self.block_size = block_size
+        self.image_size = image_size
+        self.image_crc = image_crc
+        self.block_crcs = block_crcs
+
+    @property
+    def size(self) -> int:
+        """Encoded size of this trailer in bytes."""
+        blocks = len(self.block_crcs)
+        return TRAILER_HEADER_SIZE + BLOCK_CRC_SIZE * blocks + TRAILER_CRC_SIZE
+
+
+def read_trailer(
+    flash_chip: flash_interface.FlashMemory, start_addr: int, end_addr: int
+) -> Tuple[IntegrityStatus, Optional[Trailer]]:
+    """
+    Read and check the trailer stored after an image.
+
+    Args:
+        flash_chip: FlashMemory instance
+        start_addr: Image start address
+        end_addr: Image end address (where the trailer starts)
+
+    Returns:
+        Tuple of (status, trailer). Status is OK with the decoded trailer,
+        NO_TRAILER for legacy images, or BAD_TRAILER.
+    """
+    header = flash_chip.read(end_addr, TRAILER_HEADER_SIZE)
+    if header[:4] != TRAILER_MAGIC:
+        return IntegrityStatus.NO_TRAILER, None
+
+    version = header[4]
+    block_size = header[5] * 1024
+    block_count = int.from_bytes(header[6:8], "big")
+    image_size = int.from_bytes(header[8:12], "big")
+    image_crc = int.from_bytes(header[12:14], "big")
+
+    expected_blocks = -(-image_size // block_size) if block_size else 0
+    if (
+        version != TRAILER_VERSION
+        or image_size != end_addr - start_addr
+        or block_count != expected_blocks
+    ):
+        logger.warning(f"Inconsistent integrity trailer at 0x{end_addr:08X}")
+        return IntegrityStatus.BAD_TRAILER, None
+
+    rest = flash_chip.read(
+        end_addr + TRAILER_HEADER_SIZE,
+        BLOCK_CRC_SIZE * block_count + TRAILER_CRC_SIZE,
+    )
+    body = header + rest[:-TRAILER_CRC_SIZE]
+    if crc_16.crc16(body) != int.from_bytes(rest[-TRAILER_CRC_SIZE:], "big"):
+        logger.warning(f"Integrity trailer CRC mismatch at 0x{end_addr:08X}")
+        return IntegrityStatus.BAD_TRAILER, None
+
+    block_crcs = [
+        int.from_bytes(rest[i : i + BLOCK_CRC_SIZE], "big")
+        for i in range(0, BLOCK_CRC_SIZE * block_count, BLOCK_CRC_SIZE)
+    ]
+    return IntegrityStatus.OK, Trailer(block_size, image_size, image_crc, block_crcs)
+
+
+def stored_size(
+    flash_chip: flash_interface.FlashMemory, start_addr: int, end_addr: int
+) -> int:
+    """
+    Bytes an image occupies on flash, including its trailer if it has one.
+
+    Args:
+        flash_chip: FlashMemory instance
+        start_addr: Image start address
+        end_addr: Image end address
+
+    Returns:
+        Occupied size in bytes
+    """
+    header = flash_chip.read(end_addr, TRAILER_HEADER_SIZE)
+    if header[:4] != TRAILER_MAGIC:
+        return end_addr - start_addr
+    block_count = int.from_bytes(header[6:8], "big")
+    return (
+        end_addr
+        - start_addr
+        + TRAILER_HEADER_SIZE
+        + BLOCK_CRC_SIZE * block_count
+        + TRAILER_CRC_SIZE
+    )
+
+
+def find_bad_blocks(data: bytes, trailer: Trailer) -> List[int]:
+    """
+    Check image data already in memory against its trailer.
+
+    Args:
+        data: The complete image data
+        trailer: Decoded trailer of the image
+
+    Returns:
+        Indices of blocks whose CRC does not match. Without block CRCs the
+        whole image counts as block 0.
+    """
+    view = memoryview(data)
+    if not trailer.block_size:
+        return [] if crc_16.crc16(view) == trailer.image_crc else [0]
+
+    return [
+        index
+        for index, expected in enumerate(trailer.block_crcs)
+        if crc_16.crc16(
+            view[index * trailer.block_size : (index + 1) * trailer.block_size]
+        )
+        != expected
+    ]
+
+
+def verify_image(
+    flash_chip: flash_interface.FlashMemory, start_addr: int, end_addr: int
+) -> Tuple[IntegrityStatus, List[int]]:
+    """
+    Verify a stored image against its trailer, reading it in bulk.
+
+    Args:
+        flash_chip: FlashMemory instance
+        start_addr: Image start address
+        end_addr: Image end address
+
+    Returns:
+        Tuple of (status, bad_block_indices)
+    """
+    status, trailer = read_trailer(flash_chip, start_addr, end_addr)
+    if status != IntegrityStatus.OK:
+        return status, []
+
+    image_crc = crc_16.CRC16()
+    bad_blocks = []
+    block_size = trailer.block_size or trailer.image_size
+    for index in range(max(-(-trailer.image_size // block_size), 1)):
+        offset = index * block_size
+        block = flash_chip.read(
+            start_addr + offset,
+            min(block_size, trailer.image_size - offset),
+        )
+        image_crc.update(block)
+        if trailer.block_size and crc_16.crc16(block) != trailer.block_crcs[index]:
+            bad_blocks.append(index)
+
+    crc_ok = image_crc.value == trailer.image_crc
+    if not crc_ok and not trailer.block_size:
+        bad_blocks = [0]
+    if bad_blocks or not crc_ok:
+        logger.warning(
+            f"Image at 0x{start_addr:08X} is corrupt (bad blocks: {bad_blocks})"
+        )
+        return IntegrityStatus.CORRUPT, bad_blocks
+
+    return IntegrityStatus.OK, []
@@ -0,0 +1,335 @@
+"""
+Versioned metadata records of the index slots.
+
+An 8-byte index entry only holds the start and end address of an image.
+Every index slot also has a fixed-size record in the INDEX_RECORD area of
+META, at INDEX_RECORD_1ST + slot * RECORD_SIZE, written right after the
+entry (big-endian):
+
+    0       version (RECORD_VERSION)
+    1       flags: a flag is set when its bit is programmed to 0
+    2       class id (CLASS_IDS, 0xFF = unknown)
+    3       classifier confidence in percent (0xFF = unknown)
+    4-7     start address (copy of the index entry)
+    8-11    end address (copy of the index entry)
+    12-15   capture time, Unix seconds (0xFFFFFFFF = unknown)
+    16      retention priority (see retention)
+    17      reserved (0xFF)
+    18-21   sequence number of the index slot the image was first stored
+            in (version 1: bytes 18-19, then reserved)
+    22-29   reserved (0xFF)
+    30-31   CRC-16 of bytes 0-29, with the flags byte read as 0xFF
+
+The records of an index sector are erased together with it when the
+oldest sector is reclaimed (index_table).
+
+A record is written with no flag set and then committed by programming
+FLAG_COMMITTED, so a record torn by a power loss is never used. Deleting an
+image programs FLAG_DELETED as well as the index tombstone; flags only ever
+clear bits, so neither needs an erase.
+
+Slots without a committed record whose addresses match the index entry
+(images stored before records existed, an interrupted store, or a stale
+record left in META) are legacy entries: only their addresses are known.
+
+RecordTable keeps the records of all used slots in RAM, so queries such as
+"Sky images captured since the last pass" never read the data section.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from modules import config
+from modules import crc_16
+from modules import flash_interface
+from modules import index_table
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+RECORD_SIZE = 32  # bytes per index slot
+RECORD_VERSION = 0x02
+RECORD_VERSION_1 = 0x01  # 2-byte origin
+FLAGS_OFFSET = 1
+CRC_OFFSET = 30
+FLAG_COMMITTED = 0x01
+FLAG_DELETED = 0x02
+UNKNOWN_BYTE = 0xFF
+UNKNOWN_TIME = 0xFFFFFFFF
+# Class ids are stored on flash: never renumber them, only add new ones
+CLASS_IDS = {"Forests": 0, "Plains": 1, "Sky": 2}
+CLASS_NAMES = {class_id: name for name, class_id in CLASS_IDS.items()}
+
+
+class IndexRecord:
+    """Metadata of one stored image."""
+
+    def __init__(
+        self,
+        start_addr: int,
+        end_addr: int,
+        classification: Optional[str] = None,
+        confidence: Optional[int] = None,
+        timestamp: Optional[int] = None,
+        priority: int = config.DEFAULT_PRIORITY,
+        origin: int = 0,
+        deleted: bool = False,
+        legacy: bool = False,
+    ):
+        """
+        Args:
+            start_addr: Starting address of the image data
+            end_addr: Ending address of the image data
+            classification: Class label (None if unknown)
+            confidence: Classifier confidence in percent (None if unknown)
+            timestamp: Capture time in Unix seconds (None if unknown)
+            priority: Retention priority
+            origin: Sequence number of the index slot the image was first
+                stored in
+            deleted: True if the record carries the deleted flag
+            legacy: True if the slot has no usable record
+        """
+        self.start_addr = start_addr
+        self.end_addr = end_addr
+        self.classification = classification
+        self.confidence = confidence
+        self.timestamp = timestamp
+        self.priority = priority
+        self.origin = origin
+        self.deleted = deleted
+        self.legacy = legacy
+
+    def encode(self) -> bytes:
+        """Encode as an uncommitted record (flags byte left erased)."""
+        body = bytearray(b"\xff" * RECORD_SIZE)
+        body[0] = RECORD_VERSION
+        body[2] = CLASS_IDS.get(self.classification, UNKNOWN_BYTE)
+        body[3] = UNKNOWN_BYTE if self.confidence is None else self.confidence
+        body[4:8] = self.start_addr.to_bytes(4, "big")
+        body[8:12] = self.end_addr.to_bytes(4, "big")
+        if self.timestamp is not None:
+            body[12:16] = self.timestamp.to_bytes(4, "big")
+        body[16] = self.priority
+        body[18:22] = self.origin.to_bytes(4, "big")
+        body[CRC_OFFSET:] = crc_16.crc16(bytes(body[:CRC_OFFSET])).to_bytes(2, "big")
+        return bytes(body)
+
+    @classmethod
+    def decode(
+        cls, data: bytes, sequence: int, start_addr: int, end_addr: int
+    ) -> "IndexRecord":
+        """
+        Decode the record of an index slot against its index entry.
+
+        Args:
+            data: RECORD_SIZE bytes read from the record area
+            sequence: Sequence number of the slot, the origin of a legacy
+                record
+            start_addr: Start address from the index entry (0 if tombstoned)
+            end_addr: End address from the index entry
+
+        Returns:
+            Decoded record, or a legacy record if the slot has no usable one
+        """
+        legacy = cls(start_addr, end_addr, origin=sequence, legacy=True)
+        if data[0] not in (RECORD_VERSION, RECORD_VERSION_1) or (
+            data[FLAGS_OFFSET] & FLAG_COMMITTED
+        ):
+            return legacy
+        body = bytearray(data[:CRC_OFFSET])
+        body[FLAGS_OFFSET] = 0xFF
+        if crc_16.crc16(bytes(body)) != int.from_bytes(data[CRC_OFFSET:], "big"):
+            return legacy
+
+        record_start = int.from_bytes(data[4:8], "big")
+        record_end = int.from_bytes(data[8:12], "big")
+        if record_end != end_addr or start_addr not in (
+            record_start,
+            index_table.TOMBSTONE_START,
+        ):
+            return legacy
+
+        timestamp = int.from_bytes(data[12:16], "big")
+        origin_end = 22 if data[0] == RECORD_VERSION else 20
+        return cls(
+            record_start,
+            record_end,
+            CLASS_NAMES.get(data[2]),
+            None if data[3] == UNKNOWN_BYTE else data[3],
+            None if timestamp == UNKNOWN_TIME else timestamp,
+            data[16],
+            int.from_bytes(data[18:origin_end], "big"),
+            deleted=not data[FLAGS_OFFSET] & FLAG_DELETED,
+        )
+
+
+def record_address(number: int, start: int = config.INDEX_RECORD_1ST) -> int:
+    """Address of the record of index slot `number`."""
+    return start + number * RECORD_SIZE
+
+
+def write_record(
+    flash_chip: flash_interface.FlashMemory, number: int, record: IndexRecord
+) -> bool:
+    """
+    Write and commit the record of index slot `number`.
+
+    Args:
+        flash_chip: FlashMemory instance
+        number: Index slot number (0-based)
+        record: Record to write
+
+    Returns:
+        True if the record was committed, False otherwise
+    """
+    address = record_address(number)
+    if not flash_chip.write_bytes(address, record.encode()):
+        return False
+    flags = UNKNOWN_BYTE & ~FLAG_COMMITTED
+    return flash_chip.write_bytes(address + FLAGS_OFFSET, bytes([flags]))
+
+
+def read_record(
+    flash_chip: flash_interface.FlashMemory,
+    number: int,
+    start_addr: int,
+    end_addr: int,
+    sequence: Optional[int] = None,
+) -> IndexRecord:
+    """
+    Read the record of index slot `number`.
+
+    Args:
+        flash_chip: FlashMemory instance
+        number: Index slot number (0-based)
+        start_addr: Start address from the index entry
+        end_addr: End address from the index entry
+        sequence: Sequence number of the slot (default: `number`, as
+            before the index first wrapped around)
+
+    Returns:
+        Decoded record (legacy if the slot has no usable one)
+    """
+    data = flash_chip.read(record_address(number), RECORD_SIZE)
+    return IndexRecord.decode(
+        data, number if sequence is None else sequence, start_addr, end_addr
+    )
+
+
+def mark_record_deleted(flash_chip: flash_interface.FlashMemory, number: int) -> bool:
+    """
+    Set the deleted flag of the record of index slot `number`.
+
+    Args:
+        flash_chip: FlashMemory instance
+        number: Index slot number (0-based)
+
+    Returns:
+        True if the flag was written, False otherwise
+    """
+    flags = UNKNOWN_BYTE & ~(FLAG_COMMITTED | FLAG_DELETED)
+    return flash_chip.write_bytes(
+        record_address(number) + FLAGS_OFFSET, bytes([flags])
+    )
+
+
+class RecordTable:
+    """In-RAM records of every used index slot."""
+
+    def __init__(
+        self,
+        flash_chip: flash_interface.FlashMemory,
+        table: index_table.IndexTable,
+        start: int = config.INDEX_RECORD_1ST,
+    ):
+        """
+        Args:
+            flash_chip: FlashMemory instance
+            table: Index table shared with the store, delete and compactor
+                paths
+            start: First address of the record area
+        """
+        self.flash = flash_chip
+        self.table = table
+        self.start = start
+        # records[number] belongs to table entry `number`
+        self.records: List[IndexRecord] = []
+        self.generation = table.generation
+
+    def sync(self) -> int:
+        """
+        Read the records of the slots used since the last sync, in one
+        transfer (two if they wrap around the end of the index).
+
+        Once the table is reloaded or drops its oldest sector, every record
+        is read again. The table's sequence numbers are moved past every
+        origin read, so they keep counting after a reboot.
+
+        Returns:
+            Number of records read
+        """
+        if self.generation != self.table.generation:
+            self.records, self.generation = [], self.table.generation
+        used = len(self.table)
+        first = len(self.records)
+        if used == first:
+            return 0
+
+        number = first
+        while number < used:
+            slot = self.table.slot_of(number)
+            count = min(used - number, self.table.capacity - slot)
+            data = self.flash.read(
+                record_address(slot, self.start), count * RECORD_SIZE
+            )
+            for offset in range(0, count * RECORD_SIZE, RECORD_SIZE):
+                record = IndexRecord.decode(
+                    data[offset : offset + RECORD_SIZE],
+                    self.table.sequence(number),
+                    *self.table[number],
+                )
+                self.records.append(record)
+                self.table.advance_sequence(record.origin + 1)
+                number += 1
+        return used - first
+
+    def __getitem__(self, number: int) -> IndexRecord:
+        """Record of table entry `number` (0-based)."""
+        self.sync()
+        return self.records[number]
+
+    def select(
+        self,
+        classification: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[Tuple[int, IndexRecord]]:
+        """
+        Find live images by class and capture time, from RAM only.
+
+        Args:
+            classification: Class label to match (None matches any)
+            since: Earliest capture time, Unix seconds (inclusive)
+            until: Latest capture time, Unix seconds (exclusive)
+
+        Returns:
+            List of (index_address, record) in index order. Images without
+            a capture time never match a time bound.
+        """
+        self.sync()
+        matches = []
+        for number, record in enumerate(self.records):
+            if self.table.is_deleted(number):
+                continue
+            if classification is not None and record.classification != classification:
+                continue
+            if since is not None or until is not None:
+                if record.timestamp is None:
+                    continue
+                if since is not None and record.timestamp < since:
+                    continue
+                if until is not None and record.timestamp >= until:
+                    continue
+            matches.append((self.table.address_of(number), record))
+        return matches
@@ -0,0 +1,314 @@
+"""
+In-RAM copy of the flash Index Section.
+
+The Index Section (config.INDEX_1ST-INDEX_END) holds one 8-byte entry per
+stored image, a big-endian start and end data address. Walking it one
+read_bytes() per entry costs up to 1536 SPI transactions. IndexTable reads
+the whole section in one bulk read, which FlashMemory splits into bufsiz
+transfers (4 for 12 KB), and keeps the used entries in an array('I') of
+start/end pairs, 8 bytes per image.
+
+One table is loaded at startup and shared by the scan, summary, store and
+recovery paths; each store appends its entry after writing it to flash.
+
+A deleted image keeps its slot: the start address of its entry is
+programmed to zero (a tombstone), which only clears bits and so needs no
+erase. The end address is kept, so the data that follows the image can
+still be located. Iterating a table skips tombstones.
+
+The section is a ring of 4KB sectors. Entries are appended after the
+newest one and wrap around to the first sector; the oldest sector is
+reclaimed as a whole (flash_actions.reclaim_index_sector()), so the used
+slots are always one run that starts at a sector boundary and ends at the
+first erased slot. An entry is numbered by its position in that run (0 is
+the oldest) and has a sequence number, counting every slot used since the
+index was new, that stays the same when the oldest sector is dropped.
+"""
+
+import logging
+import sys
+from array import array
+from typing import Callable, Iterator, Optional, Tuple
+
+from modules import config
+from modules import flash_interface
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+INDEX_ENTRY_SIZE = 8  # bytes (4-byte start + 4-byte end address)
+SLOTS_PER_SECTOR = flash_interface.FlashMemory.SECTOR_SIZE_4KB // INDEX_ENTRY_SIZE
+ERASED_WORD = 0xFFFFFFFF
+TOMBSTONE_START = 0x00000000  # start address of a deleted entry
+
+
+class IndexTableError(Exception):
+    """Custom exception for index table operations."""
+
+    pass
+
+
+def free_slots(first: int, used: int, capacity: int) -> int:
+    """
+    Number of entries that can still be appended to a ring of slots.
+
+    A ring whose run does not start at slot 0 keeps its last slot erased,
+    so the start of the run can still be found after a reboot.
+
+    Args:
+        first: Slot of the oldest used entry
+        used: Number of used slots, tombstones included
+        capacity: Number of slots in the ring
+    """
+    return max(capacity - used - (1 if first else 0), 0)
+
+
+def locate_used_slots(
+    is_empty: Callable[[int], bool], capacity: int
+) -> Tuple[int, int]:
+    """
+    Find the run of used slots in a ring index.
+
+    The run starts at the only sector whose first slot is used while the
+    slot before it is erased (or at slot 0 if there is none). Its end is in
+    the last following sector whose first slot is used, and is found there
+    with a binary search. This costs at most three reads per sector plus
+    log2(SLOTS_PER_SECTOR) reads.
+
+    Args:
+        is_empty: Returns True if the slot with the given number is erased
+        capacity: Number of slots in the ring
+
+    Returns:
+        Tuple of (slot of the oldest entry, number of used slots)
+    """
+    first = 0
+    for slot in range(0, capacity, SLOTS_PER_SECTOR):
+        if not is_empty(slot) and is_empty((slot - 1) % capacity):
+            first = slot
+            break
+    else:
+        if is_empty(0):
+            return 0, 0
+
+    # The first erased offset from `first` is in [low, high]
+    low, high = 1, capacity
+    for offset in range(SLOTS_PER_SECTOR, capacity, SLOTS_PER_SECTOR):
+        if is_empty((first + offset) % capacity):
+            high = offset
+            break
+        low = offset + 1
+    while low < high:
+        middle = (low + high) // 2
+        if is_empty((first + middle) % capacity):
+            high = middle
+        else:
+            low = middle + 1
+    return first, low
+
+
+class IndexTable:
+    """Start/end addresses of every stored image, in index order."""
+
+    def __init__(
+        self, start: int = config.INDEX_1ST, end: int = config.INDEX_END + 1
+    ):
+        """
+        Args:
+            start: First address of the Index Section
+            end: End of the Index Section (exclusive)
+        """
+        self.start = start
+        self.end = end
+        self.capacity = (end - start) // INDEX_ENTRY_SIZE
+        # Flat start, end, start, end, ... of the used entries, oldest first
+        self.entries = array("I")
+        self.first = 0  # slot of entry 0
+        self.base = 0  # sequence number of entry 0
+        # Bumped whenever entries are renumbered (load, drop_sector)
+        self.generation = 0
+
+    @classmethod
+    def from_flash(
+        cls,
+        flash_chip: flash_interface.FlashMemory,
+        start: int = config.INDEX_1ST,
+        end: int = config.INDEX_END + 1,
+    ) -> "IndexTable":
+        """
+        Create a table and load it from flash.
+
+        Args:
+            flash_chip: FlashMemory instance
+            start: First address of the Index Section
+            end: End of the Index Section (exclusive)
+
+        Returns:
+            Loaded IndexTable
+        """
+        table = cls(start, end)
+        table.load(flash_chip)
+        return table
+
+    def load(self, flash_chip: flash_interface.FlashMemory) -> int:
+        """
+        Read the whole Index Section and keep the run of used entries.
+
+        Args:
+            flash_chip: FlashMemory instance
+
+        Returns:
+            Number of used slots, tombstones included
+        """
+        words = array("I")
+        words.frombytes(flash_chip.read(self.start, self.end - self.start))
+        if sys.byteorder == "little":
+            words.byteswap()
+
+        def is_empty(slot: int) -> bool:
+            return words[2 * slot] == ERASED_WORD and words[2 * slot + 1] == ERASED_WORD
+
+        self.first, used = locate_used_slots(is_empty, self.capacity)
+        end = self.first + used
+        self.entries = words[2 * self.first : 2 * min(end, self.capacity)]
+        if end > self.capacity:
+            # The run wraps around to the start of the section
+            self.entries += words[: 2 * (end - self.capacity)]
+        # Sequence numbers of earlier laps are restored from the records
+        # (index_records.RecordTable.sync)
+        self.base = self.first
+        self.generation += 1
+
+        logger.info(f"Index table loaded: {used} of {self.capacity} entries used")
+        return used
+
+    def __len__(self) -> int:
+        """Number of used slots, tombstones included."""
+        return len(self.entries) // 2
+
+    def __getitem__(self, number: int) -> Tuple[int, int]:
+        """(start, end) data addresses of image `number` (0-based)."""
+        if number < 0:
+            number += len(self)
+        if not 0 <= number < len(self):
+            raise IndexError(f"Index entry {number} out of range")
+        return self.entries[2 * number], self.entries[2 * number + 1]
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield (index_address, start, end) for every live image."""
+        for number in range(len(self)):
+            if not self.is_deleted(number):
+                yield (
+                    self.address_of(number),
+                    self.entries[2 * number],
+                    self.entries[2 * number + 1],
+                )
+
+    def slot_of(self, number: int) -> int:
+        """Slot (0-based from the start of the section) of entry `number`."""
+        return (self.first + number) % self.capacity
+
+    def address_of(self, number: int) -> int:
+        """Index address of entry `number`."""
+        return self.start + self.slot_of(number) * INDEX_ENTRY_SIZE
+
+    def sequence(self, number: int) -> int:
+        """Sequence number of entry `number`."""
+        return self.base + number
+
+    def advance_sequence(self, next_sequence: int) -> None:
+        """
+        Make the next entry's sequence number at least `next_sequence`.
+
+        Args:
+            next_sequence: Lowest sequence number the next entry may get
+        """
+        self.base = max(self.base, next_sequence - len(self))
+
+    @property
+    def image_count(self) -> int:
+        """Number of live images."""
+        return len(self) - self.deleted_count
+
+    @property
+    def deleted_count(self) -> int:
+        """Number of tombstones."""
+        return sum(1 for number in range(len(self)) if self.is_deleted(number))
+
+    def is_deleted(self, number: int) -> bool:
+        """True if entry `number` (0-based) is a tombstone."""
+        return self[number][0] == TOMBSTONE_START
+
+    def number_of(self, index_addr: int) -> int:
+        """
+        Entry number of the slot at index_addr.
+
+        Raises:
+            IndexTableError: If the address is not a used slot
+        """
+        slot, misaligned = divmod(index_addr - self.start, INDEX_ENTRY_SIZE)
+        number = (slot - self.first) % self.capacity
+        if misaligned or not 0 <= slot < self.capacity or number >= len(self):
+            raise IndexTableError(f"No index entry at 0x{index_addr:08X}")
+        return number
+
+    @property
+    def free_slots(self) -> int:
+        """Number of entries that can still be appended."""
+        return free_slots(self.first, len(self), self.capacity)
+
+    @property
+    def next_index_addr(self) -> Optional[int]:
+        """Address of the first free slot, or None if the section is full."""
+        if not self.free_slots:
+            return None
+        return self.address_of(len(self))
+
+    @property
+    def next_sequence(self) -> int:
+        """Sequence number the next entry gets."""
+        return self.sequence(len(self))
+
+    def append(self, start_addr: int, end_addr: int) -> None:
+        """
+        Record an entry that was just written to the next free slot.
+
+        Args:
+            start_addr: Starting address of the image data
+            end_addr: Ending address of the image data
+
+        Raises:
+            IndexTableError: If every slot is already used
+        """
+        if not self.free_slots:
+            raise IndexTableError("Index table is full")
+        self.entries.append(start_addr)
+        self.entries.append(end_addr)
+
+    def mark_deleted(self, number: int) -> None:
+        """
+        Record a tombstone that was just written over entry `number`.
+
+        Args:
+            number: Entry number (0-based)
+        """
+        if not 0 <= number < len(self):
+            raise IndexTableError(f"Index entry {number} out of range")
+        self.entries[2 * number] = TOMBSTONE_START
+
+    def drop_sector(self) -> None:
+        """
+        Forget the entries of the oldest sector, which was just erased.
+
+        Entries are renumbered; their addresses and sequence numbers stay.
+
+        Raises:
+            IndexTableError: If the oldest sector is not completely used
+        """
+        if len(self) < SLOTS_PER_SECTOR:
+            raise IndexTableError("The oldest index sector is still in use")
+        del self.entries[: 2 * SLOTS_PER_SECTOR]
+        self.first = (self.first + SLOTS_PER_SECTOR) % self.capacity
+        self.base += SLOTS_PER_SECTOR
+        self.generation += 1
@@ -2,7 +2,11 @@ import logging
 from typing import Optional
 
 from modules import uart
+from modules import uart_async
 from modules import flash_interface
+from modules import flash_journal
+from modules import flash_scheduler
+from modules import erase_allocator
 from modules import config
 
 # Configure module logger
@@ -15,21 +19,28 @@ class ApplicationError(Exception):
     pass
 
 
-def initialize_flash() -> Optional[flash_interface.FlashMemory]:
+def initialize_flash() -> Optional[flash_scheduler.FlashScheduler]:
     """
     Initialize the flash memory interface.
 
+    The chip is wrapped in a FlashScheduler. Erase-ahead and compaction
+    run on the storage thread (main.run_storage_loop, or the executor in
+    the asyncio loop), and the scheduler suspends their erases to serve
+    reads from the command handlers.
+
     Returns:
-        FlashMemory instance if successful, None otherwise
+        FlashScheduler around the FlashMemory if successful, None otherwise
     """
     try:
-        flash = flash_interface.FlashMemory(
+        flash = flash_interface.open_flash(
             bus=config.SPI_BUS, device=config.SPI_DEVICE
         )
 
         if flash.is_open:
             logger.info("Flash memory initialized successfully")
-            return flash
+            return flash_scheduler.FlashScheduler(
+                flash, suspend=config.FLASH_ERASE_SUSPEND
+            )
         else:
             logger.warning("Flash memory opened but is_open flag is False")
             return None
@@ -42,24 +53,69 @@ def initialize_flash() -> Optional[flash_interface.FlashMemory]:
         return None
 
 
+def initialize_allocator(
+    flash: flash_interface.FlashMemory, next_data_addr: int
+) -> Optional[erase_allocator.EraseAheadAllocator]:
+    """
+    Initialize the erase-ahead allocator for the data section.
+
+    Args:
+        flash: Opened FlashMemory instance
+        next_data_addr: Current data write pointer
+
+    Returns:
+        EraseAheadAllocator instance if successful, None otherwise (stores
+        then assume their sectors are already erased, as before)
+    """
+    try:
+        allocator = erase_allocator.EraseAheadAllocator(flash)
+        allocator.load(next_data_addr)
+        return allocator
+
+    except (flash_journal.FlashJournalError, flash_interface.FlashMemoryError) as e:
+        logger.error(f"Failed to initialize erase-ahead allocator: {e}")
+        return None
+
+
 def initialize_uart() -> Optional:
     """
     Initialize the UART listener.
 
     Returns:
-        UART queue for receiving data, or None if initialization failed
+        UART receive buffer, or None if initialization failed
 
     Raises:
         ApplicationError: If UART initialization fails
     """
     try:
-        uart_queue = uart.start_listener(config.UART_PORT, config.BAUD_RATE)
+        uart_buffer = uart.start_listener(config.UART_PORT, config.BAUD_RATE)
 
-        if not uart_queue:
+        # An empty ring buffer is falsy, so compare against None explicitly
+        if uart_buffer is None:
             raise ApplicationError("Failed to start UART listener")
 
         logger.info("UART listener started successfully")
-        return uart_queue
+        return uart_buffer
+
+    except uart.SerialError as e:
+        logger.error(f"UART initialization failed: {e}")
+        raise ApplicationError(f"UART initialization failed: {e}")
+
+
+async def initialize_uart_async() -> uart_async.AsyncUARTProtocol:
+    """
+    Open the PIC link with the asyncio transport.
+
+    Returns:
+        Connected AsyncUARTProtocol
+
+    Raises:
+        ApplicationError: If UART initialization fails
+    """
+    try:
+        protocol = await uart_async.open_pic_link(config.UART_PORT, config.BAUD_RATE)
+        logger.info("UART asyncio transport started successfully")
+        return protocol
 
     except uart.SerialError as e:
         logger.error(f"UART initialization failed: {e}")
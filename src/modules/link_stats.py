@@ -0,0 +1,153 @@
+from collections import deque
+from typing import Optional
+
+# --- Constants ---
+DEFAULT_LATENCY_WINDOW = 256  # most recent samples kept for percentiles
+DEFAULT_HISTOGRAM_MAX = 32  # counts above this share the last bucket
+
+
+class LatencyStats:
+    """
+    Running latency statistics for the PIC link.
+
+    Keeps exact count/mean/min/max over every sample and percentiles over the
+    most recent `window` samples, so memory use stays constant.
+    """
+
+    def __init__(self, window: int = DEFAULT_LATENCY_WINDOW):
+        """
+        Args:
+            window: Number of recent samples used for percentiles
+        """
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max = 0.0
+        self._recent: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """
+        Add one latency sample.
+
+        Args:
+            seconds: Measured latency in seconds
+        """
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._recent.append(seconds)
+
+    @property
+    def mean(self) -> float:
+        """Mean latency in seconds over all samples (0.0 if none)."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Get a percentile of the recent samples.
+
+        Args:
+            percent: Percentile in the range 0-100
+
+        Returns:
+            Latency in seconds (0.0 if there are no samples)
+        """
+        if not self._recent:
+            return 0.0
+
+        ordered = sorted(self._recent)
+        rank = round(percent / 100 * (len(ordered) - 1))
+        return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+    def summary(self) -> str:
+        """
+        Get a one-line, human readable summary in milliseconds.
+
+        Returns:
+            Summary string
+        """
+        if not self.count:
+            return "no samples"
+
+        return (
+            f"n={self.count}, mean={self.mean * 1e3:.2f} ms, "
+            f"p50={self.percentile(50) * 1e3:.2f} ms, "
+            f"p95={self.percentile(95) * 1e3:.2f} ms, "
+            f"min={self.min * 1e3:.2f} ms, max={self.max * 1e3:.2f} ms"
+        )
+
+
+class CountHistogram:
+    """
+    Histogram of small event counts (e.g. frames handled per loop pass).
+
+    Counts are grouped in power-of-two buckets: 0, 1, 2, 3-4, 5-8, 9-16, ...
+    with everything above `max_count` in the last bucket.
+    """
+
+    def __init__(self, max_count: int = DEFAULT_HISTOGRAM_MAX):
+        """
+        Args:
+            max_count: Upper bound of the last regular bucket
+        """
+        self._bounds = [0, 1]
+        while self._bounds[-1] < max_count:
+            self._bounds.append(self._bounds[-1] * 2)
+        self._buckets = [0] * (len(self._bounds) + 1)
+        self.samples = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, count: int) -> None:
+        """
+        Add one sample.
+
+        Args:
+            count: Number of events in this sample
+        """
+        self.samples += 1
+        self.total += count
+        if count > self.max:
+            self.max = count
+
+        for index, bound in enumerate(self._bounds):
+            if count <= bound:
+                self._buckets[index] += 1
+                return
+        self._buckets[-1] += 1
+
+    def buckets(self) -> dict:
+        """
+        Get the non-empty buckets.
+
+        Returns:
+            Dictionary of bucket label -> number of samples
+        """
+        labels = []
+        lower = 0
+        for bound in self._bounds:
+            labels.append(str(bound) if bound <= lower + 1 else f"{lower + 1}-{bound}")
+            lower = bound
+        labels.append(f">{self._bounds[-1]}")
+
+        return {
+            label: samples
+            for label, samples in zip(labels, self._buckets)
+            if samples
+        }
+
+    def summary(self) -> str:
+        """
+        Get a one-line, human readable summary.
+
+        Returns:
+            Summary string
+        """
+        if not self.samples:
+            return "no samples"
+
+        buckets = ", ".join(f"{label}: {n}" for label, n in self.buckets().items())
+        return f"n={self.samples}, max={self.max}, {{{buckets}}}"
@@ -11,9 +11,12 @@ logger = logging.getLogger(__name__)
 MOCK_IMAGE_DIR = str(Path(__file__).parent.joinpath("mock_images"))
 CLASSIFICATIONS = ["Forests", "Plains", "Sky"]
 VALID_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+CONFIDENCE_RANGE = (50, 99)  # percent, range of the simulated confidences
 
 
-def simulate_image_capture(base_dir: str) -> Tuple[Optional[str], Optional[str]]:
+def simulate_image_capture(
+    base_dir: str,
+) -> Tuple[Optional[str], Optional[str], Optional[int]]:
     """
     Randomly select an image from mock directories to simulate capture and classification.
 
@@ -21,7 +24,8 @@ def simulate_image_capture(base_dir: str) -> Tuple[Optional[str], Optional[str]]
         base_dir: Base directory containing classification subdirectories
 
     Returns:
-        Tuple of (classification_string, image_file_path) or (None, None) if error
+        Tuple of (classification_string, image_file_path, confidence_percent)
+        or (None, None, None) if error
     """
     try:
         base_path = Path(base_dir)
@@ -31,7 +35,7 @@ def simulate_image_capture(base_dir: str) -> Tuple[Optional[str], Optional[str]]
                 f"Mock image directory not found at '{base_dir}'. "
                 f"Please create: {base_dir}/[Forests|Plains|Sky]"
             )
-            return None, None
+            return None, None, None
 
         # Randomly choose a classification
         chosen_class = random.choice(CLASSIFICATIONS)
@@ -39,7 +43,7 @@ def simulate_image_capture(base_dir: str) -> Tuple[Optional[str], Optional[str]]
 
         if not class_dir.exists():
             logger.error(f"Classification directory not found: {class_dir}")
-            return None, None
+            return None, None, None
 
         # Get all valid images from the classification folder
         images = [
@@ -50,18 +54,21 @@ def simulate_image_capture(base_dir: str) -> Tuple[Optional[str], Optional[str]]
 
         if not images:
             logger.warning(f"No images found in {class_dir}")
-            return None, None
+            return None, None, None
 
         # Randomly select an image
         chosen_image_name = random.choice(images)
         full_path = str(class_dir / chosen_image_name)
 
+        # Simulate the classifier's confidence in its choice
+        confidence = random.randint(*CONFIDENCE_RANGE)
+
         logger.info(
-            f"Simulated capture: Classified as '{chosen_class}', "
-            f"image: '{chosen_image_name}'"
+            f"Simulated capture: Classified as '{chosen_class}' "
+            f"({confidence}%), image: '{chosen_image_name}'"
         )
-        return chosen_class, full_path
+        return chosen_class, full_path, confidence
 
     except Exception as e:
         logger.error(f"Error during image capture simulation: {e}")
-        return None, None
+        return None, None, None
@@ -0,0 +1,454 @@
+"""
+Ground-side PIC emulator for load and latency testing of the UART path.
+
+Opens a pseudo-terminal pair, points config.UART_PORT at the slave end and
+runs the real uart + uart_protocol + command_handler stack (main.run_main_loop)
+against it. The emulator plays the PIC on the master end: it sends valid,
+corrupted, split, back-to-back and noise-prefixed frames at a configurable
+rate and matches the ACK/NACK replies to measure round-trip latency, sustained
+frames/s and loss.
+
+Usage (from src/):
+    python -m modules.pic_emulator --rate 200 --duration 10
+"""
+
+import argparse
+import logging
+import os
+import random
+import select
+import sys
+import threading
+import time
+import tty
+from collections import deque
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import main
+from modules import command_handler
+from modules import config
+from modules import crc_16
+from modules import init_setup
+from modules import link_stats
+from modules import uart
+from modules import uart_protocol
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+FRAME_KINDS = ("valid", "corrupt", "split", "burst", "noise")
+DEFAULT_MIX = "valid=65,corrupt=10,split=10,burst=10,noise=5"
+NOISE_SIZE = 4  # junk bytes written in front of a "noise" frame
+DEFAULT_BURST_SIZE = 8
+SPLIT_GAP = 0.005  # seconds between the two halves of a split frame
+DRAIN_TIMEOUT = 1.0  # seconds to wait for outstanding replies after sending
+READ_SIZE = 1024
+ACK_NACK_FRAME_SIZE = uart_protocol.MINIMUM_BUFFER_SIZE
+SEQUENCE_SIZE = 2  # bytes of sequence number carried in each payload
+
+
+def build_frame(cmd: int, payload: bytes = b"", corrupt_crc: bool = False) -> bytes:
+    """
+    Build a complete frame as the PIC would send it.
+
+    Args:
+        cmd: Command byte
+        payload: Payload bytes (0-255)
+        corrupt_crc: Flip the CRC so the ICU must NACK the frame
+
+    Returns:
+        The encoded frame
+    """
+    frame = bytes([uart_protocol.HEADER, cmd, len(payload)]) + payload
+    crc_value = crc_16.calculate_crc(frame)
+    if corrupt_crc:
+        crc_value ^= 0xFFFF
+    return frame + bytes(
+        [(crc_value >> 8) & 0xFF, crc_value & 0xFF, uart_protocol.STOP_BYTE]
+    )
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    """
+    Parse a frame mix such as "valid=70,corrupt=10,split=10,burst=10".
+
+    Args:
+        mix: Comma separated kind=weight pairs
+
+    Returns:
+        Dictionary of weights per frame kind
+
+    Raises:
+        ValueError: If a kind is unknown or no weight is positive
+    """
+    weights = {kind: 0 for kind in FRAME_KINDS}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in weights:
+            raise ValueError(f"Unknown frame kind '{kind}'")
+        weights[kind] = int(weight)
+
+    if sum(weights.values()) <= 0:
+        raise ValueError("Frame mix needs at least one positive weight")
+    return weights
+
+
+class EmulatorReport:
+    """Counters and latency statistics collected during one emulator run."""
+
+    def __init__(self):
+        self.sent = {kind: 0 for kind in FRAME_KINDS}
+        self.frames_sent = 0  # Individual frames, bursts counted per frame
+        self.expected_acks = 0
+        self.expected_nacks = 0
+        self.acks = 0
+        self.nacks = 0
+        self.unmatched_acks = 0
+        self.ack_latency = link_stats.LatencyStats(window=4096)
+        self.nack_latency = link_stats.LatencyStats(window=4096)
+        self.duration = 0.0
+        self.icu_error: Optional[str] = None
+
+    @property
+    def lost(self) -> int:
+        """Frames that never got their expected ACK or NACK."""
+        return max(self.expected_acks - self.acks, 0) + max(
+            self.expected_nacks - self.nacks, 0
+        )
+
+    @property
+    def frames_per_second(self) -> float:
+        """Replies (ACK + NACK) received per second of run time."""
+        return (self.acks + self.nacks) / self.duration if self.duration else 0.0
+
+    def summary(self) -> str:
+        """
+        Get a multi-line, human readable report.
+
+        Returns:
+            Report string
+        """
+        sent = ", ".join(f"{kind}={count}" for kind, count in self.sent.items())
+        lines = [
+            f"Duration:        {self.duration:.2f} s",
+            f"Sent:            {self.frames_sent} frames ({sent})",
+            f"ACKs:            {self.acks}/{self.expected_acks}"
+            f" (unmatched: {self.unmatched_acks})",
+            f"NACKs:           {self.nacks}/{self.expected_nacks}",
+            f"Lost:            {self.lost}",
+            f"Sustained:       {self.frames_per_second:.1f} frames/s",
+            f"ACK round trip:  {self.ack_latency.summary()}",
+            f"NACK round trip: {self.nack_latency.summary()}",
+        ]
+        if self.icu_error:
+            lines.append(f"ICU error:       {self.icu_error}")
+        return "\n".join(lines)
+
+
+class PICEmulator:
+    """
+    Drives the ICU's real UART stack through a pty pair, playing the PIC.
+    """
+
+    def __init__(
+        self,
+        rate: float = 100.0,
+        mix: Optional[Dict[str, int]] = None,
+        burst_size: int = DEFAULT_BURST_SIZE,
+        command: int = command_handler.PICCommands.GET_PIC_STATUS,
+        baud_rate: Optional[int] = None,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            rate: Send events per second (a burst counts as one event)
+            mix: Weights per frame kind (default: DEFAULT_MIX)
+            burst_size: Frames per back-to-back burst
+            command: Command byte carried by generated frames
+            baud_rate: Pace writes as if the line ran at this baud rate
+                (None = as fast as the pty accepts them)
+            seed: Seed for the frame-kind choice, for repeatable runs
+        """
+        self.rate = rate
+        self.mix = mix or parse_mix(DEFAULT_MIX)
+        self.burst_size = burst_size
+        self.command = int(command)
+        self.baud_rate = baud_rate
+        self._random = random.Random(seed)
+
+        self.report = EmulatorReport()
+        self._master_fd: Optional[int] = None
+        self._sequence = 0
+        self._pending_acks: Dict[bytes, float] = {}
+        self._pending_nacks: deque = deque()
+        self._pending_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reader_thread: Optional[threading.Thread] = None
+        self._icu_thread: Optional[threading.Thread] = None
+
+    # --- ICU side ---
+
+    def start(self) -> None:
+        """
+        Open the pty pair and start the ICU stack and the reply reader.
+
+        Raises:
+            ApplicationError: If the ICU's UART cannot be initialized
+        """
+        self._master_fd, slave_fd = os.openpty()
+        tty.setraw(self._master_fd)
+        config.UART_PORT = os.ttyname(slave_fd)
+        logger.info(f"PIC emulator on {config.UART_PORT}")
+
+        init_setup.initialize_uart()
+        # The listener holds its own fd for the slave end
+        os.close(slave_fd)
+
+        protocol = uart_protocol.UARTProtocol()
+        self._icu_thread = threading.Thread(
+            target=self._run_icu, args=(protocol,), daemon=True, name="ICUMainLoop"
+        )
+        self._icu_thread.start()
+
+        self._reader_thread = threading.Thread(
+            target=self._read_replies, daemon=True, name="PICReader"
+        )
+        self._reader_thread.start()
+
+    def _run_icu(self, protocol: uart_protocol.UARTProtocol) -> None:
+        """Run the ICU main loop without flash until stopped."""
+        try:
+            main.run_main_loop(protocol, None, None, None, self._stop_event)
+        except Exception as e:
+            self.report.icu_error = repr(e)
+            logger.error(f"ICU main loop stopped: {e}")
+
+    def stop(self) -> None:
+        """Stop the ICU stack and close the pty pair."""
+        self._stop_event.set()
+        if self._icu_thread:
+            self._icu_thread.join(timeout=uart.THREAD_JOIN_TIMEOUT)
+        uart.stop_listener()
+        if self._reader_thread:
+            self._reader_thread.join(timeout=uart.THREAD_JOIN_TIMEOUT)
+        if self._master_fd is not None:
+            os.close(self._master_fd)
+            self._master_fd = None
+
+    # --- PIC side ---
+
+    def _next_payload(self) -> bytes:
+        self._sequence = (self._sequence + 1) % (1 << (8 * SEQUENCE_SIZE))
+        return self._sequence.to_bytes(SEQUENCE_SIZE, "big")
+
+    def _write(self, data: bytes) -> None:
+        """Write to the master end, pacing to the emulated baud rate."""
+        os.write(self._master_fd, data)
+        if self.baud_rate:
+            # 10 bits per byte on the wire (start + 8 data + stop)
+            time.sleep(len(data) * 10 / self.baud_rate)
+
+    def _expect_ack(self, frame: bytes, sent_at: float) -> None:
+        # The ICU echoes the command and CRC bytes, so the ACK is the key
+        with self._pending_lock:
+            self._pending_acks[uart_protocol.UARTProtocol.ack(frame)] = sent_at
+            self.report.expected_acks += 1
+
+    def _expect_nack(self, sent_at: float) -> None:
+        with self._pending_lock:
+            self._pending_nacks.append(sent_at)
+            self.report.expected_nacks += 1
+
+    def send_event(self, kind: str) -> None:
+        """
+        Send one event of the given kind.
+
+        Args:
+            kind: One of FRAME_KINDS
+        """
+        self.report.sent[kind] += 1
+
+        if kind == "burst":
+            frames = [
+                build_frame(self.command, self._next_payload())
+                for _ in range(self.burst_size)
+            ]
+            sent_at = time.monotonic()
+            for frame in frames:
+                self._expect_ack(frame, sent_at)
+            self._write(b"".join(frames))
+            self.report.frames_sent += len(frames)
+            return
+
+        if kind == "noise":
+            # Junk without a HEADER byte: one BAD_FRAME NACK, then the frame
+            junk = [b for b in range(256) if b != uart_protocol.HEADER]
+            noise = bytes(self._random.choice(junk) for _ in range(NOISE_SIZE))
+            frame = build_frame(self.command, self._next_payload())
+            sent_at = time.monotonic()
+            self._expect_nack(sent_at)
+            self._expect_ack(frame, sent_at)
+            self._write(noise + frame)
+            self.report.frames_sent += 1
+            return
+
+        corrupt = kind == "corrupt"
+        frame = build_frame(self.command, self._next_payload(), corrupt_crc=corrupt)
+        self.report.frames_sent += 1
+
+        if kind == "split":
+            half = len(frame) // 2
+            self._write(frame[:half])
+            time.sleep(SPLIT_GAP)
+            sent_at = time.monotonic()
+            self._expect_ack(frame, sent_at)
+            self._write(frame[half:])
+        else:
+            sent_at = time.monotonic()
+            if corrupt:
+                self._expect_nack(sent_at)
+            else:
+                self._expect_ack(frame, sent_at)
+            self._write(frame)
+
+    def _read_replies(self) -> None:
+        """Parse ACK/NACK frames coming back from the ICU."""
+        buffer = bytearray()
+        header = bytes([uart_protocol.HEADER])
+
+        while not self._stop_event.is_set() and self._master_fd is not None:
+            try:
+                ready, _, _ = select.select([self._master_fd], [], [], 0.1)
+                if not ready:
+                    continue
+                data = os.read(self._master_fd, READ_SIZE)
+            except OSError:
+                break
+
+            received_at = time.monotonic()
+            buffer += data
+
+            while True:
+                start = buffer.find(header)
+                if start < 0:
+                    buffer.clear()
+                    break
+                if len(buffer) - start < ACK_NACK_FRAME_SIZE:
+                    del buffer[:start]
+                    break
+
+                candidate = bytes(buffer[start : start + ACK_NACK_FRAME_SIZE])
+                if (
+                    candidate[uart_protocol.DATA_LENGTH_IDX] != 0
+                    or candidate[-1] != uart_protocol.STOP_BYTE
+                ):
+                    # Not a reply frame (e.g. STATUS text), skip this byte
+                    del buffer[: start + 1]
+                    continue
+
+                del buffer[: start + ACK_NACK_FRAME_SIZE]
+                self._handle_reply(candidate, received_at)
+
+    def _handle_reply(self, frame: bytes, received_at: float) -> None:
+        nack_frames = (
+            uart_protocol.UARTProtocol.nack(uart_protocol.UARTError.BAD_FRAME),
+            uart_protocol.UARTProtocol.nack(uart_protocol.UARTError.INVALID_CHECKSUM),
+        )
+
+        with self._pending_lock:
+            if frame in nack_frames:
+                self.report.nacks += 1
+                if self._pending_nacks:
+                    sent_at = self._pending_nacks.popleft()
+                    self.report.nack_latency.record(received_at - sent_at)
+                return
+
+            sent_at = self._pending_acks.pop(frame, None)
+            if sent_at is None:
+                self.report.unmatched_acks += 1
+                return
+
+            self.report.acks += 1
+            self.report.ack_latency.record(received_at - sent_at)
+
+    def run(self, duration: float) -> EmulatorReport:
+        """
+        Send events at the configured rate for `duration` seconds, then wait
+        for outstanding replies.
+
+        Args:
+            duration: Sending time in seconds
+
+        Returns:
+            The collected report
+        """
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+
+        start = time.monotonic()
+        next_send = start
+        while time.monotonic() - start < duration and not self.report.icu_error:
+            self.send_event(self._random.choices(kinds, weights)[0])
+            next_send += interval
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        # Wait for the ICU to answer whatever is still in flight
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while time.monotonic() < deadline:
+            with self._pending_lock:
+                if not self._pending_acks and not self._pending_nacks:
+                    break
+            time.sleep(0.01)
+
+        self.report.duration = time.monotonic() - start
+        return self.report
+
+
+def main_cli() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100.0, help="events per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to send")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight pairs")
+    parser.add_argument("--burst-size", type=int, default=DEFAULT_BURST_SIZE)
+    parser.add_argument(
+        "--command",
+        type=lambda value: int(value, 0),
+        default=int(command_handler.PICCommands.GET_PIC_STATUS),
+        help="command byte carried by generated frames (e.g. 0x32 for STATUS)",
+    )
+    parser.add_argument("--baud", type=int, default=None, help="emulated line rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args()
+
+    # uart_protocol configures the root logger on import; override it here
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    emulator = PICEmulator(
+        rate=args.rate,
+        mix=parse_mix(args.mix),
+        burst_size=args.burst_size,
+        command=args.command,
+        baud_rate=args.baud,
+        seed=args.seed,
+    )
+
+    emulator.start()
+    try:
+        report = emulator.run(args.duration)
+    finally:
+        emulator.stop()
+
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main_cli()
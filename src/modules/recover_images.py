@@ -8,18 +8,20 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from modules import flash_interface
 from modules import config
+from modules import image_integrity
+from modules import index_table
 
 # Configure module logger
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
 RECOVERY_DIR = "flash_recovered"
-# Max spidev buffer (4096) minus 5 bytes for read command (1) and address (4)
-READ_CHUNK_SIZE = 4091
+READ_CHUNK_SIZE = 256 * 1024  # bytes per readinto() call, for progress logging
 INDEX_ENTRY_SIZE = 8
 ADDRESS_SIZE = 4
 ERASED_BYTE = 0xFF
 DEFAULT_IMAGE_EXTENSION = ".jpg"
+BAD_BLOCK_RETRIES = 2  # re-reads of blocks that fail their integrity check
 
 
 class ImageRecoveryError(Exception):
@@ -88,7 +90,10 @@ def read_image_data_in_chunks(
     flash_chip: flash_interface.FlashMemory, start_addr: int, total_size: int
 ) -> Optional[bytearray]:
     """
-    Read image data from flash memory in chunks.
+    Read image data from flash memory into a preallocated buffer.
+
+    FlashMemory.readinto() splits the read into transfers the SPI driver
+    accepts; READ_CHUNK_SIZE only bounds each call so progress can be logged.
 
     Args:
         flash_chip: FlashMemory instance
@@ -98,7 +103,8 @@ def read_image_data_in_chunks(
     Returns:
         Bytearray containing the image data, or None if error
     """
-    image_data = bytearray()
+    image_data = bytearray(total_size)
+    view = memoryview(image_data)
     bytes_read = 0
 
     logger.info(f"Reading {total_size:,} bytes from flash in chunks...")
@@ -109,15 +115,10 @@ def read_image_data_in_chunks(
             bytes_to_read = min(READ_CHUNK_SIZE, total_size - bytes_read)
             chunk_address = start_addr + bytes_read
 
-            # Read chunk from flash
-            chunk_data = flash_chip.read_bytes(chunk_address, bytes_to_read)
-
-            if not chunk_data:
-                logger.error(f"Failed to read chunk at address 0x{chunk_address:08X}")
-                return None
-
-            image_data.extend(chunk_data)
-            bytes_read += len(chunk_data)
+            # Read chunk from flash straight into the image buffer
+            bytes_read += flash_chip.readinto(
+                chunk_address, view[bytes_read : bytes_read + bytes_to_read]
+            )
 
             # Log progress for large files
             if total_size > 100_000:
@@ -133,6 +134,60 @@ def read_image_data_in_chunks(
         return None
 
 
+def check_and_repair_image(
+    flash_chip: flash_interface.FlashMemory,
+    image_data: bytearray,
+    start_addr: int,
+    end_addr: int,
+) -> bool:
+    """
+    Check recovered image data against its integrity trailer, re-reading
+    only the blocks that fail.
+
+    Args:
+        flash_chip: FlashMemory instance
+        image_data: Image data read from flash (repaired in place)
+        start_addr: Starting address of the image data
+        end_addr: Ending address of the image data
+
+    Returns:
+        True if the image verified (or has no trailer to verify against),
+        False if some blocks are still bad
+    """
+    status, trailer = image_integrity.read_trailer(flash_chip, start_addr, end_addr)
+    if status == image_integrity.IntegrityStatus.NO_TRAILER:
+        logger.info("Image has no integrity trailer, skipping verification")
+        return True
+    if status != image_integrity.IntegrityStatus.OK:
+        logger.warning("Integrity trailer is damaged, cannot verify image")
+        return True
+
+    bad_blocks = image_integrity.find_bad_blocks(image_data, trailer)
+    block_size = trailer.block_size or trailer.image_size
+
+    for attempt in range(BAD_BLOCK_RETRIES):
+        if not bad_blocks:
+            break
+        logger.warning(
+            f"Blocks {bad_blocks} failed verification, re-reading "
+            f"(attempt {attempt + 1}/{BAD_BLOCK_RETRIES})"
+        )
+        for index in bad_blocks:
+            offset = index * block_size
+            length = min(block_size, trailer.image_size - offset)
+            block = read_image_data_in_chunks(flash_chip, start_addr + offset, length)
+            if block is not None:
+                image_data[offset : offset + length] = block
+        bad_blocks = image_integrity.find_bad_blocks(image_data, trailer)
+
+    if bad_blocks:
+        logger.error(f"Image is corrupt, bad blocks: {bad_blocks}")
+        return False
+
+    logger.info("Image integrity verified")
+    return True
+
+
 def save_recovered_image(
     image_data: bytearray,
     image_number: int,
@@ -217,45 +272,42 @@ def recover_single_image(
         )
         return False
 
+    # Verify against the integrity trailer, re-reading only bad blocks.
+    # A corrupt image is still saved, but counts as a failed recovery.
+    verified = check_and_repair_image(flash_chip, image_data, start_addr, end_addr)
+
     # Save to file
-    return save_recovered_image(image_data, image_number, recovery_dir)
+    saved = save_recovered_image(image_data, image_number, recovery_dir)
+    return saved and verified
 
 
 def scan_and_recover_images(
-    flash_chip: flash_interface.FlashMemory, recovery_dir: Path
-) -> int:
+    flash_chip: flash_interface.FlashMemory,
+    recovery_dir: Path,
+    table: Optional[index_table.IndexTable] = None,
+) -> tuple[int, int]:
     """
     Scan the flash memory index and recover all found images.
 
     Args:
         flash_chip: FlashMemory instance
         recovery_dir: Directory to save recovered images
+        table: Loaded index table (default: read the Index Section now)
 
     Returns:
-        Number of images successfully recovered
+        Tuple of (images successfully recovered, images found)
     """
     logger.info("\n" + "=" * 50)
     logger.info("Starting Image Recovery Process")
     logger.info("=" * 50)
 
-    current_index_addr = config.INDEX_1ST
+    # One bulk read of the index section
+    if table is None:
+        table = index_table.IndexTable.from_flash(flash_chip)
     image_count = 0
     recovered_count = 0
 
-    # Scan the index section
-    while current_index_addr <= config.INDEX_END:
-        entry_bytes = flash_chip.read_bytes(current_index_addr, INDEX_ENTRY_SIZE)
-
-        # Check for empty slot (end of valid entries)
-        if is_index_entry_empty(entry_bytes):
-            logger.info(
-                f"Found empty index slot at 0x{current_index_addr:08X}. "
-                "End of stored images."
-            )
-            break
-
-        # Parse the index entry
-        start_addr, end_addr = parse_index_entry(entry_bytes)
+    for current_index_addr, start_addr, end_addr in table:
         image_count += 1
 
         logger.debug(f"Index entry at 0x{current_index_addr:08X}")
@@ -266,9 +318,11 @@ def scan_and_recover_images(
         ):
             recovered_count += 1
 
-        # Move to next index entry
-        current_index_addr += INDEX_ENTRY_SIZE
-
+    if table.next_index_addr is not None:
+        logger.info(
+            f"Found empty index slot at 0x{table.next_index_addr:08X}. "
+            "End of stored images."
+        )
     return recovered_count, image_count
 
 
@@ -303,7 +357,7 @@ def main() -> None:
         recovery_dir = ensure_recovery_directory(RECOVERY_DIR)
 
         # Use context manager for automatic cleanup
-        with flash_interface.FlashMemory(
+        with flash_interface.open_flash(
             bus=config.SPI_BUS, device=config.SPI_DEVICE
         ) as flash_chip:
             run_recovery(flash_chip, recovery_dir)
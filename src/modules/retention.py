@@ -0,0 +1,132 @@
+"""
+Priority-aware retention of stored images.
+
+Every image's index record (index_records) carries a retention priority
+(0-254, higher is kept longer) and the sequence number of the index slot it
+was first stored in. The priority comes from the classification
+(config.CLASS_PRIORITIES) scaled by the classifier confidence. The record
+is copied whenever an image gets a new index entry (compaction, index
+sector reclaim), so the image keeps its age. Legacy entries without a
+record get DEFAULT_PRIORITY and their own slot's sequence number.
+
+An image's retention key is priority + RETENTION_AGE_WEIGHT * origin:
+a newer image beats an older one of the same class, and enough newer images
+outweigh a better class. Every image ages at the same rate, so the key never
+changes once stored and RetentionHeap can keep live images in a plain min-heap.
+The lowest key is the next victim when the data section is full
+(flash_actions.evict_for_space()).
+"""
+
+import heapq
+import logging
+from typing import List, Optional, Tuple
+
+from modules import config
+from modules import index_records
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+MAX_PRIORITY = 0xFE
+
+
+def priority_score(
+    classification: Optional[str], confidence: Optional[int] = None
+) -> int:
+    """
+    Compute the stored priority of a newly classified image.
+
+    Args:
+        classification: Class label from the classifier (None if unknown)
+        confidence: Classifier confidence in percent (None counts as 100)
+
+    Returns:
+        Priority between 0 and MAX_PRIORITY
+    """
+    weight = config.CLASS_PRIORITIES.get(classification, config.DEFAULT_PRIORITY)
+    if confidence is not None:
+        weight = weight * min(max(confidence, 0), 100) / 100
+    return min(int(round(weight)), MAX_PRIORITY)
+
+
+class RetentionHeap:
+    """Min-heap of live images ordered by retention key."""
+
+    def __init__(
+        self,
+        records: index_records.RecordTable,
+        age_weight: float = config.RETENTION_AGE_WEIGHT,
+    ):
+        """
+        Args:
+            records: Index records of the shared index table
+            age_weight: Priority points gained per newer image stored
+        """
+        self.records = records
+        self.table = records.table
+        self.age_weight = age_weight
+        # (key, entry number); entries of deleted slots are dropped when popped
+        self._heap: List[Tuple[float, int]] = []
+        self._synced = 0
+        self._generation = records.generation
+
+    def key(self, priority: int, origin: int) -> float:
+        """Retention key of an image; the lowest is evicted first."""
+        return priority + self.age_weight * origin
+
+    def sync(self) -> int:
+        """
+        Push the images stored since the last sync.
+
+        Returns:
+            Number of images pushed
+        """
+        self.records.sync()
+        used = len(self.records.records)
+        if self._generation != self.records.generation:
+            # The table was reloaded or renumbered
+            self._heap, self._synced = [], 0
+            self._generation = self.records.generation
+
+        pushed = 0
+        for number in range(self._synced, used):
+            if self.table.is_deleted(number):
+                continue
+            self.push(number)
+            pushed += 1
+        self._synced = used
+        return pushed
+
+    def push(self, number: int) -> None:
+        """
+        Push the image of table entry `number`, e.g. a victim from
+        pop_victim() that was not evicted after all.
+
+        Args:
+            number: Table entry number (0-based)
+        """
+        record = self.records.records[number]
+        heapq.heappush(self._heap, (self.key(record.priority, record.origin), number))
+
+    def pop_victim(self, below: float) -> Optional[int]:
+        """
+        Remove the live image with the lowest key, if it is lower than `below`.
+
+        Args:
+            below: Key of the image that needs the space; images worth as
+                much or more are never evicted for it
+
+        Returns:
+            Table entry number of the victim, or None if there is none
+        """
+        self.sync()
+        while self._heap and self.table.is_deleted(self._heap[0][1]):
+            heapq.heappop(self._heap)
+        if not self._heap or self._heap[0][0] >= below:
+            return None
+        return heapq.heappop(self._heap)[1]
+
+    def __len__(self) -> int:
+        """Number of heap entries, including not yet dropped deleted ones."""
+        return len(self._heap)
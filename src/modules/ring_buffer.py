@@ -0,0 +1,212 @@
+import threading
+from typing import Optional
+
+
+class RingBuffer:
+    """
+    Lock-protected, fixed-capacity byte ring buffer.
+
+    One producer (the serial listener thread) writes chunks with write(), one
+    consumer (the frame parser) takes them out with readinto() or peek() plus
+    consume(). Bytes that do not fit are dropped and counted, so memory use is
+    bounded no matter how fast the link delivers data.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Create an empty ring buffer.
+
+        Args:
+            capacity: Maximum number of bytes held at once
+
+        Raises:
+            ValueError: If capacity is not positive
+        """
+        if capacity <= 0:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._capacity = capacity
+        self._head = 0  # Index of the oldest byte
+        self._size = 0  # Number of bytes currently stored
+        self._not_empty = threading.Condition(threading.Lock())
+
+        # Statistics
+        self.high_water_mark = 0  # Largest backlog seen, in bytes
+        self.overflow_bytes = 0  # Bytes dropped because the buffer was full
+        self.overflow_events = 0  # Number of writes that dropped bytes
+
+    def __len__(self) -> int:
+        """Return the number of bytes currently stored."""
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of bytes the buffer can hold."""
+        return self._capacity
+
+    @property
+    def free(self) -> int:
+        """Number of bytes that can be written before overflowing."""
+        return self._capacity - self._size
+
+    def write(self, data: bytes) -> int:
+        """
+        Append bytes to the buffer, dropping whatever does not fit.
+
+        Args:
+            data: Bytes-like object to append
+
+        Returns:
+            Number of bytes actually stored
+        """
+        data = memoryview(data)
+        length = len(data)
+        if length == 0:
+            return 0
+
+        with self._not_empty:
+            accepted = min(length, self._capacity - self._size)
+
+            if accepted < length:
+                self.overflow_bytes += length - accepted
+                self.overflow_events += 1
+
+            if accepted:
+                tail = (self._head + self._size) % self._capacity
+                first = min(accepted, self._capacity - tail)
+                self._view[tail : tail + first] = data[:first]
+                if accepted > first:
+                    self._view[: accepted - first] = data[first:accepted]
+
+                self._size += accepted
+                if self._size > self.high_water_mark:
+                    self.high_water_mark = self._size
+
+                self._not_empty.notify_all()
+
+            return accepted
+
+    def _copy_out(self, target: memoryview, length: int) -> None:
+        """Copy the oldest `length` bytes into target. Caller holds the lock."""
+        first = min(length, self._capacity - self._head)
+        target[:first] = self._view[self._head : self._head + first]
+        if length > first:
+            target[first:length] = self._view[: length - first]
+
+    def _advance(self, length: int) -> None:
+        """Drop the oldest `length` bytes. Caller holds the lock."""
+        self._size -= length
+        self._head = 0 if self._size == 0 else (self._head + length) % self._capacity
+
+    def readinto(self, buffer) -> int:
+        """
+        Move as many bytes as fit from the buffer into a writable buffer.
+
+        Args:
+            buffer: Writable bytes-like object (bytearray, memoryview, ...)
+
+        Returns:
+            Number of bytes copied
+        """
+        target = memoryview(buffer).cast("B")
+
+        with self._not_empty:
+            length = min(len(target), self._size)
+            if length:
+                self._copy_out(target, length)
+                self._advance(length)
+            return length
+
+    def peek(self, length: Optional[int] = None) -> bytes:
+        """
+        Return the oldest bytes without removing them.
+
+        Args:
+            length: Maximum number of bytes to return (None = everything)
+
+        Returns:
+            Up to `length` of the oldest buffered bytes
+        """
+        with self._not_empty:
+            if length is None or length > self._size:
+                length = self._size
+            out = bytearray(length)
+            self._copy_out(memoryview(out), length)
+            return bytes(out)
+
+    def consume(self, length: int) -> int:
+        """
+        Remove the oldest bytes, typically after a peek().
+
+        Args:
+            length: Number of bytes to remove
+
+        Returns:
+            Number of bytes actually removed
+        """
+        with self._not_empty:
+            length = max(0, min(length, self._size))
+            self._advance(length)
+            return length
+
+    def read(self, length: Optional[int] = None) -> bytes:
+        """
+        Remove and return the oldest bytes.
+
+        Args:
+            length: Maximum number of bytes to return (None = everything)
+
+        Returns:
+            Up to `length` of the oldest buffered bytes
+        """
+        with self._not_empty:
+            if length is None or length > self._size:
+                length = self._size
+            out = bytearray(length)
+            self._copy_out(memoryview(out), length)
+            self._advance(length)
+            return bytes(out)
+
+    def wait_for_data(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the buffer holds at least one byte.
+
+        Args:
+            timeout: Maximum time to wait in seconds (None = wait forever)
+
+        Returns:
+            True if data is available, False if the wait timed out
+        """
+        with self._not_empty:
+            return self._not_empty.wait_for(lambda: self._size > 0, timeout)
+
+    def clear(self) -> int:
+        """
+        Discard all buffered bytes.
+
+        Returns:
+            Number of bytes discarded
+        """
+        with self._not_empty:
+            count = self._size
+            self._head = 0
+            self._size = 0
+            return count
+
+    def stats(self) -> dict:
+        """
+        Get a snapshot of the buffer statistics.
+
+        Returns:
+            Dictionary with size, capacity, high-water mark and overflow counts
+        """
+        with self._not_empty:
+            return {
+                "size": self._size,
+                "capacity": self._capacity,
+                "high_water_mark": self.high_water_mark,
+                "overflow_bytes": self.overflow_bytes,
+                "overflow_events": self.overflow_events,
+            }
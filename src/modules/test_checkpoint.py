@@ -0,0 +1,133 @@
+"""
+This module contains unit tests for the mount checkpoint (checkpoint and
+flash_actions.mount_index).
+
+Purpose:
+- To verify that mounting from a checkpoint reads only the index entries
+  after it, and that a missing or stale checkpoint falls back to a binary
+  search that finds the same write pointers as a full scan, also once the
+  index has wrapped around.
+"""
+
+import unittest
+
+from . import config
+from . import flash_actions
+from . import index_table
+from .checkpoint import CheckpointStore
+from .flash_interface import FlashMemory
+from .flash_sim import SimulatedFlashSpi
+
+SIM_SIZE = 128 * 1024 * 1024
+IMAGE_SIZE = 0x1000
+
+
+class TestMountIndex(unittest.TestCase):
+    """
+    Test suite for mounting the image store from a checkpoint.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi(size=SIM_SIZE)
+        self.flash = FlashMemory(spi=self.spi)
+        self.checkpoints = CheckpointStore(self.flash)
+        self.count = 0
+
+    def tearDown(self):
+        self.flash.close()
+
+    def _add_entries(self, count: int) -> None:
+        """Write index entries for `count` images without trailers."""
+        for _ in range(count):
+            start = config.DATA_1ST + self.count * IMAGE_SIZE
+            self.flash.write_bytes(
+                config.INDEX_1ST + self.count * flash_actions.INDEX_ENTRY_SIZE,
+                flash_actions.create_index_entry(start, start + IMAGE_SIZE),
+            )
+            self.count += 1
+
+    def _expected(self):
+        return (
+            config.INDEX_1ST + self.count * flash_actions.INDEX_ENTRY_SIZE,
+            config.DATA_1ST + self.count * IMAGE_SIZE,
+        )
+
+    def _mount(self):
+        """Mount with a fresh store, as after a reboot; returns (result, reads)."""
+        reads = self.spi.counters["reads"]
+        result = flash_actions.mount_index(self.flash, CheckpointStore(self.flash))
+        return result, self.spi.counters["reads"] - reads
+
+    def test_first_mount_searches_and_checkpoints(self):
+        """
+        Purpose: To verify that without a checkpoint the binary search finds
+        the full scan's answer, and that the next mount reads almost nothing.
+        """
+        self._add_entries(300)
+
+        result, search_reads = self._mount()
+        self.assertEqual(result, self._expected())
+        self.assertEqual(result, flash_actions.find_next_available_address(self.flash))
+        self.assertLess(search_reads, 20)
+
+        result, reads = self._mount()
+        self.assertEqual(result, self._expected())
+        self.assertLess(reads, search_reads)
+
+    def test_entries_after_checkpoint_are_picked_up(self):
+        """
+        Purpose: To verify that stores made after the last checkpoint are
+        found, by a short walk or, past MOUNT_VERIFY_ENTRIES, by a search.
+        """
+        self._add_entries(10)
+        self.checkpoints.update(*self._expected(), self.count)
+
+        self._add_entries(3)
+        self.assertEqual(self._mount()[0], self._expected())
+
+        self._add_entries(flash_actions.MOUNT_VERIFY_ENTRIES + 5)
+        self.assertEqual(self._mount()[0], self._expected())
+
+    def test_checkpoint_ahead_of_index_is_ignored(self):
+        """
+        Purpose: To verify that a checkpoint claiming more entries than the
+        index holds (e.g. after the index was erased) is not trusted.
+        """
+        self._add_entries(5)
+        self.checkpoints.update(*self._expected(), self.count)
+        self.assertTrue(self.flash.erase_sector(config.INDEX_1ST, 4))
+        self.count = 0
+        self._add_entries(2)
+
+        self.assertEqual(self._mount()[0], self._expected())
+
+    def test_search_finds_a_wrapped_index(self):
+        """
+        Purpose: To verify that the search finds the newest entry of an
+        index that wrapped around after its first sector was reclaimed.
+        """
+        slots = flash_actions.INDEX_SLOTS
+        per_sector = index_table.SLOTS_PER_SECTOR
+        for slot in list(range(per_sector, slots)) + list(range(100)):
+            start = config.DATA_1ST + self.count * IMAGE_SIZE
+            self.flash.write_bytes(
+                config.INDEX_1ST + slot * flash_actions.INDEX_ENTRY_SIZE,
+                flash_actions.create_index_entry(start, start + IMAGE_SIZE),
+            )
+            self.count += 1
+
+        result, _ = self._mount()
+
+        self.assertEqual(
+            result,
+            (
+                config.INDEX_1ST + 100 * flash_actions.INDEX_ENTRY_SIZE,
+                config.DATA_1ST + self.count * IMAGE_SIZE,
+            ),
+        )
+        self.assertEqual(result, flash_actions.find_next_available_address(self.flash))
+        self.assertEqual(CheckpointStore(self.flash).load().used_slots, self.count)
+
+
+if __name__ == '__main__':
+    unittest.main()
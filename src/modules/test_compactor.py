@@ -0,0 +1,122 @@
+"""
+This module contains unit tests for image deletion and data section garbage
+collection (flash_actions.delete_image and compactor).
+
+Purpose:
+- To verify that deleted images are reclaimed by the compactor, that live
+  images survive relocation intact, and that stores reuse the reclaimed
+  space once the data section is full.
+"""
+
+import os
+import unittest
+
+from . import config
+from . import flash_actions
+from .checkpoint import CheckpointStore
+from .compactor import Compactor
+from .erase_allocator import SECTOR_SIZE, EraseAheadAllocator, SectorState
+from .flash_interface import FlashMemory
+from .flash_sim import SimulatedFlashSpi
+from .image_integrity import IntegrityStatus
+from .index_table import IndexTable
+
+REGION_SECTORS = 64  # 256KB data section
+IMAGE_SIZE = 48 * 1024
+
+
+class TestCompactor(unittest.TestCase):
+    """
+    Test suite for deleting images and compacting a small data section.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi()
+        self.flash = FlashMemory(spi=self.spi)
+        self.allocator = EraseAheadAllocator(
+            self.flash,
+            end=config.DATA_1ST + REGION_SECTORS * SECTOR_SIZE,
+            ahead_sectors=REGION_SECTORS,
+        )
+        self.allocator.load(config.DATA_1ST)
+        self.table = IndexTable.from_flash(self.flash)
+        self.next_index, self.next_data = config.INDEX_1ST, config.DATA_1ST
+        self.images = [self.store() for _ in range(5)]
+
+    def tearDown(self):
+        self.flash.close()
+
+    def store(self) -> bytes:
+        """Store a new image where the allocator finds room."""
+        image = os.urandom(IMAGE_SIZE)
+        address = self.allocator.find_space(self.next_data, IMAGE_SIZE + 64)
+        self.assertIsNotNone(address)
+        self.next_index, self.next_data = flash_actions._store_image_to_flash(
+            self.flash, image, self.next_index, address, self.allocator, self.table
+        )
+        return image
+
+    def compact(self, compactor: Compactor) -> int:
+        steps = 0
+        while True:
+            moved = compactor.step(self.next_index, self.next_data)
+            if moved is None:
+                return steps
+            self.next_index, self.next_data = moved
+            steps += 1
+
+    def test_deleted_image_space_is_reused(self):
+        """
+        Purpose: To verify that once the section is full, deleting the
+        first two images and compacting makes room for a new store, and
+        every live image still verifies after being relocated. The
+        compactor's checkpoints count used slots, like mount and store.
+        """
+        self.assertIsNone(self.allocator.find_space(self.next_data, IMAGE_SIZE))
+
+        for number in range(2):
+            index_addr = config.INDEX_1ST + number * flash_actions.INDEX_ENTRY_SIZE
+            self.assertTrue(
+                flash_actions.delete_image(self.flash, index_addr, self.table)
+            )
+        checkpoints = CheckpointStore(self.flash)
+        compactor = Compactor(self.flash, self.allocator, self.table, checkpoints)
+        self.assertGreater(self.compact(compactor), 0)
+        self.assertGreater(compactor.images_relocated, 0)
+        # Same meaning as the checkpoints written by mount and store
+        self.assertEqual(checkpoints.latest.used_slots, len(self.table))
+
+        new_image = self.store()
+
+        results = flash_actions.verify_all(self.flash, self.table)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(status == IntegrityStatus.OK for _, status, _ in results))
+        stored = [
+            self.spi.peek(start, end - start)
+            for _, start, end in IndexTable.from_flash(self.flash)
+        ]
+        self.assertEqual(sorted(stored), sorted(self.images[2:] + [new_image]))
+
+    def test_large_images_are_not_relocated(self):
+        """
+        Purpose: To verify that with a relocation budget smaller than an
+        image only the wholly dead sectors are erased, nothing is copied,
+        and the compactor then goes idle.
+        """
+        self.assertTrue(
+            flash_actions.delete_image(self.flash, config.INDEX_1ST, self.table)
+        )
+        compactor = Compactor(self.flash, self.allocator, self.table, max_relocate=0)
+
+        self.compact(compactor)
+
+        self.assertEqual(compactor.images_relocated, 0)
+        self.assertEqual(
+            compactor.bytes_reclaimed, IMAGE_SIZE // SECTOR_SIZE * SECTOR_SIZE
+        )
+        self.assertEqual(self.allocator.states[0], SectorState.ERASED)
+        self.assertIsNone(compactor.step(self.next_index, self.next_data))
+
+
+if __name__ == '__main__':
+    unittest.main()
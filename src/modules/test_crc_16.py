@@ -0,0 +1,68 @@
+"""
+This module contains unit tests for the CRC-16 engine (crc_16).
+
+Purpose:
+- To verify that every CRC backend, and the incremental CRC16 object, give
+  the same results as the original table-driven algorithm.
+"""
+
+import os
+import unittest
+
+from . import crc_16
+
+
+class TestCRC16(unittest.TestCase):
+    """
+    Test suite for the CRC-16 backends and streaming API.
+    """
+
+    def tearDown(self):
+        crc_16.set_backend(crc_16.DEFAULT_BACKEND)
+
+    def test_backends_agree_on_random_data(self):
+        """
+        Purpose: To verify that the slice-by-8 and crc_hqx backends match the
+        original byte-at-a-time loop for every length modulo the slice width.
+        """
+        data = os.urandom(1000)
+        for length in range(0, 40):
+            expected = crc_16.BACKENDS["table"](data[:length], crc_16.CRC_INIT)
+            for name in ("slice8", "hqx"):
+                with self.subTest(backend=name, length=length):
+                    self.assertEqual(
+                        crc_16.BACKENDS[name](data[:length], crc_16.CRC_INIT),
+                        expected,
+                    )
+
+    def test_incremental_crc_matches_one_shot(self):
+        """
+        Purpose: To verify that feeding data in uneven pieces through
+        CRC16.update() gives the same CRC and digest as one crc16() call.
+        """
+        data = os.urandom(4096)
+        crc = crc_16.CRC16()
+        for start in range(0, len(data), 333):
+            crc.update(memoryview(data)[start : start + 333])
+
+        self.assertEqual(crc.value, crc_16.crc16(data))
+        self.assertEqual(crc.digest(), crc_16.crc16(data).to_bytes(2, "big"))
+
+    def test_frame_crc_is_the_same_with_every_backend(self):
+        """
+        Purpose: To verify that calculate_crc() gives the same frame CRC
+        whichever backend is selected, and that unknown backends are refused.
+        """
+        frame = bytes([0x3E, 0x41, 0x03, 0x01, 0x02, 0x03])
+        results = set()
+        for name in crc_16.BACKENDS:
+            crc_16.set_backend(name)
+            results.add(crc_16.calculate_crc(frame))
+        self.assertEqual(len(results), 1)
+
+        with self.assertRaises(ValueError):
+            crc_16.set_backend("crc32")
+
+
+if __name__ == '__main__':
+    unittest.main()
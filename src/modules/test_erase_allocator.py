@@ -0,0 +1,98 @@
+"""
+This module contains unit tests for the erase-ahead allocator
+(erase_allocator).
+
+Purpose:
+- To verify that data sectors are erased ahead of the write pointer during
+  idle steps, that stores then never erase on the critical path, and that
+  the sector states survive a restart, using the NOR flash simulator.
+"""
+
+import os
+import unittest
+
+from . import config
+from . import flash_actions
+from .erase_allocator import SECTOR_SIZE, EraseAheadAllocator, SectorState
+from .flash_interface import FlashMemory
+from .flash_sim import SimulatedFlashSpi
+
+AHEAD_SECTORS = 24
+
+
+class TestEraseAheadAllocator(unittest.TestCase):
+    """
+    Test suite for EraseAheadAllocator on a full-size simulated chip.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi()
+        self.flash = FlashMemory(spi=self.spi)
+        # Leftovers from an earlier pass over the data section
+        self.flash.write_bytes(config.DATA_1ST, os.urandom(40 * SECTOR_SIZE))
+        self.allocator = self.open_allocator()
+
+    def tearDown(self):
+        self.flash.close()
+
+    def open_allocator(self) -> EraseAheadAllocator:
+        allocator = EraseAheadAllocator(self.flash, ahead_sectors=AHEAD_SECTORS)
+        allocator.load(config.DATA_1ST)
+        return allocator
+
+    def fill_window(self) -> int:
+        steps = 0
+        while self.allocator.erase_step(config.DATA_1ST):
+            steps += 1
+        return steps
+
+    def test_idle_steps_fill_window_so_store_never_erases(self):
+        """
+        Purpose: To verify that idle steps erase the window in 64KB-bounded
+        steps and a store that fits in it issues no erase at all.
+        """
+        steps = self.fill_window()
+
+        self.assertLessEqual(steps, -(-AHEAD_SECTORS // 16) + 1)
+        self.assertEqual(self.allocator.erased_ahead(config.DATA_1ST), AHEAD_SECTORS)
+
+        erases_before = dict(self.spi.counters)
+        image = os.urandom(10 * SECTOR_SIZE)
+        flash_actions._store_image_to_flash(
+            self.flash, image, config.INDEX_1ST, config.DATA_1ST, self.allocator
+        )
+
+        for operation in ("erase_4kb", "erase_32kb", "erase_64kb"):
+            self.assertEqual(self.spi.counters[operation], erases_before[operation])
+        self.assertEqual(self.allocator.critical_erases, 0)
+        self.assertEqual(self.spi.peek(config.DATA_1ST, len(image)), image)
+
+    def test_states_survive_restart(self):
+        """
+        Purpose: To verify that erased and live sectors are restored from
+        the journal by a new allocator.
+        """
+        self.fill_window()
+        self.assertTrue(self.allocator.prepare(config.DATA_1ST, 3 * SECTOR_SIZE))
+
+        restarted = self.open_allocator()
+        self.assertEqual(restarted.states, self.allocator.states)
+        self.assertEqual(restarted.states[0], SectorState.LIVE)
+        self.assertEqual(restarted.states[3], SectorState.ERASED)
+
+    def test_prepare_refuses_live_sectors_and_erases_dirty_ones(self):
+        """
+        Purpose: To verify that a store over live data is refused, and a
+        store into dirty sectors erases them on the critical path.
+        """
+        self.assertTrue(self.allocator.prepare(config.DATA_1ST, 2 * SECTOR_SIZE))
+        self.assertFalse(self.allocator.prepare(config.DATA_1ST, SECTOR_SIZE))
+
+        address = config.DATA_1ST + 2 * SECTOR_SIZE
+        self.assertTrue(self.allocator.prepare(address, SECTOR_SIZE))
+        self.assertEqual(self.allocator.critical_erases, 2)
+        self.assertEqual(self.spi.peek(address, SECTOR_SIZE), b"\xff" * SECTOR_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+This module contains unit tests for the FlashMemory SPI interface.
+
+Purpose:
+- To verify the command sequences FlashMemory sends over SPI against a
+  scripted SPI device, without requiring the physical flash chip.
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+from .flash_interface import FlashMemory
+
+
+class ScriptedSpi:
+    """
+    SPI device that answers READ DATA and PAGE PROGRAM from a bytearray and
+    reports busy for `busy_reads` status reads after every program or erase.
+    """
+
+    def __init__(self, memory: bytes, busy_reads: int = 0):
+        self.memory = bytearray(memory)
+        self.transfers = []
+        self.programs = []
+        self.busy_reads = busy_reads
+        self._busy = 0
+        self.mode = 0
+        self.max_speed_hz = 0
+
+    def open(self, bus: int, device: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def xfer3(self, data) -> tuple:
+        data = bytes(data)
+        if data[0] == FlashMemory.CMD_READ_STATUS_REG1:
+            busy = self._busy > 0
+            self._busy -= busy
+            return (0, int(busy))
+
+        self.transfers.append(len(data))
+        assert data[0] == FlashMemory.CMD_READ_DATA_4B
+        address = int.from_bytes(data[1:5], "big")
+        return tuple(data[:5] + self.memory[address : address + len(data) - 5])
+
+    def xfer2(self, data: list) -> list:
+        # WREN and erase commands
+        if data[0] != FlashMemory.CMD_WRITE_ENABLE:
+            self._busy = self.busy_reads
+        return [0] * len(data)
+
+    def writebytes2(self, data) -> None:
+        data = bytes(data)
+        self.programs.append(len(data))
+        self._busy = self.busy_reads
+        assert data[0] == FlashMemory.CMD_PAGE_PROGRAM_4B
+        address = int.from_bytes(data[1:5], "big")
+        for offset, value in enumerate(data[5:]):
+            self.memory[address + offset] &= value
+
+
+class TestFlashMemoryRead(unittest.TestCase):
+    """
+    Test suite for FlashMemory bulk reads.
+    """
+
+    def setUp(self):
+        self.memory = os.urandom(64 * 1024)
+        self.spi = ScriptedSpi(self.memory)
+        self.flash = FlashMemory(spi=self.spi)
+
+    def test_readinto_splits_reads_to_the_driver_transfer_size(self):
+        """
+        Purpose: To verify that a read larger than the spidev buffer is split
+        into transfers of at most bufsiz bytes and lands intact in the
+        caller's buffer.
+        """
+        buffer = bytearray(20000)
+        read = self.flash.readinto(1234, memoryview(buffer))
+
+        self.assertEqual(read, len(buffer))
+        self.assertEqual(bytes(buffer), self.memory[1234 : 1234 + 20000])
+        self.assertLessEqual(max(self.spi.transfers), self.flash.max_transfer)
+        self.assertEqual(
+            len(self.spi.transfers), -(-20000 // self.flash.read_chunk_size)
+        )
+
+    def test_read_and_read_bytes_return_the_same_data(self):
+        """
+        Purpose: To verify that read() returns bytes and the legacy
+        read_bytes() still returns a list of ints with the same content.
+        """
+        self.assertEqual(self.flash.read(100, 8), self.memory[100:108])
+        self.assertEqual(self.flash.read_bytes(100, 8), list(self.memory[100:108]))
+
+
+
+class TestFlashMemoryWrite(unittest.TestCase):
+    """
+    Test suite for FlashMemory page programming.
+    """
+
+    def setUp(self):
+        self.spi = ScriptedSpi(bytes([0xFF]) * 4096)
+        self.flash = FlashMemory(spi=self.spi)
+
+    def test_write_bytes_programs_buffers_page_by_page(self):
+        """
+        Purpose: To verify that a bytes-like write is split at page
+        boundaries into commands of at most one page, and that the legacy
+        list-of-ints input still works.
+        """
+        data = bytes(i % 0xFF for i in range(600))  # no 0xFF bytes
+        self.assertTrue(self.flash.write_bytes(100, memoryview(data)))
+        self.assertTrue(self.flash.write_bytes(1000, [1, 2, 3]))
+
+        self.assertEqual(bytes(self.spi.memory[100:700]), data)
+        self.assertEqual(bytes(self.spi.memory[1000:1003]), b"\x01\x02\x03")
+        # 100..255, 256..511, 512..699, then the 3-byte list write
+        self.assertEqual(self.spi.programs, [5 + 156, 5 + 256, 5 + 188, 5 + 3])
+
+
+    def test_write_bytes_skips_blank_pages_and_trims_blank_runs(self):
+        """
+        Purpose: To verify that all-0xFF pages are not programmed and that
+        0xFF runs at the ends of a page are trimmed from the command.
+        """
+        data = b"\xff" * 256 + b"\xff" * 10 + b"\x00" * 20 + b"\xff" * 226
+        self.assertTrue(self.flash.write_bytes(0, data))
+
+        self.assertEqual(self.spi.programs, [5 + 20])
+        self.assertEqual(bytes(self.spi.memory[266:286]), b"\x00" * 20)
+        self.assertEqual(
+            self.flash.write_stats,
+            {"pages_programmed": 1, "pages_skipped": 1, "bytes_skipped": 492},
+        )
+
+
+class TestWipPolling(unittest.TestCase):
+    """
+    Test suite for the per-operation WIP polling profiles.
+    """
+
+    def setUp(self):
+        self.spi = ScriptedSpi(bytes([0xFF]) * 4096, busy_reads=5)
+        self.flash = FlashMemory(spi=self.spi)
+
+    def test_page_program_spins_without_sleeping(self):
+        """
+        Purpose: To verify that a page program is polled back to back and
+        that its status reads are counted in poll_stats.
+        """
+        with patch("modules.flash_interface.time.sleep") as sleep:
+            self.assertTrue(self.flash.write_bytes(0, b"\x00" * 10))
+
+        sleep.assert_not_called()
+        stats = self.flash.poll_stats["page_program"]
+        self.assertEqual((stats.operations, stats.polls), (1, 6))
+        self.assertIn("page_program", self.flash.poll_summary())
+
+    def test_sector_erase_backs_off_exponentially(self):
+        """
+        Purpose: To verify that a 4 KB erase first sleeps part of its typical
+        time, then doubles the interval between status reads up to the cap.
+        """
+        with patch("modules.flash_interface.time.sleep") as sleep:
+            self.assertTrue(self.flash.erase_sector(0, 4))
+
+        profile = FlashMemory.POLL_PROFILES["erase_4kb"]
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list],
+            [profile.initial_delay, 0.001, 0.002, 0.004, 0.008, 0.016],
+        )
+        self.assertEqual(self.flash.poll_stats["erase_4kb"].polls, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
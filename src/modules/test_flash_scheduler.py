@@ -0,0 +1,103 @@
+"""
+This module contains unit tests for the suspend-aware flash scheduler
+(flash_scheduler).
+
+Purpose:
+- To verify that a read issued during an erase is served between erase
+  suspend and resume, even when the suspend is acknowledged late, and that
+  the erase still completes.
+"""
+
+import threading
+import time
+import unittest
+
+from .flash_interface import FlashMemory
+from .flash_scheduler import FlashScheduler
+from .flash_sim import SimulatedFlashSpi
+
+SIM_SIZE = 1024 * 1024
+ERASE_TIME = 0.3  # seconds a 64KB erase keeps the simulated chip busy
+
+
+class TestEraseSuspend(unittest.TestCase):
+    """
+    Test suite for reads that arrive while an erase is in progress.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi(size=SIM_SIZE, timing={"erase_64kb": ERASE_TIME})
+        self.flash = FlashMemory(spi=self.spi)
+        self.flash.write_bytes(0, b"\x00" * 16)
+        self.flash.write_bytes(0x20000, b"image")
+
+    def tearDown(self):
+        self.flash.close()
+
+    def _read_during_erase(self, scheduler):
+        """Erase the first 64KB block in a thread and read while it runs."""
+        results = {}
+        eraser = threading.Thread(
+            target=lambda: results.update(erased=scheduler.erase_sector(0, 64))
+        )
+        eraser.start()
+        time.sleep(ERASE_TIME / 5)
+
+        start = time.monotonic()
+        results["data"] = scheduler.read(0x20000, 5)
+        results["latency"] = time.monotonic() - start
+        eraser.join()
+        return results
+
+    def test_read_suspends_erase(self):
+        """
+        Purpose: To verify that the read is served long before the erase
+        ends, through one suspend/resume, and that the block is erased.
+        """
+        scheduler = FlashScheduler(self.flash)
+        results = self._read_during_erase(scheduler)
+
+        self.assertEqual(results["data"], b"image")
+        self.assertLess(results["latency"], ERASE_TIME / 3)
+        self.assertTrue(results["erased"])
+        self.assertEqual(self.spi.peek(0, 16), b"\xff" * 16)
+        self.assertGreaterEqual(self.spi.counters["suspends"], 1)
+        self.assertEqual(self.spi.counters["suspends"], self.spi.counters["resumes"])
+        self.assertEqual(self.spi.counters["rejected_busy"], 0)
+        self.assertAlmostEqual(
+            scheduler.read_latency.max, results["latency"], delta=0.01
+        )
+
+    def test_read_waits_without_suspend(self):
+        """
+        Purpose: To verify that with suspend disabled the read waits for
+        the erase instead of reaching the busy chip.
+        """
+        scheduler = FlashScheduler(self.flash, suspend=False)
+        results = self._read_during_erase(scheduler)
+
+        self.assertEqual(results["data"], b"image")
+        self.assertGreater(results["latency"], ERASE_TIME / 2)
+        self.assertTrue(results["erased"])
+        self.assertEqual(self.spi.counters["suspends"], 0)
+        self.assertEqual(self.spi.counters["rejected_busy"], 0)
+
+    def test_late_suspend_is_awaited(self):
+        """
+        Purpose: To verify that a suspend acknowledged after SUSPEND_TIMEOUT
+        (e.g. the polling thread was preempted) still serves the read and
+        does not fail the erase.
+        """
+        self.spi.suspend_latency = FlashMemory.SUSPEND_TIMEOUT * 3
+        scheduler = FlashScheduler(self.flash)
+        results = self._read_during_erase(scheduler)
+
+        self.assertEqual(results["data"], b"image")
+        self.assertLess(results["latency"], ERASE_TIME / 3)
+        self.assertTrue(results["erased"])
+        self.assertEqual(self.spi.peek(0, 16), b"\xff" * 16)
+        self.assertEqual(self.spi.counters["suspends"], self.spi.counters["resumes"])
+
+
+if __name__ == '__main__':
+    unittest.main()
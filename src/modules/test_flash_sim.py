@@ -0,0 +1,224 @@
+"""
+This module contains unit tests for the NOR flash simulator (flash_sim).
+
+Purpose:
+- To verify that the simulator honours NOR flash semantics, and that the
+  storage and recovery paths run against it through FlashMemory unchanged.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from . import config
+from . import flash_actions
+from . import image_integrity
+from . import recover_images
+from .flash_interface import FlashMemory
+from .flash_sim import FaultPlan, FlashSimError, SimulatedFlashSpi
+
+SIM_SIZE = 1024 * 1024
+
+
+class TestNorSemantics(unittest.TestCase):
+    """
+    Test suite for the simulated chip's program and erase behaviour.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi(size=SIM_SIZE)
+        self.flash = FlashMemory(spi=self.spi)
+
+    def tearDown(self):
+        self.flash.close()
+
+    def test_program_only_clears_bits_until_erased(self):
+        """
+        Purpose: To verify that a second program ANDs into the stored data,
+        and that an erase restores the whole aligned sector to 0xFF.
+        """
+        self.assertEqual(self.flash.read(0x1000, 2), b"\xff\xff")
+        self.flash.write_bytes(0x1000, b"\xf0\x0f")
+        self.flash.write_bytes(0x1000, b"\x3c\xff")
+        self.assertEqual(self.flash.read(0x1000, 2), b"\x30\x0f")
+
+        self.assertTrue(self.flash.erase_sector(0x1FFF, 4))
+        self.assertEqual(self.spi.peek(0x1000, 0x1000), b"\xff" * 0x1000)
+
+    def test_page_program_wraps_inside_its_page(self):
+        """
+        Purpose: To verify that a raw page program running past the page end
+        wraps to the start of the same page, as on the real chip.
+        """
+        self.spi.xfer2([FlashMemory.CMD_WRITE_ENABLE])
+        command = bytes([FlashMemory.CMD_PAGE_PROGRAM_4B]) + (0x2F0).to_bytes(4, "big")
+        self.spi.writebytes2(command + bytes(range(32)))
+
+        self.assertEqual(self.spi.peek(0x2F0, 16), bytes(range(16)))
+        self.assertEqual(self.spi.peek(0x200, 16), bytes(range(16, 32)))
+        self.assertEqual(self.spi.peek(0x300, 1), b"\xff")
+
+    def test_program_and_erase_need_write_enable(self):
+        """
+        Purpose: To verify that commands without a preceding WREN are
+        ignored and counted.
+        """
+        command = bytes([FlashMemory.CMD_PAGE_PROGRAM_4B]) + bytes(4)
+        self.spi.writebytes2(command + b"\x00")
+
+        self.assertEqual(self.spi.peek(0, 1), b"\xff")
+        self.assertEqual(self.spi.counters["rejected_not_enabled"], 1)
+
+    def test_transfer_larger_than_bufsiz_is_rejected(self):
+        """
+        Purpose: To verify that a transfer spidev would split (releasing
+        chip select mid-command) is reported instead of silently torn.
+        """
+        command = bytes([FlashMemory.CMD_READ_DATA_4B]) + bytes(4)
+        with self.assertRaises(FlashSimError):
+            self.spi.xfer3(command + bytes(self.spi.bufsiz))
+
+    def test_timing_model_holds_wip(self):
+        """
+        Purpose: To verify that with timing enabled an erase keeps WIP set
+        for its (scaled) duration and FlashMemory waits it out.
+        """
+        spi = SimulatedFlashSpi(
+            size=SIM_SIZE, timing={"erase_4kb": 0.05}, time_scale=1.0
+        )
+        flash = FlashMemory(spi=spi)
+        start = time.monotonic()
+        self.assertTrue(flash.erase_sector(0, 4))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertGreater(flash.poll_stats["erase_4kb"].polls, 1)
+        flash.close()
+
+
+class TestEraseRange(unittest.TestCase):
+    """
+    Test suite for FlashMemory.erase_range planning on the simulator.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi(size=SIM_SIZE)
+        self.flash = FlashMemory(spi=self.spi)
+
+    def tearDown(self):
+        self.flash.close()
+
+    def test_plan_prefers_large_blocks_and_die_erase(self):
+        """
+        Purpose: To verify that fully dirty regions use the largest aligned
+        erases, down to 4KB at unaligned edges, and a whole die uses die erase.
+        """
+        kb = 1024
+        self.assertEqual(
+            self.flash.plan_erase(60 * kb, 200 * kb),
+            [
+                (60 * kb, 4 * kb),
+                (64 * kb, 64 * kb),
+                (128 * kb, 64 * kb),
+                (192 * kb, 4 * kb),
+                (196 * kb, 4 * kb),
+            ],
+        )
+        self.assertEqual(
+            self.flash.plan_erase(0, FlashMemory.DIE_SIZE),
+            [(0, FlashMemory.DIE_SIZE)],
+        )
+
+    def test_erase_range_skips_blank_sectors(self):
+        """
+        Purpose: To verify that only dirty sectors are erased, with the
+        cheapest erase for each cluster, and that data outside the range
+        survives.
+        """
+        kb = 1024
+        # One lone dirty sector, and a 64KB block with three dirty sectors
+        for address in (4 * kb, 64 * kb, 72 * kb, 100 * kb, 256 * kb):
+            self.flash.write_bytes(address, b"\x00")
+
+        self.assertTrue(self.flash.erase_range(0, 256 * kb))
+
+        self.assertEqual(self.spi.peek(0, 256 * kb), b"\xff" * (256 * kb))
+        self.assertEqual(self.spi.peek(256 * kb, 1), b"\x00")
+        self.assertEqual(
+            (self.spi.counters["erase_4kb"], self.spi.counters["erase_64kb"]),
+            (1, 1),
+        )
+
+
+class TestStoragePaths(unittest.TestCase):
+    """
+    Test suite for flash_actions and recover_images on the simulator.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "flash.img")
+        self.flash = FlashMemory(spi=SimulatedFlashSpi(self.path, size=SIM_SIZE))
+        self.image = os.urandom(3 * image_integrity.DEFAULT_BLOCK_SIZE + 100)
+
+    def tearDown(self):
+        self.flash.close()
+        self.directory.cleanup()
+
+    def test_store_persists_and_recovers(self):
+        """
+        Purpose: To verify that an image stored through flash_actions is
+        found again after reopening the backing file and is recovered
+        intact by recover_images.
+        """
+        self.assertEqual(
+            flash_actions._store_image_to_flash(
+                self.flash, self.image, config.INDEX_1ST, config.DATA_1ST
+            )[0],
+            config.INDEX_1ST + flash_actions.INDEX_ENTRY_SIZE,
+        )
+        self.flash.close()
+
+        self.flash = FlashMemory(spi=SimulatedFlashSpi(self.path, size=SIM_SIZE))
+        next_index, _ = flash_actions.find_next_available_address(self.flash)
+        self.assertEqual(next_index, config.INDEX_1ST + flash_actions.INDEX_ENTRY_SIZE)
+
+        recovery_dir = Path(self.directory.name) / "recovered"
+        recovery_dir.mkdir()
+        self.assertEqual(
+            recover_images.scan_and_recover_images(self.flash, recovery_dir), (1, 1)
+        )
+        (recovered,) = recovery_dir.iterdir()
+        self.assertEqual(recovered.read_bytes(), self.image)
+
+    def test_faults_are_deterministic_and_detected(self):
+        """
+        Purpose: To verify that the same fault plan corrupts the same data
+        on every run, and that the integrity trailer catches it.
+        """
+        results = []
+        for _ in range(2):
+            spi = SimulatedFlashSpi(
+                size=SIM_SIZE, faults=FaultPlan(seed=7, program_error_rate=0.05)
+            )
+            flash = FlashMemory(spi=spi)
+            flash_actions._store_image_to_flash(
+                flash, self.image, config.INDEX_1ST, config.DATA_1ST
+            )
+            results.append(
+                (
+                    spi.peek(config.DATA_1ST, len(self.image)),
+                    image_integrity.verify_image(
+                        flash, config.DATA_1ST, config.DATA_1ST + len(self.image)
+                    )[0],
+                )
+            )
+            flash.close()
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][1], image_integrity.IntegrityStatus.CORRUPT)
+
+
+if __name__ == '__main__':
+    unittest.main()
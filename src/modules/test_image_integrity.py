@@ -0,0 +1,104 @@
+"""
+This module contains unit tests for image integrity checksums
+(image_integrity and the flash_actions storage path).
+
+Purpose:
+- To verify that images are stored with a trailer that detects corruption
+  down to the 4 KB block, without requiring the physical flash chip.
+"""
+
+import os
+import unittest
+
+from . import config
+from . import flash_actions
+from . import image_integrity
+from .image_integrity import IntegrityStatus
+
+FAKE_FLASH_SIZE = 1024 * 1024
+
+
+class FakeFlash:
+    """Erased, byte-addressable stand-in for FlashMemory."""
+
+    def __init__(self):
+        self.memory = bytearray([0xFF]) * FAKE_FLASH_SIZE
+
+    def read(self, address: int, length: int) -> bytes:
+        return bytes(self.memory[address : address + length])
+
+    def read_bytes(self, address: int, length: int) -> list:
+        return list(self.read(address, length))
+
+    def write_bytes(self, address: int, data: list) -> bool:
+        self.memory[address : address + len(data)] = bytes(data)
+        return True
+
+
+class TestImageIntegrity(unittest.TestCase):
+    """
+    Test suite for stored image checksums and verification.
+    """
+
+    def setUp(self):
+        self.flash = FakeFlash()
+        self.image = os.urandom(3 * image_integrity.DEFAULT_BLOCK_SIZE + 100)
+        self.next_index, self.next_data = flash_actions._store_image_to_flash(
+            self.flash, self.image, config.INDEX_1ST, config.DATA_1ST
+        )
+
+    def test_stored_image_verifies_and_next_address_skips_trailer(self):
+        """
+        Purpose: To verify that a freshly stored image verifies, and that the
+        next free data address starts after the image's trailer.
+        """
+        self.assertEqual(
+            image_integrity.verify_image(
+                self.flash, config.DATA_1ST, config.DATA_1ST + len(self.image)
+            ),
+            (IntegrityStatus.OK, []),
+        )
+        self.assertEqual(
+            self.next_data,
+            config.DATA_1ST
+            + len(self.image)
+            + image_integrity.trailer_size(len(self.image)),
+        )
+        self.assertEqual(
+            flash_actions.find_next_available_address(self.flash),
+            (self.next_index, self.next_data),
+        )
+
+    def test_bit_flip_is_located_to_its_block(self):
+        """
+        Purpose: To verify that a single flipped bit is reported as corrupt in
+        exactly the 4 KB block that holds it.
+        """
+        self.flash.memory[config.DATA_1ST + 2 * 4096 + 7] ^= 0x10
+
+        results = flash_actions.verify_all(self.flash)
+
+        self.assertEqual(results, [(config.INDEX_1ST, IntegrityStatus.CORRUPT, [2])])
+
+    def test_legacy_image_without_trailer_is_unverifiable(self):
+        """
+        Purpose: To verify that an image stored before trailers existed is
+        reported as having no trailer rather than as corrupt.
+        """
+        legacy = FakeFlash()
+        legacy.write_bytes(config.DATA_1ST, list(self.image))
+        legacy.write_bytes(
+            config.INDEX_1ST,
+            flash_actions.create_index_entry(
+                config.DATA_1ST, config.DATA_1ST + len(self.image)
+            ),
+        )
+
+        self.assertEqual(
+            flash_actions.verify_all(legacy),
+            [(config.INDEX_1ST, IntegrityStatus.NO_TRAILER, [])],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""
+This module contains unit tests for the index slot records (index_records).
+
+Purpose:
+- To verify that images can be selected by class and capture time from the
+  in-RAM records alone, and that slots without a committed, matching record
+  are read as legacy 8-byte entries.
+"""
+
+import os
+import unittest
+
+from . import config
+from . import flash_actions
+from .flash_interface import FlashMemory
+from .flash_sim import SimulatedFlashSpi
+from .index_records import (
+    FLAGS_OFFSET,
+    IndexRecord,
+    RecordTable,
+    read_record,
+    record_address,
+    write_record,
+)
+from .index_table import IndexTable
+
+IMAGE_SIZE = 0x1000
+
+
+class TestIndexRecords(unittest.TestCase):
+    """
+    Test suite for writing, reading and querying index records.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi()
+        self.flash = FlashMemory(spi=self.spi)
+        self.table = IndexTable.from_flash(self.flash)
+        self.next_index, self.next_data = config.INDEX_1ST, config.DATA_1ST
+
+    def tearDown(self):
+        self.flash.close()
+
+    def store(self, record=None) -> None:
+        self.next_index, self.next_data = flash_actions._store_image_to_flash(
+            self.flash,
+            os.urandom(IMAGE_SIZE),
+            self.next_index,
+            self.next_data,
+            table=self.table,
+            record=record,
+        )
+
+    def test_select_from_ram(self):
+        """
+        Purpose: To verify that class and time queries match the stored
+        records without any flash read once synced, and skip deleted images.
+        """
+        captures = [("Sky", 1000), ("Forests", 1010), ("Sky", 1020), ("Sky", 1030)]
+        for classification, timestamp in captures:
+            self.store(IndexRecord(0, 0, classification, 87, timestamp))
+        self.assertTrue(
+            flash_actions.delete_image(
+                self.flash, config.INDEX_1ST + 3 * flash_actions.INDEX_ENTRY_SIZE
+            )
+        )
+        self.table = IndexTable.from_flash(self.flash)
+        records = RecordTable(self.flash, self.table)
+        self.assertEqual(records.sync(), 4)
+        reads = self.spi.counters["reads"]
+
+        matches = records.select("Sky", since=1010)
+
+        self.assertEqual(self.spi.counters["reads"], reads)
+        self.assertEqual(
+            [(address, record.timestamp) for address, record in matches],
+            [(config.INDEX_1ST + 2 * flash_actions.INDEX_ENTRY_SIZE, 1020)],
+        )
+        self.assertEqual(matches[0][1].confidence, 87)
+        self.assertEqual(len(records.select()), 3)
+        self.assertTrue(records[3].deleted)
+
+    def test_legacy_entries(self):
+        """
+        Purpose: To verify that an entry without a record, an uncommitted
+        record, a corrupt record and a record for other addresses all read
+        as legacy entries with only their addresses known.
+        """
+        for _ in range(5):
+            self.store()
+        self.flash.write_bytes(
+            record_address(1), IndexRecord(*self.table[1], "Sky").encode()
+        )
+        corrupt = bytearray(IndexRecord(*self.table[2], "Sky").encode())
+        corrupt[24] = 0x00
+        self.flash.write_bytes(record_address(2), bytes(corrupt))
+        self.flash.write_bytes(record_address(2) + FLAGS_OFFSET, b"\xfe")
+        write_record(self.flash, 3, IndexRecord(0x1234, 0x5678, "Sky"))
+        write_record(self.flash, 4, IndexRecord(*self.table[4], "Sky"))
+
+        records = [read_record(self.flash, n, *self.table[n]) for n in range(5)]
+
+        self.assertEqual(
+            [record.legacy for record in records], [True, True, True, True, False]
+        )
+        self.assertEqual(
+            (records[0].classification, records[0].origin, records[0].start_addr),
+            (None, 0, self.table[0][0]),
+        )
+        self.assertEqual(records[4].classification, "Sky")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+This module contains unit tests for the in-RAM index table (index_table).
+
+Purpose:
+- To verify that the Index Section is loaded with a handful of bulk
+  transfers and that the table stays in step with flash across stores,
+  including stores past its capacity that reclaim the oldest sector.
+"""
+
+import os
+import unittest
+
+from . import config
+from . import flash_actions
+from . import image_integrity
+from .flash_interface import FlashMemory
+from .flash_sim import SimulatedFlashSpi
+from .index_records import IndexRecord, RecordTable
+from .index_table import SLOTS_PER_SECTOR, IndexTable, IndexTableError
+
+SIM_SIZE = 1024 * 1024
+FULL_SIM_SIZE = 128 * 1024 * 1024  # reaches the index records in META
+
+
+class TestIndexTable(unittest.TestCase):
+    """
+    Test suite for loading and updating the index table.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi(size=SIM_SIZE)
+        self.flash = FlashMemory(spi=self.spi)
+        self.image = os.urandom(image_integrity.DEFAULT_BLOCK_SIZE + 100)
+
+    def tearDown(self):
+        self.flash.close()
+
+    def test_load_uses_bulk_reads(self):
+        """
+        Purpose: To verify that loading the full 12 KB section costs a few
+        bufsiz-sized reads, not one transaction per entry.
+        """
+        for number in range(3):
+            self.flash.write_bytes(
+                config.INDEX_1ST + number * 8,
+                flash_actions.create_index_entry(0x3000 * number, 0x3000 * number + 1),
+            )
+        reads = self.spi.counters["reads"]
+
+        table = IndexTable.from_flash(self.flash)
+
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table[2], (0x6000, 0x6001))
+        self.assertLessEqual(self.spi.counters["reads"] - reads, 4)
+        self.assertEqual(table.next_index_addr, config.INDEX_1ST + 3 * 8)
+
+    def test_stores_update_the_shared_table(self):
+        """
+        Purpose: To verify that stores append to the table, that it matches a
+        fresh load, and that find_next_available_address agrees with the
+        per-call scan.
+        """
+        table = IndexTable.from_flash(self.flash)
+        next_index, next_data = config.INDEX_1ST, config.DATA_1ST
+        for _ in range(2):
+            next_index, next_data = flash_actions._store_image_to_flash(
+                self.flash, self.image, next_index, next_data, table=table
+            )
+
+        self.assertEqual(list(table), list(IndexTable.from_flash(self.flash)))
+        self.assertEqual(
+            flash_actions.find_next_available_address(self.flash, table),
+            (next_index, next_data),
+        )
+        self.assertEqual(
+            flash_actions.find_next_available_address(self.flash),
+            (next_index, next_data),
+        )
+
+    def test_full_table(self):
+        """
+        Purpose: To verify that a full section has no free slot and refuses
+        further entries.
+        """
+        table = IndexTable(config.INDEX_1ST, config.INDEX_1ST + 16)
+        table.append(1, 2)
+        table.append(3, 4)
+
+        self.assertIsNone(table.next_index_addr)
+        with self.assertRaises(IndexTableError):
+            table.append(5, 6)
+
+    def test_stores_past_capacity_reclaim_the_oldest_sector(self):
+        """
+        Purpose: To verify that a two-sector index keeps taking images well
+        past its capacity, moving the live images out of the oldest sector,
+        and that a reload finds the same run with the sequence numbers
+        (image ages) restored from the records.
+        """
+        self.flash.close()
+        self.spi = SimulatedFlashSpi(size=FULL_SIM_SIZE)
+        self.flash = FlashMemory(spi=self.spi)
+        end = config.INDEX_1ST + 2 * SLOTS_PER_SECTOR * 8
+        table = IndexTable(config.INDEX_1ST, end)
+        image = os.urandom(16)
+        next_data, stored, keep = config.DATA_1ST, [], 200
+
+        for _ in range(3 * table.capacity):
+            next_index = flash_actions.make_index_room(self.flash, table)
+            self.assertIsNotNone(next_index)
+            start = next_data
+            _, next_data = flash_actions._store_image_to_flash(
+                self.flash,
+                image,
+                next_index,
+                next_data,
+                table=table,
+                record=IndexRecord(0, 0),
+            )
+            stored.append(start)
+            if table.image_count > keep:
+                oldest = next(
+                    number
+                    for number in range(len(table))
+                    if not table.is_deleted(number)
+                )
+                self.assertTrue(
+                    flash_actions.delete_image(
+                        self.flash, table.address_of(oldest), table
+                    )
+                )
+
+        self.assertNotEqual(table.first, 0)
+        self.assertEqual([start for _, start, _ in table], stored[-keep:])
+        reloaded = IndexTable.from_flash(self.flash, config.INDEX_1ST, end)
+        self.assertEqual(list(reloaded), list(table))
+        self.assertEqual((reloaded.first, len(reloaded)), (table.first, len(table)))
+
+        # Moved entries use up sequence numbers too, but keep their origin
+        records = RecordTable(self.flash, reloaded).select()
+        origins = [record.origin for _, record in records]
+        self.assertEqual(len(origins), keep)
+        self.assertEqual(origins, sorted(set(origins)))
+        self.assertGreater(origins[0], 2 * table.capacity)
+        self.assertEqual(origins[-1], table.next_sequence - 1)
+        self.assertEqual(reloaded.next_sequence, table.next_sequence)
+        self.assertEqual(
+            flash_actions.find_next_available_address(self.flash, reloaded),
+            (table.next_index_addr, next_data),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+This module contains tests for the pty-based PIC emulator (pic_emulator).
+
+Purpose:
+- To verify that the emulator drives the real UART stack end to end and that
+  every frame kind gets its expected ACK or NACK.
+"""
+
+import unittest
+
+from . import config
+from .pic_emulator import PICEmulator, parse_mix
+
+
+class TestPICEmulator(unittest.TestCase):
+    """
+    Test suite for the PIC emulator.
+    """
+
+    def setUp(self):
+        self.original_port = config.UART_PORT
+
+    def tearDown(self):
+        config.UART_PORT = self.original_port
+
+    def test_parse_mix_rejects_unknown_kind(self):
+        """
+        Purpose: To verify that a typo in the frame mix is reported instead of
+        silently sending nothing of that kind.
+        """
+        self.assertEqual(parse_mix("valid=3,burst=1")["burst"], 1)
+        with self.assertRaises(ValueError):
+            parse_mix("valid=1,garbled=2")
+
+    def test_short_run_answers_every_frame(self):
+        """
+        Purpose: To verify that a short mixed run over the pty gets an ACK for
+        every good frame and a NACK for every corrupted one, with no loss.
+        """
+        emulator = PICEmulator(rate=100, burst_size=4, seed=1)
+        emulator.start()
+        try:
+            report = emulator.run(0.5)
+        finally:
+            emulator.stop()
+
+        self.assertIsNone(report.icu_error)
+        self.assertGreater(report.frames_sent, 0)
+        self.assertEqual(report.acks, report.expected_acks)
+        self.assertEqual(report.nacks, report.expected_nacks)
+        self.assertEqual(report.lost, 0)
+        self.assertEqual(report.unmatched_acks, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
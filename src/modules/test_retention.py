@@ -0,0 +1,144 @@
+"""
+This module contains unit tests for priority-aware retention (retention and
+flash_actions.evict_for_space).
+
+Purpose:
+- To verify that a full data section makes room for a new image by evicting
+  the lowest-priority images, merging their sectors into one erased run, and
+  that images worth more than the new one are never evicted.
+"""
+
+import os
+import unittest
+
+from . import config
+from . import flash_actions
+from . import retention
+from .index_records import IndexRecord, RecordTable
+from .erase_allocator import SECTOR_SIZE, EraseAheadAllocator
+from .flash_interface import FlashMemory
+from .flash_sim import SimulatedFlashSpi
+from .image_integrity import IntegrityStatus
+from .index_table import IndexTable
+
+REGION_SECTORS = 64  # 256KB data section
+IMAGE_SIZE = 48 * 1024
+STORED_SIZE = IMAGE_SIZE + 64
+
+
+class TestRetention(unittest.TestCase):
+    """
+    Test suite for evicting images from a full data section.
+    """
+
+    def setUp(self):
+        self.spi = SimulatedFlashSpi()
+        self.flash = FlashMemory(spi=self.spi)
+        self.allocator = EraseAheadAllocator(
+            self.flash,
+            end=config.DATA_1ST + REGION_SECTORS * SECTOR_SIZE,
+            ahead_sectors=REGION_SECTORS,
+        )
+        self.allocator.load(config.DATA_1ST)
+        self.table = IndexTable.from_flash(self.flash)
+        self.records = RecordTable(self.flash, self.table)
+        self.heap = retention.RetentionHeap(self.records)
+        self.next_index, self.next_data = config.INDEX_1ST, config.DATA_1ST
+
+    def tearDown(self):
+        self.flash.close()
+
+    def store(self, priority: int, address: int) -> bytes:
+        image = os.urandom(IMAGE_SIZE)
+        self.next_index, self.next_data = flash_actions._store_image_to_flash(
+            self.flash,
+            image,
+            self.next_index,
+            address,
+            self.allocator,
+            self.table,
+            IndexRecord(0, 0, priority=priority),
+        )
+        return image
+
+    def fill(self, priorities):
+        images = []
+        for priority in priorities:
+            address = self.allocator.find_space(self.next_data, STORED_SIZE)
+            self.assertIsNotNone(address)
+            images.append(self.store(priority, address))
+        self.assertIsNone(self.allocator.find_space(self.next_data, STORED_SIZE))
+        return images
+
+    def evict(self, priority: int):
+        return flash_actions.evict_for_space(
+            self.flash,
+            self.heap,
+            self.allocator,
+            self.next_data,
+            STORED_SIZE,
+            priority,
+        )
+
+    def test_lowest_priority_images_are_evicted(self):
+        """
+        Purpose: To verify that the two adjacent low-priority images are
+        evicted (not the older high-priority one), that their sectors merge
+        into room for a new image, and that survivors are intact.
+        """
+        sky = config.CLASS_PRIORITIES["Sky"]
+        forests = config.CLASS_PRIORITIES["Forests"]
+        images = self.fill([forests, sky, sky, forests, forests])
+
+        address = self.evict(retention.priority_score("Plains"))
+
+        self.assertIsNotNone(address)
+        self.assertEqual(
+            [self.table.is_deleted(number) for number in range(5)],
+            [False, True, True, False, False],
+        )
+        new_image = self.store(retention.priority_score("Plains"), address)
+        results = flash_actions.verify_all(self.flash, self.table)
+        self.assertTrue(all(status == IntegrityStatus.OK for _, status, _ in results))
+        stored = [self.spi.peek(start, end - start) for _, start, end in self.table]
+        self.assertEqual(stored, [images[0], images[3], images[4], new_image])
+
+    def test_more_valuable_images_are_kept(self):
+        """
+        Purpose: To verify that a new image worth less than every stored one
+        evicts nothing, and that the priorities are read back from the
+        index records.
+        """
+        forests = config.CLASS_PRIORITIES["Forests"]
+        self.fill([forests] * 5)
+
+        self.assertIsNone(self.evict(retention.priority_score("Sky")))
+        self.assertEqual(self.table.deleted_count, 0)
+
+        record = self.records[3]
+        self.assertEqual((record.priority, record.origin), (forests, 3))
+
+    def test_scattered_victims_are_not_evicted(self):
+        """
+        Purpose: To verify that low-priority images that are not adjacent,
+        and so cannot free a long enough run together, are not evicted at
+        all, and that they remain the next victims.
+        """
+        sky = config.CLASS_PRIORITIES["Sky"]
+        forests = config.CLASS_PRIORITIES["Forests"]
+        self.fill([sky, forests, sky, forests, forests])
+        states = bytes(self.allocator.states)
+
+        self.assertIsNone(self.evict(retention.priority_score("Plains")))
+        self.assertEqual(self.table.deleted_count, 0)
+        self.assertEqual(bytes(self.allocator.states), states)
+
+        self.assertIsNotNone(self.evict(retention.MAX_PRIORITY))
+        self.assertEqual(
+            [self.table.is_deleted(number) for number in range(5)],
+            [True, True, True, False, False],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+This module contains unit tests for the RingBuffer class.
+
+Purpose:
+- To verify wrap-around, overflow accounting and the readinto/peek/consume
+  API used between the UART listener thread and the frame parser.
+"""
+
+import threading
+import unittest
+
+from .ring_buffer import RingBuffer
+
+
+class TestRingBuffer(unittest.TestCase):
+    """
+    Test suite for the RingBuffer class.
+    """
+
+    def setUp(self):
+        """Set up a small ring buffer for each test."""
+        self.ring = RingBuffer(8)
+
+    def test_write_and_readinto_across_wrap(self):
+        """
+        Purpose: To verify that data written across the end of the storage
+        comes back out in order.
+        """
+        self.ring.write(b"abcdef")
+        self.assertEqual(self.ring.consume(4), 4)
+        self.ring.write(b"ghijk")
+
+        target = bytearray(16)
+        count = self.ring.readinto(memoryview(target))
+
+        self.assertEqual(target[:count], b"efghijk")
+        self.assertEqual(len(self.ring), 0)
+
+    def test_peek_does_not_remove_data(self):
+        """
+        Purpose: To verify that peek returns data without consuming it.
+        """
+        self.ring.write(b"\x3e\x32\x00")
+        self.assertEqual(self.ring.peek(2), b"\x3e\x32")
+        self.assertEqual(len(self.ring), 3)
+        self.assertEqual(self.ring.read(), b"\x3e\x32\x00")
+
+    def test_overflow_and_high_water_mark_are_tracked(self):
+        """
+        Purpose: To verify that bytes beyond the capacity are dropped and
+        counted, and that the largest backlog is remembered.
+        """
+        self.assertEqual(self.ring.write(b"0123456789"), 8)
+        self.ring.clear()
+        self.ring.write(b"ab")
+
+        stats = self.ring.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["high_water_mark"], 8)
+        self.assertEqual(stats["overflow_bytes"], 2)
+        self.assertEqual(stats["overflow_events"], 1)
+
+    def test_wait_for_data_wakes_on_write(self):
+        """
+        Purpose: To verify that a waiting consumer is woken by a write from
+        another thread, and that an empty buffer times out.
+        """
+        self.assertFalse(self.ring.wait_for_data(timeout=0.01))
+
+        timer = threading.Timer(0.01, self.ring.write, args=(b"x",))
+        timer.start()
+        self.assertTrue(self.ring.wait_for_data(timeout=2.0))
+        timer.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
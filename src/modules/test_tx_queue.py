@@ -0,0 +1,78 @@
+"""
+This module contains unit tests for the TxQueue class.
+
+Purpose:
+- To verify that ACK/NACK frames jump ahead of bulk data, that small writes
+  are coalesced, and that the bulk lane applies backpressure.
+"""
+
+import unittest
+
+from .tx_queue import TxPriority, TxQueue
+
+
+class TestTxQueue(unittest.TestCase):
+    """
+    Test suite for the TxQueue class.
+    """
+
+    def setUp(self):
+        """Set up a small TX queue for each test."""
+        self.queue = TxQueue(max_bulk_bytes=16, max_control_items=2, coalesce_max=12)
+
+    def test_control_frames_jump_ahead_of_bulk(self):
+        """
+        Purpose: To verify that CONTROL items queued after BULK items are
+        written first.
+        """
+        self.queue.put(b"STATUS", TxPriority.BULK)
+        self.queue.put(b"ACK", TxPriority.CONTROL)
+
+        self.assertEqual(self.queue.get_batch(), b"ACKSTATUS")
+
+    def test_small_writes_are_coalesced_up_to_the_limit(self):
+        """
+        Purpose: To verify that batches stop at coalesce_max and that an
+        oversized item still goes out on its own.
+        """
+        for item in (b"aaaa", b"bbbb", b"cccc", b"dddd"):
+            self.queue.put(item)
+
+        self.assertEqual(self.queue.get_batch(), b"aaaabbbbcccc")
+        self.queue.batch_done(12)
+        self.assertEqual(self.queue.get_batch(), b"dddd")
+        self.queue.batch_done(4)
+
+        self.queue.put(b"x" * 14)
+        self.assertEqual(self.queue.get_batch(), b"x" * 14)
+
+    def test_backpressure_drops_and_counts_bulk_bytes(self):
+        """
+        Purpose: To verify that a full bulk lane rejects new data after the
+        timeout and that queued, sent and dropped bytes are counted.
+        """
+        self.assertTrue(self.queue.put(b"0123456789"))
+        self.assertFalse(self.queue.put(b"0123456789", timeout=0.01))
+        self.assertTrue(self.queue.put(b"A1", TxPriority.CONTROL))
+        self.assertTrue(self.queue.put(b"A2", TxPriority.CONTROL))
+        self.assertFalse(self.queue.put(b"A3", TxPriority.CONTROL))
+
+        self.queue.batch_done(len(self.queue.get_batch()))
+
+        stats = self.queue.stats()
+        self.assertEqual(stats["queued_bytes"], 14)
+        self.assertEqual(stats["sent_bytes"], 4)
+        self.assertEqual(stats["dropped_bytes"], 12)
+        self.assertEqual(stats["pending_bytes"], 10)
+
+    def test_close_wakes_the_writer(self):
+        """
+        Purpose: To verify that closing an empty queue ends get_batch().
+        """
+        self.queue.close()
+        self.assertIsNone(self.queue.get_batch())
+        self.assertFalse(self.queue.put(b"late"))
+
+
+if __name__ == '__main__':
+    unittest.main()
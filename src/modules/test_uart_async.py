@@ -0,0 +1,130 @@
+"""
+This module contains tests for the asyncio PIC link (uart_async).
+
+Purpose:
+- To verify the asyncio transport and AsyncUARTProtocol end to end against a
+  pseudo-terminal pair, without requiring physical hardware.
+"""
+
+import asyncio
+import os
+import select
+import tty
+import unittest
+from unittest import mock
+
+from . import crc_16
+from .uart_async import AsyncUARTProtocol, create_serial_connection
+from .crc_16 import calculate_crc
+from .uart_protocol import HEADER, NACK_INVALID_CHECKSUM, STOP_BYTE, UARTProtocol
+
+
+def build_frame(cmd: int, payload: bytes = b"") -> bytes:
+    """Build a complete frame with a valid CRC."""
+    frame = bytes([HEADER, cmd, len(payload)]) + payload
+    crc_value = calculate_crc(frame)
+    return frame + bytes([(crc_value >> 8) & 0xFF, crc_value & 0xFF, STOP_BYTE])
+
+
+def read_exactly(fd: int, length: int, timeout: float = 2.0) -> bytes:
+    """Read `length` bytes from a blocking fd, failing after `timeout`."""
+    data = b""
+    while len(data) < length:
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            break
+        data += os.read(fd, length - len(data))
+    return data
+
+
+class TestAsyncUARTProtocol(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the asyncio transport over a pty pair.
+    """
+
+    async def asyncSetUp(self):
+        """Open a pty pair and connect the protocol to its slave end."""
+        self.master_fd, slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        slave_name = os.ttyname(slave_fd)
+        self.transport, self.protocol = await create_serial_connection(
+            AsyncUARTProtocol, slave_name, 9600
+        )
+        # pyserial holds its own fd for the slave; drop ours
+        os.close(slave_fd)
+
+    async def asyncTearDown(self):
+        """Close both ends of the pty pair."""
+        self.protocol.close()
+        await self.protocol.wait_closed()
+        os.close(self.master_fd)
+
+    async def test_frame_is_received_and_acknowledged(self):
+        """
+        Purpose: To verify that a command frame written by the 'PIC' arrives
+        through get_frame() and that the CRC check ACKs it over the pty.
+        """
+        frame = build_frame(0x41, b"\x01\x02")
+        os.write(self.master_fd, frame)
+
+        received, crc_ok = await asyncio.wait_for(
+            self.protocol.get_frame(), timeout=2.0
+        )
+        self.assertEqual(bytes(received), frame)
+        self.assertTrue(crc_ok)
+
+        self.assertTrue(self.protocol.parser.evaluate_crc(received, crc_ok))
+        ack = await asyncio.to_thread(read_exactly, self.master_fd, 6)
+        self.assertEqual(ack, UARTProtocol.ack(frame))
+
+    async def test_back_to_back_frames_in_one_write(self):
+        """
+        Purpose: To verify that several frames delivered in one read are all
+        queued, in order.
+        """
+        frames = [build_frame(0x41, bytes([i])) for i in range(5)]
+        os.write(self.master_fd, b"".join(frames))
+
+        for expected in frames:
+            received, _ = await asyncio.wait_for(
+                self.protocol.get_frame(), timeout=2.0
+            )
+            self.assertEqual(bytes(received), expected)
+
+    async def test_queued_crc_verdict_is_used(self):
+        """
+        Purpose: To verify that each queued frame carries the CRC verdict
+        from extraction, even after later frames were extracted, and that
+        acting on it NACKs a corrupt frame without computing the CRC again.
+        """
+        corrupt = bytearray(build_frame(0x41, b"\x01"))
+        corrupt[-2] ^= 0xFF
+        os.write(self.master_fd, bytes(corrupt) + build_frame(0x41, b"\x02"))
+
+        received = [
+            await asyncio.wait_for(self.protocol.get_frame(), timeout=2.0)
+            for _ in range(2)
+        ]
+        self.assertEqual([crc_ok for _, crc_ok in received], [False, True])
+
+        with mock.patch.object(crc_16, "calculate_crc") as calculate:
+            self.assertFalse(self.protocol.parser.evaluate_crc(*received[0]))
+        calculate.assert_not_called()
+        nack = await asyncio.to_thread(read_exactly, self.master_fd, 6)
+        self.assertEqual(nack, NACK_INVALID_CHECKSUM)
+
+    async def test_close_does_not_wait_for_a_read_timeout(self):
+        """
+        Purpose: To verify that closing the link completes immediately
+        instead of waiting out a blocking read.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.protocol.close()
+        await self.protocol.wait_closed()
+        self.assertLess(loop.time() - start, 0.5)
+        self.assertIsNone(await self.protocol.get_frame())
+
+
+if __name__ == '__main__':
+    unittest.main()
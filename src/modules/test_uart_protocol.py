@@ -12,11 +12,32 @@ import unittest
 from unittest.mock import patch, MagicMock
 
 # Assuming the script is run from the project root or the modules directory is in PYTHONPATH
-from .uart_protocol import UARTProtocol, FrameType
-from .command_handler import COMMAND_MAP
+from .uart_protocol import UARTProtocol, FrameType, UARTError
+from .command_handler import COMMAND_MAP, Commands
 from .crc_16 import calculate_crc
 
 
+def build_frame(cmd: int, payload: bytes = b'') -> bytes:
+    """Build a complete frame with a valid CRC."""
+    frame = bytes([0x3E, cmd, len(payload)]) + payload
+    crc_value = calculate_crc(frame)
+    return frame + bytes([(crc_value >> 8) & 0xFF, crc_value & 0xFF, 0x0A])
+
+
+def feed_readinto(*chunks: bytes):
+    """Build a side effect for uart.readinto that hands out one chunk per call."""
+    pending = list(chunks)
+
+    def readinto(buffer) -> int:
+        if not pending:
+            return 0
+        chunk = pending.pop(0)
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+    return readinto
+
+
 class TestUARTProtocol(unittest.TestCase):
     """
     Test suite for the UARTProtocol class.
@@ -26,8 +47,8 @@ class TestUARTProtocol(unittest.TestCase):
         """Set up a new UARTProtocol instance for each test."""
         self.protocol = UARTProtocol()
 
-    @patch('modules.uart.get_data')
-    def test_frame_parsing_with_single_valid_frame(self, mock_get_data: MagicMock):
+    @patch('modules.uart.readinto')
+    def test_frame_parsing_with_single_valid_frame(self, mock_readinto: MagicMock):
         """
         Purpose: To verify that the combination of `pull_frame` and
         `validate_and_extract_frame` can correctly parse a single, complete,
@@ -47,8 +68,8 @@ class TestUARTProtocol(unittest.TestCase):
         crc_lsb = crc_value & 0xFF
         full_frame = bytes([header, cmd, payload_len]) + payload + bytes([crc_msb, crc_lsb, stop_byte])
 
-        # 2. Mocking: Configure the mock for uart.get_data
-        mock_get_data.side_effect = [bytes([b]) for b in full_frame] + [None]
+        # 2. Mocking: Configure the mock for uart.readinto
+        mock_readinto.side_effect = feed_readinto(full_frame)
 
         # 3. Execution
         self.protocol.pull_frame()
@@ -58,6 +79,128 @@ class TestUARTProtocol(unittest.TestCase):
         self.assertEqual(result_frame, full_frame)
         self.assertEqual(len(self.protocol.buffer), 0)
 
+    @patch('modules.uart.readinto')
+    def test_frame_parsing_with_frame_split_across_chunks(self, mock_readinto: MagicMock):
+        """
+        Purpose: To verify that a frame delivered in several chunks is only
+        extracted once its last chunk has been pulled into the buffer.
+        """
+        full_frame = bytes([0x3E, 0x32, 0x01, 0x07])
+        crc_value = calculate_crc(full_frame)
+        full_frame += bytes([(crc_value >> 8) & 0xFF, crc_value & 0xFF, 0x0A])
+
+        mock_readinto.side_effect = feed_readinto(full_frame[:4], full_frame[4:])
+        self.protocol.pull_frame()
+        self.assertIsNone(self.protocol.validate_and_extract_frame())
+
+        self.protocol.pull_frame()
+        self.assertEqual(self.protocol.validate_and_extract_frame(), full_frame)
+        self.assertEqual(len(self.protocol.buffer), 0)
+
+    @patch('modules.uart.readinto')
+    def test_iter_frames_drains_a_burst_in_one_pass(self, mock_readinto: MagicMock):
+        """
+        Purpose: To verify that iter_frames() yields every frame of a burst
+        pulled in one chunk, and leaves a trailing partial frame buffered.
+        """
+        frames = [build_frame(0x41, bytes([i])) for i in range(4)]
+        partial = build_frame(0x41, b'\x09')[:3]
+        mock_readinto.side_effect = feed_readinto(b''.join(frames) + partial)
+
+        self.protocol.pull_frame()
+
+        self.assertEqual(list(self.protocol.iter_frames()), frames)
+        self.assertEqual(bytes(self.protocol.buffer), partial)
+
+    def test_stream_larger_than_the_buffer_is_extracted_in_order(self):
+        """
+        Purpose: To verify that lazy compaction of the read-offset buffer
+        keeps every frame intact when far more data than the buffer holds is
+        fed through it in odd-sized chunks.
+        """
+        frames = [build_frame(0x41, bytes([i]) * (i % 40)) for i in range(200)]
+        stream = memoryview(b''.join(frames))
+        protocol = UARTProtocol(send=lambda frame: True)
+
+        extracted = []
+        for offset in range(0, len(stream), 97):
+            chunk = stream[offset : offset + 97]
+            while chunk:
+                chunk = chunk[protocol.feed(chunk):]
+                # Views are only valid until the next feed(), so copy them
+                for frame in protocol.iter_frames():
+                    self.assertTrue(protocol.check_crc(frame))
+                    extracted.append(bytes(frame))
+
+        self.assertEqual(extracted, frames)
+        self.assertEqual(protocol.stats()["skipped_bytes"], 0)
+
+    def test_running_crc_over_byte_by_byte_arrival(self):
+        """
+        Purpose: To verify that the CRC accumulated while a large frame
+        arrives one byte at a time gives the same verdict as a one-shot check,
+        for both a good and a corrupted frame.
+        """
+        good = build_frame(0x41, bytes(range(250)))
+        bad = bytearray(good)
+        bad[100] ^= 0x01
+        protocol = UARTProtocol(send=lambda frame: True)
+
+        for data, expected in ((good, True), (bytes(bad), False)):
+            frame = None
+            for byte in data:
+                protocol.feed(bytes([byte]))
+                frame = protocol.validate_and_extract_frame() or frame
+            self.assertEqual(bytes(frame), data)
+            self.assertEqual(protocol.check_crc(frame), expected)
+
+    def test_frame_longer_than_the_limit_is_treated_as_noise(self):
+        """
+        Purpose: To verify that a header declaring a frame longer than
+        max_frame_size is skipped instead of stalling the parser.
+        """
+        small = build_frame(0x41, b'\x01')
+        protocol = UARTProtocol(send=lambda frame: True, max_frame_size=16)
+
+        protocol.feed(build_frame(0x41, bytes(20))[:12] + small)
+
+        self.assertEqual(protocol.validate_and_extract_frame(), small)
+        self.assertEqual(protocol.stats()["skipped_bytes"], 12)
+
+    def test_noise_in_front_of_frames_only_drops_the_noise(self):
+        """
+        Purpose: To verify that junk bytes (including a false header) in front
+        of back-to-back frames are skipped with a single NACK, and that every
+        frame behind them is still extracted.
+        """
+        frames = [build_frame(0x41, bytes([i, 0x3E])) for i in range(3)]
+        noise = b'\x00\x3E\x07\xFF'
+        sent = []
+        protocol = UARTProtocol(send=lambda frame: sent.append(frame) or True)
+
+        protocol.feed(noise + b''.join(frames))
+        extracted = []
+        while (frame := protocol.validate_and_extract_frame()) is not None:
+            extracted.append(frame)
+
+        self.assertEqual(extracted, frames)
+        self.assertEqual(sent, [UARTProtocol.nack(UARTError.BAD_FRAME)])
+        self.assertEqual(protocol.stats()["skipped_bytes"], len(noise))
+        self.assertEqual(protocol.stats()["resyncs"], 1)
+
+    def test_corrupted_command_is_kept_for_the_checksum_nack(self):
+        """
+        Purpose: To verify that a command with a bad CRC but a sound structure
+        is still extracted, so evaluate_crc() can NACK it as a checksum error.
+        """
+        frame = bytearray(build_frame(0x41, b'\x01\x02'))
+        frame[3] ^= 0xFF
+        protocol = UARTProtocol(send=lambda frame: True)
+
+        protocol.feed(frame)
+        self.assertEqual(protocol.validate_and_extract_frame(), bytes(frame))
+        self.assertEqual(protocol.stats()["skipped_bytes"], 0)
+
     def test_classify_frame_command_with_payload(self):
         """
         Purpose: To verify that a frame with a payload (length > 6) is
@@ -102,8 +245,8 @@ class TestUARTProtocol(unittest.TestCase):
         Purpose: To verify that a 6-byte frame whose command byte IS
         in the COMMAND_MAP is classified as a COMMAND.
         """
-        # The STATUS command (2) is a known zero-payload command
-        status_command_byte = 2
+        # The STATUS command ('2') is a known zero-payload command
+        status_command_byte = Commands.STATUS
         self.assertIn(status_command_byte, COMMAND_MAP)
         frame = bytes([0x3E, status_command_byte, 0x00, 0x56, 0x78, 0x0A])
         frame_type = self.protocol.classify_frame(frame)
@@ -0,0 +1,195 @@
+import threading
+from collections import deque
+from enum import IntEnum
+from typing import Optional
+
+
+class TxPriority(IntEnum):
+    """Transmit lanes, drained in ascending order."""
+
+    CONTROL = 0  # Protocol ACK/NACK frames
+    BULK = 1  # Status strings and other payloads
+
+
+class TxQueue:
+    """
+    Two-lane transmit queue drained by the UART writer thread.
+
+    CONTROL items always go out before BULK items. Small items are coalesced
+    into a single write of up to `coalesce_max` bytes. The BULK lane is bounded
+    in bytes: producers wait up to their timeout for space and the item is
+    dropped (and counted) if none frees up. Items are never split, so a
+    control frame can not end up inside a bulk message on the wire.
+    """
+
+    def __init__(
+        self, max_bulk_bytes: int, max_control_items: int, coalesce_max: int
+    ):
+        """
+        Args:
+            max_bulk_bytes: Capacity of the BULK lane in bytes
+            max_control_items: Capacity of the CONTROL lane in items
+            coalesce_max: Largest coalesced write handed to the writer
+        """
+        self._lanes = {priority: deque() for priority in TxPriority}
+        self._bulk_bytes = 0
+        self._max_bulk_bytes = max_bulk_bytes
+        self._max_control_items = max_control_items
+        self._coalesce_max = coalesce_max
+        self._in_flight = 0  # Bytes handed to the writer but not yet reported
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        # Statistics (bytes)
+        self.queued_bytes = 0
+        self.sent_bytes = 0
+        self.dropped_bytes = 0
+        self.writes = 0
+
+    def put(
+        self,
+        data: bytes,
+        priority: TxPriority = TxPriority.BULK,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Queue bytes for transmission.
+
+        Args:
+            data: Bytes to send
+            priority: Lane to queue the bytes on
+            timeout: Seconds a BULK producer may wait for space (None = no wait)
+
+        Returns:
+            True if queued, False if dropped (queue full or closed)
+        """
+        length = len(data)
+
+        with self._cond:
+            if priority == TxPriority.CONTROL:
+                has_room = len(self._lanes[priority]) < self._max_control_items
+            else:
+                # An oversized item is still accepted into an empty lane
+                def fits() -> bool:
+                    return self._closed or (
+                        self._bulk_bytes == 0
+                        or self._bulk_bytes + length <= self._max_bulk_bytes
+                    )
+
+                has_room = fits() if not timeout else self._cond.wait_for(fits, timeout)
+
+            if self._closed or not has_room:
+                self.dropped_bytes += length
+                return False
+
+            self._lanes[priority].append(bytes(data))
+            if priority == TxPriority.BULK:
+                self._bulk_bytes += length
+            self.queued_bytes += length
+            self._cond.notify_all()
+            return True
+
+    def get_batch(self) -> Optional[bytes]:
+        """
+        Block until data is queued, then take a coalesced batch.
+
+        CONTROL items are taken first, then BULK items, as long as the batch
+        stays within `coalesce_max` (a single larger item is taken alone).
+
+        Returns:
+            Bytes to write, or None once the queue is closed and empty
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self.pending_items() > 0)
+            if not self.pending_items():
+                return None
+
+            batch = bytearray()
+            for priority in TxPriority:
+                lane = self._lanes[priority]
+                while lane and (
+                    not batch or len(batch) + len(lane[0]) <= self._coalesce_max
+                ):
+                    item = lane.popleft()
+                    batch += item
+                    if priority == TxPriority.BULK:
+                        self._bulk_bytes -= len(item)
+                if lane:
+                    break
+
+            self._in_flight = len(batch)
+            self._cond.notify_all()
+            return bytes(batch)
+
+    def batch_done(self, sent: int) -> None:
+        """
+        Report the outcome of writing the last batch.
+
+        Args:
+            sent: Bytes actually written; the rest are counted as dropped
+        """
+        with self._cond:
+            self.sent_bytes += sent
+            self.dropped_bytes += max(self._in_flight - sent, 0)
+            self.writes += 1
+            self._in_flight = 0
+            self._cond.notify_all()
+
+    def pending_items(self) -> int:
+        """Number of items waiting in both lanes."""
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def wait_empty(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until everything queued has been written.
+
+        Args:
+            timeout: Maximum time to wait in seconds (None = wait forever)
+
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self.pending_items() and not self._in_flight, timeout
+            )
+
+    def close(self) -> int:
+        """
+        Stop accepting data and wake up the writer.
+
+        Returns:
+            Number of bytes still queued, which are dropped
+        """
+        with self._cond:
+            self._closed = True
+            dropped = sum(len(item) for lane in self._lanes.values() for item in lane)
+            for lane in self._lanes.values():
+                lane.clear()
+            self._bulk_bytes = 0
+            self.dropped_bytes += dropped
+            self._cond.notify_all()
+            return dropped
+
+    def reopen(self) -> None:
+        """Accept data again after close()."""
+        with self._cond:
+            self._closed = False
+
+    def stats(self) -> dict:
+        """
+        Get a snapshot of the transmit statistics.
+
+        Returns:
+            Dictionary with queued, sent, dropped and pending byte counts
+        """
+        with self._cond:
+            return {
+                "queued_bytes": self.queued_bytes,
+                "sent_bytes": self.sent_bytes,
+                "dropped_bytes": self.dropped_bytes,
+                "pending_bytes": sum(
+                    len(item) for lane in self._lanes.values() for item in lane
+                ),
+                "writes": self.writes,
+            }
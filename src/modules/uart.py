@@ -1,24 +1,39 @@
 import serial
 import threading
-import queue
+import time
 import logging
 from typing import Optional, Callable, Any
 
+from . import ring_buffer
+from . import tx_queue
+from .tx_queue import TxPriority
+
 # Configure module logger
 logger = logging.getLogger(__name__)
 
+# --- Constants ---
+DEFAULT_TIMEOUT = 1.0
+RX_MAX_CHUNK_SIZE = 256  # bytes handed over per read
+RX_BUFFER_CAPACITY = 4096  # bytes
+TX_MAX_BULK_BYTES = 2048  # bytes of status/payload data queued at most
+TX_MAX_CONTROL_FRAMES = 64  # ACK/NACK frames queued at most
+TX_COALESCE_MAX = 256  # bytes per coalesced write
+TX_ENQUEUE_TIMEOUT = 0.5  # seconds a bulk sender waits for queue space
+TX_FLUSH_TIMEOUT = 1.0  # seconds to drain the TX queue when stopping
+THREAD_JOIN_TIMEOUT = 2.0
+TEST_SLEEP_INTERVAL = 0.1
+
 # --- Module-level variables ---
 _serial_port: Optional[serial.Serial] = None
 _listener_thread: Optional[threading.Thread] = None
-_data_queue: queue.Queue = queue.Queue()
+_writer_thread: Optional[threading.Thread] = None
+_rx_buffer = ring_buffer.RingBuffer(RX_BUFFER_CAPACITY)
+_tx_queue = tx_queue.TxQueue(TX_MAX_BULK_BYTES, TX_MAX_CONTROL_FRAMES, TX_COALESCE_MAX)
 _is_running: bool = False
+_last_rx_time: float = 0.0  # time.monotonic() of the latest received chunk
+_transport_write: Optional[Callable[[bytes], bool]] = None  # asyncio link, if any
 _lock = threading.Lock()
 
-# --- Constants ---
-DEFAULT_TIMEOUT = 1.0
-THREAD_JOIN_TIMEOUT = 2.0
-TEST_SLEEP_INTERVAL = 0.1
-
 
 class SerialError(Exception):
     """Custom exception for serial communication errors."""
@@ -56,7 +71,9 @@ def process_data(
     execute_command: Callable[[int, Optional[Any]], str], flash: Optional[Any]
 ) -> None:
     """
-    Process all pending data in the UART queue.
+    Process all pending data in the UART receive buffer.
+
+    Every buffered byte is treated as a single-character command.
 
     Args:
         execute_command: Function to execute a parsed command
@@ -67,24 +84,28 @@ def process_data(
     """
     processed_count = 0
 
-    while not _data_queue.empty():
+    while len(_rx_buffer) > 0:
         try:
-            received_data = _data_queue.get_nowait()
+            received_chunk = _rx_buffer.read()
 
-            try:
-                character = received_data.decode("utf-8")
-                logger.info(f"Received: '{character}' (0x{received_data.hex()})")
+            for byte in received_chunk:
+                received_data = bytes([byte])
+                try:
+                    character = received_data.decode("utf-8")
+                    logger.info(f"Received: '{character}' (0x{received_data.hex()})")
 
-                # Parse and execute command
-                command = parse_command(received_data)
-                if command is not None:
-                    result = execute_command(command, flash)
-                    logger.info(f"Result: {result}")
+                    # Parse and execute command
+                    command = parse_command(received_data)
+                    if command is not None:
+                        result = execute_command(command, flash)
+                        logger.info(f"Result: {result}")
 
-                processed_count += 1
+                    processed_count += 1
 
-            except UnicodeDecodeError:
-                logger.warning(f"Received non-UTF-8 byte: 0x{received_data.hex()}")
+                except UnicodeDecodeError:
+                    logger.warning(
+                        f"Received non-UTF-8 byte: 0x{received_data.hex()}"
+                    )
 
         except ShutdownRequested:
             # Propagate shutdown request up
@@ -100,21 +121,33 @@ def process_data(
 def _serial_listener() -> None:
     """
     Target function for the listener thread.
-    Continuously listens for serial data and puts it in the queue.
+    Continuously listens for serial data and puts it in the receive buffer.
+
+    Blocks for the first byte, then takes everything already waiting in the
+    driver (up to RX_MAX_CHUNK_SIZE) so each buffer write is a whole chunk.
     """
-    global _is_running
+    global _is_running, _last_rx_time
 
     logger.info("Listener thread started")
 
     try:
         while _is_running:
             try:
-                # Block until at least one byte is received
-                incoming_byte = _serial_port.read(1)
-
-                if incoming_byte and _is_running:
-                    _data_queue.put(incoming_byte)
-                    logger.debug(f"Received byte: {incoming_byte.hex()}")
+                # Read whatever is waiting, or block until at least one byte
+                waiting = min(_serial_port.in_waiting, RX_MAX_CHUNK_SIZE)
+                incoming_chunk = _serial_port.read(max(1, waiting))
+
+                if incoming_chunk and _is_running:
+                    _last_rx_time = time.monotonic()
+                    stored = _rx_buffer.write(incoming_chunk)
+                    logger.debug(
+                        f"Received {len(incoming_chunk)} bytes: {incoming_chunk.hex()}"
+                    )
+                    if stored < len(incoming_chunk):
+                        logger.warning(
+                            f"Receive buffer full, dropped "
+                            f"{len(incoming_chunk) - stored} bytes"
+                        )
 
             except serial.SerialException as e:
                 if _is_running:
@@ -127,19 +160,68 @@ def _serial_listener() -> None:
         logger.info("Listener thread finished")
 
 
+def _serial_writer() -> None:
+    """
+    Target function for the writer thread.
+    Takes coalesced batches from the TX queue (ACK/NACK first) and writes them,
+    so senders never block on the serial line.
+    """
+    logger.info("Writer thread started")
+
+    try:
+        while True:
+            batch = _tx_queue.get_batch()
+            if batch is None:
+                break
+
+            sent = 0
+            try:
+                sent = _serial_port.write(batch) or 0
+                logger.debug(f"Sent {sent} bytes: {batch.hex()}")
+            except serial.SerialException as e:
+                logger.error(f"Error sending data: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error sending data: {e}")
+            finally:
+                _tx_queue.batch_done(sent)
+    finally:
+        logger.info("Writer thread finished")
+
+
 def is_running() -> bool:
     """
     Check if the serial listener is currently running.
 
     Returns:
-        True if listener is running, False otherwise
+        True if listener (or an attached asyncio transport) is running,
+        False otherwise
     """
-    return _is_running
+    return _is_running or _transport_write is not None
+
+
+def attach_transport(write: Callable[[bytes], bool]) -> None:
+    """
+    Route send_data() through an external transport instead of the threaded
+    serial port. Used by the asyncio link so command handlers can keep
+    calling uart.send_data().
+
+    Args:
+        write: Function that queues bytes on the transport and returns True
+            if they were accepted
+    """
+    global _transport_write
+    _transport_write = write
+
+
+def detach_transport() -> None:
+    """Stop routing send_data() through an external transport."""
+    global _transport_write
+    _transport_write = None
 
 
 def start_listener(
     port: str, baud_rate: int, timeout: float = DEFAULT_TIMEOUT
-) -> Optional[queue.Queue]:
+) -> Optional[ring_buffer.RingBuffer]:
     """
     Initialize the serial port and start the listener thread.
 
@@ -149,12 +231,12 @@ def start_listener(
         timeout: Read timeout in seconds (default: 1.0)
 
     Returns:
-        Queue object for reading received data, or None if initialization failed
+        Ring buffer holding received data, or None if initialization failed
 
     Raises:
         SerialError: If serial port cannot be opened or listener is already running
     """
-    global _serial_port, _listener_thread, _is_running
+    global _serial_port, _listener_thread, _writer_thread, _is_running
 
     with _lock:
         if _is_running:
@@ -177,12 +259,8 @@ def start_listener(
             logger.error(error_msg)
             raise SerialError(error_msg)
 
-        # Clear any existing data in the queue
-        while not _data_queue.empty():
-            try:
-                _data_queue.get_nowait()
-            except queue.Empty:
-                break
+        # Clear any existing data in the receive buffer
+        _rx_buffer.clear()
 
         # Start the listener thread
         _is_running = True
@@ -191,73 +269,141 @@ def start_listener(
         )
         _listener_thread.start()
 
-        return _data_queue
+        # Start the writer thread
+        _tx_queue.reopen()
+        _writer_thread = threading.Thread(
+            target=_serial_writer, daemon=True, name="SerialWriter"
+        )
+        _writer_thread.start()
 
+        return _rx_buffer
 
-def send_data(data: bytes) -> bool:
+
+def send_data(
+    data: bytes,
+    priority: TxPriority = TxPriority.BULK,
+    timeout: float = TX_ENQUEUE_TIMEOUT,
+) -> bool:
     """
-    Send bytes of data over the serial port.
+    Queue bytes of data for the writer thread to send over the serial port.
+
+    ACK/NACK frames should use TxPriority.CONTROL so they go out ahead of any
+    queued bulk data. Bulk senders wait up to `timeout` for queue space.
 
     Args:
         data: Bytes to send
+        priority: Transmit lane (default: BULK)
+        timeout: Seconds to wait for space in the BULK lane
 
     Returns:
-        True if data was sent successfully, False otherwise
+        True if data was queued, False if it was dropped
 
     Raises:
         SerialError: If serial port is not open
     """
+    if _transport_write is not None:
+        return _transport_write(data)
+
     if not _serial_port or not _serial_port.is_open:
         raise SerialError("Cannot send data, serial port is not open")
 
-    try:
-        bytes_written = _serial_port.write(data)
-        logger.debug(f"Sent {bytes_written} bytes: {data.hex()}")
-        return bytes_written == len(data)
-    except serial.SerialException as e:
-        logger.error(f"Error sending data: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"Unexpected error sending data: {e}")
+    if not _tx_queue.put(data, priority, timeout):
+        logger.error(f"TX queue full, dropped {len(data)} bytes")
         return False
 
+    return True
+
+
+def flush_tx(timeout: Optional[float] = TX_FLUSH_TIMEOUT) -> bool:
+    """
+    Wait until the writer thread has sent everything queued.
+
+    Args:
+        timeout: Maximum time to wait in seconds (None = wait forever)
+
+    Returns:
+        True if the TX queue drained, False on timeout
+    """
+    return _tx_queue.wait_empty(timeout)
+
 
 def get_data(timeout: Optional[float] = None) -> Optional[bytes]:
     """
-    Get data from the queue (non-blocking by default).
+    Get all buffered data (non-blocking by default).
 
     Args:
         timeout: Maximum time to wait for data in seconds (None = no wait)
 
     Returns:
-        Received data bytes, or None if queue is empty
+        Received bytes, or None if the buffer is empty
     """
-    try:
-        if timeout is None:
-            return _data_queue.get_nowait()
-        else:
-            return _data_queue.get(timeout=timeout)
-    except queue.Empty:
-        return None
+    if timeout is not None:
+        _rx_buffer.wait_for_data(timeout)
+
+    data = _rx_buffer.read()
+    return data if data else None
+
+
+def wait_for_data(timeout: Optional[float] = None) -> bool:
+    """
+    Block until received data is waiting in the buffer.
+
+    The listener thread wakes this up as soon as it stores a chunk, so callers
+    can sleep until either data arrives or their own deadline passes.
+
+    Args:
+        timeout: Maximum time to wait in seconds (None = wait forever)
+
+    Returns:
+        True if data is available, False if the wait timed out
+    """
+    return _rx_buffer.wait_for_data(timeout)
+
+
+def last_rx_time() -> float:
+    """
+    Get the time the most recent chunk was received.
+
+    Returns:
+        time.monotonic() timestamp of the latest chunk (0.0 if none yet)
+    """
+    return _last_rx_time
+
+
+def drain_data() -> bytes:
+    """
+    Remove and return every byte currently in the receive buffer.
+
+    Returns:
+        All pending received bytes (empty if the buffer is empty)
+    """
+    return _rx_buffer.read()
+
+
+def readinto(buffer) -> int:
+    """
+    Move pending received bytes straight into a caller-owned buffer.
+
+    Args:
+        buffer: Writable bytes-like object (bytearray, memoryview, ...)
+
+    Returns:
+        Number of bytes copied into the buffer
+    """
+    return _rx_buffer.readinto(buffer)
 
 
 def clear_queue() -> int:
     """
-    Clear all pending data from the receive queue.
+    Clear all pending data from the receive buffer.
 
     Returns:
-        Number of items removed from the queue
+        Number of bytes removed from the buffer
     """
-    count = 0
-    while not _data_queue.empty():
-        try:
-            _data_queue.get_nowait()
-            count += 1
-        except queue.Empty:
-            break
+    count = _rx_buffer.clear()
 
     if count > 0:
-        logger.debug(f"Cleared {count} items from receive queue")
+        logger.debug(f"Cleared {count} bytes from receive buffer")
 
     return count
 
@@ -267,7 +413,7 @@ def stop_listener() -> None:
     Stop the listener thread and close the serial port.
     This function is idempotent and safe to call multiple times.
     """
-    global _is_running, _serial_port, _listener_thread
+    global _is_running, _serial_port, _listener_thread, _writer_thread
 
     with _lock:
         if not _is_running and not _serial_port:
@@ -277,6 +423,18 @@ def stop_listener() -> None:
         logger.info("Stopping serial listener...")
         _is_running = False
 
+        # Give queued replies (e.g. a POWEROFF acknowledgment) a chance to go out
+        if not _tx_queue.wait_empty(TX_FLUSH_TIMEOUT):
+            logger.warning("TX queue did not drain in time")
+        dropped = _tx_queue.close()
+        if dropped:
+            logger.warning(f"Dropped {dropped} unsent TX bytes")
+
+        if _writer_thread and _writer_thread.is_alive():
+            _writer_thread.join(timeout=THREAD_JOIN_TIMEOUT)
+            if _writer_thread.is_alive():
+                logger.warning("Writer thread did not finish in time")
+
         # Wait for listener thread to finish
         if _listener_thread and _listener_thread.is_alive():
             logger.debug("Waiting for listener thread to finish...")
@@ -295,13 +453,34 @@ def stop_listener() -> None:
 
         _serial_port = None
         _listener_thread = None
+        _writer_thread = None
 
 
 def get_queue_size() -> int:
     """
-    Get the current number of items in the receive queue.
+    Get the current number of bytes waiting in the receive buffer.
+
+    Returns:
+        Number of buffered bytes
+    """
+    return len(_rx_buffer)
+
+
+def get_rx_stats() -> dict:
+    """
+    Get receive buffer statistics (backlog, high-water mark, overflows).
+
+    Returns:
+        Dictionary of receive buffer statistics
+    """
+    return _rx_buffer.stats()
+
+
+def get_tx_stats() -> dict:
+    """
+    Get transmit queue statistics (queued, sent, dropped and pending bytes).
 
     Returns:
-        Number of items in the queue
+        Dictionary of transmit statistics
     """
-    return _data_queue.qsize()
+    return _tx_queue.stats()
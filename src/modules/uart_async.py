@@ -0,0 +1,341 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Optional, Tuple
+
+import serial
+
+from . import link_stats
+from . import uart
+from . import uart_protocol
+
+# Configure module logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+READ_SIZE = 1024  # bytes read per readiness callback
+
+
+class SerialTransport(asyncio.Transport):
+    """
+    asyncio transport over the file descriptor of an open serial port.
+
+    Reads and writes are driven by the event loop's add_reader/add_writer, so
+    nothing ever blocks on the port: there is no read timeout to wait out when
+    closing, and writes the driver cannot take yet are buffered and flushed
+    when the fd becomes writable.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        protocol: asyncio.Protocol,
+        serial_port: serial.Serial,
+    ):
+        super().__init__()
+        self._loop = loop
+        self._protocol = protocol
+        self._serial = serial_port
+        self._fd = serial_port.fileno()
+        self._write_buffer = bytearray()
+        self._closing = False
+        self._lost_scheduled = False
+        self._reading = True
+
+        os.set_blocking(self._fd, False)
+
+        self._loop.call_soon(self._protocol.connection_made, self)
+        self._loop.call_soon(self._loop.add_reader, self._fd, self._read_ready)
+
+    @property
+    def serial(self) -> serial.Serial:
+        """The underlying pyserial port."""
+        return self._serial
+
+    def _read_ready(self) -> None:
+        """Event loop callback: the fd has data to read."""
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fatal_error(e)
+            return
+
+        if not data:
+            self._fatal_error(uart.SerialError("Serial port reached end of file"))
+            return
+
+        self._protocol.data_received(data)
+
+    def write(self, data: bytes) -> None:
+        """
+        Queue bytes for transmission without blocking.
+
+        Args:
+            data: Bytes-like object to send
+        """
+        if self._closing or not data:
+            return
+
+        if not self._write_buffer:
+            # Try to write straight away; only buffer what the driver refuses
+            try:
+                written = os.write(self._fd, data)
+            except (BlockingIOError, InterruptedError):
+                written = 0
+            except OSError as e:
+                self._fatal_error(e)
+                return
+
+            data = memoryview(data)[written:]
+            if not data:
+                return
+
+            self._loop.add_writer(self._fd, self._write_ready)
+
+        self._write_buffer.extend(data)
+
+    def _write_ready(self) -> None:
+        """Event loop callback: the fd can take more bytes."""
+        try:
+            written = os.write(self._fd, self._write_buffer)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fatal_error(e)
+            return
+
+        del self._write_buffer[:written]
+
+        if not self._write_buffer:
+            self._loop.remove_writer(self._fd)
+            if self._closing:
+                self._schedule_connection_lost(None)
+
+    def get_write_buffer_size(self) -> int:
+        """Number of bytes waiting to be written."""
+        return len(self._write_buffer)
+
+    def pause_reading(self) -> None:
+        """Stop delivering received data to the protocol."""
+        if self._reading and not self._closing:
+            self._loop.remove_reader(self._fd)
+            self._reading = False
+
+    def resume_reading(self) -> None:
+        """Resume delivering received data to the protocol."""
+        if not self._reading and not self._closing:
+            self._loop.add_reader(self._fd, self._read_ready)
+            self._reading = True
+
+    def is_reading(self) -> bool:
+        return self._reading and not self._closing
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        """Close the transport once pending writes have been flushed."""
+        if self._closing:
+            return
+
+        self._closing = True
+        self._loop.remove_reader(self._fd)
+        if not self._write_buffer:
+            self._schedule_connection_lost(None)
+
+    def abort(self) -> None:
+        """Close the transport immediately, dropping pending writes."""
+        self._close(None)
+
+    def _fatal_error(self, exc: Exception) -> None:
+        logger.error(f"Fatal error on serial transport: {exc}")
+        self._close(exc)
+
+    def _close(self, exc: Optional[Exception]) -> None:
+        self._closing = True
+        self._loop.remove_reader(self._fd)
+        if self._write_buffer:
+            self._write_buffer.clear()
+            self._loop.remove_writer(self._fd)
+        self._schedule_connection_lost(exc)
+
+    def _schedule_connection_lost(self, exc: Optional[Exception]) -> None:
+        if not self._lost_scheduled:
+            self._lost_scheduled = True
+            self._loop.call_soon(self._call_connection_lost, exc)
+
+    def _call_connection_lost(self, exc: Optional[Exception]) -> None:
+        try:
+            self._protocol.connection_lost(exc)
+        finally:
+            self._serial.close()
+            self._serial = None
+            logger.info("Serial transport closed")
+
+
+class AsyncUARTProtocol(asyncio.Protocol):
+    """
+    asyncio.Protocol front-end for UARTProtocol.
+
+    Received bytes are fed to a UARTProtocol parser, complete frames are queued
+    for get_frame() with their CRC verdict, and ACK/NACK replies go straight
+    out on the transport.
+    """
+
+    def __init__(self):
+        self.transport: Optional[SerialTransport] = None
+        self.parser = uart_protocol.UARTProtocol(send=self.send)
+        self.frames_per_read = link_stats.CountHistogram()
+        self._frames: asyncio.Queue = asyncio.Queue()
+        self._connection_lost = False
+        self._closed = asyncio.Event()
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport
+        logger.info("PIC link connected")
+
+    def data_received(self, data: bytes) -> None:
+        view = memoryview(data)
+        frame_count = 0
+
+        while True:
+            accepted = self.parser.feed(view)
+            view = view[accepted:]
+
+            extracted = 0
+            for frame in self.parser.iter_frames():
+                # Frames are views into the parser buffer; queue a copy. The
+                # parser only remembers the CRC verdict for the view itself,
+                # so it goes along with the copy.
+                self._frames.put_nowait((bytes(frame), self.parser.check_crc(frame)))
+                extracted += 1
+            frame_count += extracted
+
+            if not view:
+                break
+            if not accepted and not extracted:
+                # Parser cannot make progress; should not happen with a
+                # buffer larger than the largest frame.
+                logger.error(f"Parser stalled, dropping {len(view)} bytes")
+                break
+
+        self.frames_per_read.record(frame_count)
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if exc:
+            logger.error(f"PIC link lost: {exc}")
+        else:
+            logger.info("PIC link closed")
+        self._connection_lost = True
+        self._frames.put_nowait(None)
+        self._closed.set()
+
+    def send(self, data: bytes) -> bool:
+        """
+        Queue bytes on the transport.
+
+        Args:
+            data: Bytes to send
+
+        Returns:
+            True if the bytes were queued, False if the link is closed
+        """
+        if self.transport is None or self.transport.is_closing():
+            logger.error("Cannot send data, serial transport is closed")
+            return False
+
+        self.transport.write(data)
+        logger.debug(f"Queued {len(data)} bytes: {data.hex()}")
+        return True
+
+    async def get_frame(self) -> Optional[Tuple[bytes, bool]]:
+        """
+        Wait for the next structurally valid frame.
+
+        Returns:
+            (frame, crc_ok) for the next frame, to pass on to
+            UARTProtocol.process_frame(), or None once the connection has
+            been lost
+        """
+        if self._connection_lost and self._frames.empty():
+            return None
+        return await self._frames.get()
+
+    def close(self) -> None:
+        """Start closing the underlying transport (pending writes are flushed)."""
+        if self.transport is not None:
+            self.transport.close()
+
+    async def wait_closed(self, timeout: float = uart.THREAD_JOIN_TIMEOUT) -> None:
+        """
+        Wait until the transport has closed, aborting it after `timeout`.
+
+        Args:
+            timeout: Maximum time to wait for pending writes, in seconds
+        """
+        if self.transport is None:
+            return
+
+        try:
+            await asyncio.wait_for(self._closed.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Serial transport did not flush in time, aborting")
+            self.transport.abort()
+            await self._closed.wait()
+
+
+async def create_serial_connection(
+    protocol_factory: Callable[[], asyncio.Protocol],
+    port: str,
+    baud_rate: int,
+) -> Tuple[SerialTransport, asyncio.Protocol]:
+    """
+    Open a serial port and connect it to a protocol on the running loop.
+
+    Args:
+        protocol_factory: Callable returning the protocol instance
+        port: Serial port path (e.g., '/dev/ttyAMA0')
+        baud_rate: Baud rate for serial communication
+
+    Returns:
+        Tuple of (transport, protocol)
+
+    Raises:
+        SerialError: If the serial port cannot be opened
+    """
+    loop = asyncio.get_running_loop()
+
+    try:
+        serial_port = serial.Serial(port, baud_rate, timeout=0, write_timeout=0)
+    except serial.SerialException as e:
+        error_msg = f"Could not open serial port {port}: {e}"
+        logger.error(error_msg)
+        raise uart.SerialError(error_msg)
+
+    logger.info(f"Serial port {port} opened at {baud_rate} baud (asyncio)")
+
+    protocol = protocol_factory()
+    transport = SerialTransport(loop, protocol, serial_port)
+    # Let connection_made run before handing the pair back
+    await asyncio.sleep(0)
+    return transport, protocol
+
+
+async def open_pic_link(port: str, baud_rate: int) -> AsyncUARTProtocol:
+    """
+    Open the PIC link with the asyncio transport.
+
+    Args:
+        port: Serial port path (e.g., '/dev/ttyAMA0')
+        baud_rate: Baud rate for serial communication
+
+    Returns:
+        Connected AsyncUARTProtocol
+
+    Raises:
+        SerialError: If the serial port cannot be opened
+    """
+    _, protocol = await create_serial_connection(AsyncUARTProtocol, port, baud_rate)
+    return protocol
@@ -1,9 +1,12 @@
 from enum import Enum
 import logging
 import time
+from typing import Any, Callable, Iterator, Optional
 
 from . import crc_16
 from . import uart
+from .tx_queue import TxPriority
+from . import link_stats
 from . import config
 from . import command_handler
 
@@ -39,6 +42,9 @@ ACK_NACK_DATA_LENGTH = 0x00
 
 MAXIMUM_BUFFER_SIZE = 45
 MINIMUM_BUFFER_SIZE = 6
+MAX_FRAME_SIZE = 0xFF + 6  # largest frame the one-byte LEN field can describe
+PARSE_BUFFER_SIZE = 512  # bytes of received data staged for parsing
+STANDALONE_WAIT_TIMEOUT = 1.0  # seconds the standalone test waits for data
 FRAME_OVERHEAD = 6  # HEADER, CMD, LEN, CRC_MSB, CRC_LSB, STOP_BYTE
 HEADER = 0x3E
 STOP_BYTE = 0x0A
@@ -49,72 +55,378 @@ DATA_LENGTH_IDX = 2
 CRC_MSB_IDX_OFFSET = 3
 CRC_LSB_IDX_OFFSET = 4
 
+# Constant NACK frames, built once instead of on every classification
+NACK_BAD_FRAME = bytes([HEADER, 0x00, ACK_NACK_DATA_LENGTH, 0x00, 0x00, STOP_BYTE])
+NACK_INVALID_CHECKSUM = bytes(
+    [
+        HEADER,
+        NACK_INVALID_FIELD_VALUE,
+        ACK_NACK_DATA_LENGTH,
+        NACK_INVALID_FIELD_VALUE,
+        NACK_INVALID_FIELD_VALUE,
+        STOP_BYTE,
+    ]
+)
+
 
 class UARTProtocol:
-    def __init__(self):
-        self.buffer = bytearray()
+    def __init__(
+        self,
+        send: Optional[Callable[[bytes], bool]] = None,
+        max_frame_size: int = MAX_FRAME_SIZE,
+    ):
+        """
+        Args:
+            send: Function used to transmit ACK/NACK frames. Defaults to
+                uart.send_data (the threaded serial link).
+            max_frame_size: Largest frame accepted, in bytes (at most
+                MAX_FRAME_SIZE). A header declaring a longer frame is
+                treated as noise.
+        """
+        self._send = send
+        self.max_frame_size = min(max_frame_size, MAX_FRAME_SIZE)
+
+        # Fixed staging area filled straight from the uart ring buffer.
+        # Unparsed bytes live in [_start, _end); extraction only advances
+        # _start and the data is moved back to the front lazily.
+        self._buffer = bytearray(PARSE_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+        # Arrival time of the newest pulled bytes, used to time ACK replies
+        self._rx_time = 0.0
+        self.ack_latency = link_stats.LatencyStats()
+
+        # Running CRC of the frame candidate at buffer index _crc_start,
+        # accumulated up to (not including) buffer index _crc_pos
+        self._crc = crc_16.CRC16()
+        self._crc_start = -1
+        self._crc_pos = 0
+        # Where the look-ahead for a frame hidden behind that candidate resumes
+        self._lookahead_pos = 0
+
+        # CRC verdict of the last extracted frame, reused by evaluate_crc()
+        self._checked_frame: Optional[memoryview] = None
+        self._checked_crc_ok = False
+
+        # Resynchronization statistics
+        self._resyncing = False
+        self.frames = 0
+        self.skipped_bytes = 0
+        self.resyncs = 0
+
+    @property
+    def buffer(self) -> memoryview:
+        """Received bytes that have not been parsed into a frame yet."""
+        return self._view[self._start : self._end]
+
+    def _make_room(self) -> memoryview:
+        """
+        Get the free tail of the internal buffer, moving the unparsed bytes
+        to the front first if that at least doubles the free space.
+
+        Frames handed out earlier are views into the buffer and may be
+        overwritten from here on.
+        """
+        if self._start and self._start >= PARSE_BUFFER_SIZE - self._end:
+            remaining = self._end - self._start
+            self._view[:remaining] = self._view[self._start : self._end]
+            self._crc_start -= self._start
+            self._crc_pos -= self._start
+            self._lookahead_pos -= self._start
+            self._start = 0
+            self._end = remaining
+        return self._view[self._end :]
 
     def pull_frame(self) -> None:
         """
-        Pulls a maximum of 45 bytes of data (if any) from the uart queue into the
-        internal buffer to be processed.
+        Pulls as many pending bytes (if any) as fit from the uart ring buffer
+        straight into the internal buffer to be processed.
+
+        Frames previously returned by validate_and_extract_frame() are no
+        longer valid after this call.
+        """
+        pulled = uart.readinto(self._make_room())
+        if pulled:
+            self._end += pulled
+            self._rx_time = uart.last_rx_time()
+
+    def feed(self, data: bytes) -> int:
+        """
+        Copies bytes pushed by a transport (e.g. asyncio) into the internal
+        buffer to be processed.
+
+        Frames previously returned by validate_and_extract_frame() are no
+        longer valid after this call.
+
+        Args:
+            data: Received bytes-like object
+
+        Returns:
+            Number of bytes accepted. Fewer than len(data) means the buffer is
+            full; extract frames and feed the rest again.
+        """
+        data = memoryview(data)
+        room = self._make_room()
+        accepted = min(len(data), len(room))
+        if accepted:
+            room[:accepted] = data[:accepted]
+            self._end += accepted
+            self._rx_time = time.monotonic()
+        return accepted
+
+    def _send_frame(self, frame: bytes) -> bool:
+        """Transmit a protocol frame through the configured link."""
+        if self._send is not None:
+            return self._send(frame)
+        return uart.send_data(frame, priority=TxPriority.CONTROL)
+
+    def _discard(self, count: int) -> None:
+        """Drop the first `count` unparsed bytes of the internal buffer."""
+        self._crc_start = -1  # The running CRC belonged to a dropped candidate
+        self._start += count
+        if self._start >= self._end:
+            # Empty: start over at the front without moving anything
+            self._start = self._end = 0
+
+    def _skip(self, count: int) -> None:
         """
-        for _ in range(MAXIMUM_BUFFER_SIZE):
-            data = uart.get_data()
-            if data is None:
-                break
-            self.buffer.extend(data)
+        Drop `count` bytes that can not start a frame and account for them.
 
-    def validate_and_extract_frame(self) -> bytes | None:
+        The first skip after a good frame starts a new resync run, which is
+        answered with a single BAD_FRAME NACK however many bytes it covers.
         """
-        Validates the internal buffer for a single, complete, valid frame.
+        if not self._resyncing:
+            self._resyncing = True
+            self.resyncs += 1
+            logging.warning(
+                "Invalid data, resynchronizing: "
+                f"{self._view[self._start : self._start + count].hex()}"
+            )
+            if self._send_frame(NACK_BAD_FRAME):
+                logging.warning("Sent NACK to PIC (Bad frame)")
+            else:
+                logging.error("Failed to send NACK")
 
-        This function attempts a 'one-shot' parse of the data at the start of
-        the buffer. If the frame is structurally malformed (bad header, bad
-        stop byte), the buffer is cleared.
+        self.skipped_bytes += count
+        self._discard(count)
+
+    def _frame_end(self, start: int) -> int | None:
+        """
+        Checks whether a structurally valid frame starts at buffer index
+        `start`.
 
         Returns:
-            A bytes object containing a valid frame, or None if no complete
-            or valid frame can be parsed.
-        """
-        # A frame must have a minimum size and start with the HEADER
-        if len(self.buffer) < MINIMUM_BUFFER_SIZE or self.buffer[HEADER_IDX] != HEADER:
-            if self.buffer:
-                logging.warning(
-                    f"Invalid header or too short. Discarding buffer: {self.buffer.hex()}"
-                )
-                nack_frame = self.nack(UARTError.BAD_FRAME)
-                if uart.send_data(nack_frame):
-                    logging.warning("Sent NACK to PIC (Bad frame)")
-                else:
-                    logging.error("Failed to send NACK")
-                self.buffer.clear()
+            The buffer index just past the frame, 0 if the bytes at `start`
+            can not be a frame, or None if the frame is still arriving.
+        """
+        buffer = self._buffer
+        if self._end - start < MINIMUM_BUFFER_SIZE:
             return None
 
-        # Determine the expected full length from the payload length byte
-        expected_length = self.buffer[DATA_LENGTH_IDX] + FRAME_OVERHEAD
+        end = start + buffer[start + DATA_LENGTH_IDX] + FRAME_OVERHEAD
+        if end - start > self.max_frame_size:
+            return 0
+        if self._end < end:
+            return None
+        if buffer[end - 1] != STOP_BYTE:
+            return 0
+        return end
 
-        # The buffer must contain the complete frame
-        if len(self.buffer) < expected_length:
-            return None  # Frame is still arriving, wait for more data
+    def _has_valid_crc(self, frame: memoryview) -> bool:
+        """
+        Checks the CRC of a candidate frame. Only commands carry a CRC over
+        their own bytes; ACK/NACK frames echo someone else's and always pass.
+        """
+        # Same rule as classify_frame(), without the NACK pattern compares
+        if len(frame) == MINIMUM_BUFFER_SIZE and (
+            frame[CMD_IDX] not in command_handler.COMMAND_MAP
+        ):
+            return True
+        return crc_16.calculate_crc(frame) == crc_16.extract_checksum_received(frame)
 
-        # The byte at the end of the expected frame must be the stop byte
-        if self.buffer[expected_length - 1] != STOP_BYTE:
-            logging.warning(
-                f"Invalid stop byte. Discarding buffer: {self.buffer.hex()}"
+    def check_crc(self, frame: bytes) -> bool:
+        """
+        Checks whether the CRC carried by a frame matches its contents.
+
+        The verdict for the frame last returned by validate_and_extract_frame()
+        is reused instead of being computed a second time.
+        """
+        if frame is self._checked_frame:
+            return self._checked_crc_ok
+        return crc_16.calculate_crc(frame) == crc_16.extract_checksum_received(frame)
+
+    def _verified_frame_within(self, start: int, end: int) -> int | None:
+        """
+        Looks for a complete command frame with a valid CRC starting inside
+        buffer indices [start, end).
+
+        Returns:
+            Its buffer index, or None if there is none
+        """
+        position = self._buffer.find(HEADER, start, end)
+        while position >= 0:
+            frame_end = self._frame_end(position)
+            if frame_end:
+                candidate = self._view[position:frame_end]
+                if self.classify_frame(candidate) == FrameType.COMMAND and (
+                    self._has_valid_crc(candidate)
+                ):
+                    return position
+            position = self._buffer.find(HEADER, position + 1, end)
+        return None
+
+    def _look_ahead(self) -> int | None:
+        """
+        Incremental version of _verified_frame_within() for a candidate that
+        is still arriving: candidates already rejected are not checked again,
+        and the scan pauses at the first one that is itself incomplete.
+
+        Returns:
+            Buffer index of a verified command frame, or None if there is none
+            yet
+        """
+        buffer = self._buffer
+        position = buffer.find(HEADER, self._lookahead_pos, self._end)
+        while position >= 0:
+            frame_end = self._frame_end(position)
+            if frame_end is None:
+                break  # Check this candidate again once more data arrived
+            if frame_end:
+                candidate = self._view[position:frame_end]
+                if self.classify_frame(candidate) == FrameType.COMMAND and (
+                    self._has_valid_crc(candidate)
+                ):
+                    return position
+            position = buffer.find(HEADER, position + 1, self._end)
+
+        self._lookahead_pos = position if position >= 0 else self._end
+        return None
+
+    def validate_and_extract_frame(self) -> memoryview | None:
+        """
+        Extracts the next structurally valid frame from the internal buffer.
+
+        The parser resynchronizes instead of discarding the whole buffer: it
+        scans forward to the next HEADER candidate and only drops the bytes in
+        front of it. A candidate whose stop byte is wrong is a false header and
+        is skipped. An incomplete candidate, or a command whose CRC fails, is
+        only skipped if a command with a valid CRC starts inside it; otherwise
+        the parser waits for more data, or returns the command so that
+        evaluate_crc() NACKs it as a checksum error.
+
+        The frame is returned as a view into the internal buffer, without
+        copying. It stays valid until the next pull_frame() or feed(); use
+        bytes(frame) to keep it longer.
+
+        Returns:
+            A memoryview of a valid frame, or None if no complete frame is
+            available yet.
+        """
+        buffer = self._buffer
+        while self._end:
+            # Drop everything in front of the next frame candidate
+            start = self._start
+            if buffer[start] != HEADER:
+                start = buffer.find(HEADER, start, self._end)
+                if start < 0:
+                    self._skip(self._end - self._start)
+                    return None
+                self._skip(start - self._start)
+
+            # Fast path of _frame_end(), inlined for the common case, with
+            # the running CRC brought up to date over the new bytes
+            length = self._end
+            if start != self._crc_start:
+                self._crc_start = start
+                self._crc_pos = start + CMD_IDX
+                self._lookahead_pos = start + 1
+                self._crc.reset()
+
+            end = start + FRAME_OVERHEAD
+            if length > start + DATA_LENGTH_IDX:
+                end += buffer[start + DATA_LENGTH_IDX]
+                crc_end = min(end - FRAME_OVERHEAD + CRC_MSB_IDX_OFFSET, length)
+                if crc_end > self._crc_pos:
+                    self._crc.update(self._view[self._crc_pos : crc_end])
+                    self._crc_pos = crc_end
+
+                if end - start > self.max_frame_size:
+                    end = 0
+                elif length < end:
+                    end = None
+                elif buffer[end - 1] != STOP_BYTE:
+                    end = 0
+            else:
+                end = None
+
+            if end is None:
+                # Frame is still arriving, unless its length byte was noise
+                # and a verified frame already sits behind it
+                hidden = self._look_ahead()
+                if hidden is None:
+                    return None
+                self._skip(hidden - start)
+                continue
+            if not end:
+                self._skip(1)  # False header (stop byte mismatch)
+                continue
+
+            # The CRC check is a single comparison against the running value
+            frame = self._view[start:end]
+            crc_ok = self._crc.value == (
+                (buffer[end - 3] << 8) | buffer[end - 2]
+            ) or (
+                end - start == MINIMUM_BUFFER_SIZE
+                and buffer[start + CMD_IDX] not in command_handler.COMMAND_MAP
             )
-            nack_frame = self.nack(UARTError.BAD_FRAME)
-                if uart.send_data(nack_frame):
-                    logging.warning("Sent NACK to PIC (Bad frame)")
-                else:
-                    logging.error("Failed to send NACK")
-            self.buffer.clear()
-            return None
+            if not crc_ok:
+                hidden = self._verified_frame_within(start + 1, end)
+                if hidden is not None:
+                    self._skip(hidden - start)
+                    continue
+            self._checked_frame = frame
+            self._checked_crc_ok = crc_ok
+
+            # All structural checks passed. Hand out the frame and move on.
+            self._crc_start = -1
+            if end < length:
+                self._start = end
+            else:
+                self._start = self._end = 0
+            self._resyncing = False
+            self.frames += 1
+            return frame
+
+        return None
+
+    def iter_frames(self) -> Iterator[memoryview]:
+        """
+        Yields every complete frame currently in the internal buffer.
+
+        Bytes pulled or fed while iterating are picked up as well, so a burst
+        of frames is drained in one pass instead of one frame per loop tick.
 
-        # All structural checks passed. Extract the frame and update the buffer.
-        valid_frame = bytes(self.buffer[:expected_length])
-        self.buffer = self.buffer[expected_length:]
-        return valid_frame
+        Yields:
+            Views of structurally valid frames, in arrival order (see
+            validate_and_extract_frame() for how long they stay valid)
+        """
+        while (frame := self.validate_and_extract_frame()) is not None:
+            yield frame
+
+    def stats(self) -> dict:
+        """
+        Get the parser statistics.
+
+        Returns:
+            Dictionary with extracted frames, skipped bytes and resync runs
+        """
+        return {
+            "frames": self.frames,
+            "skipped_bytes": self.skipped_bytes,
+            "resyncs": self.resyncs,
+        }
 
     def classify_frame(self, frame: bytes) -> FrameType:
         """
@@ -132,9 +444,9 @@ class UARTProtocol:
 
         # 6-byte frames need further classification
         # Check for specific, constant NACK patterns first
-        if frame == bytes([0x3E, 0xFF, 0x00, 0xFF, 0xFF, 0x0A]):
+        if frame == NACK_INVALID_CHECKSUM:
             return FrameType.NACK_CHECKSUM
-        if frame == bytes([0x3E, 0x00, 0x00, 0x00, 0x00, 0x0A]):
+        if frame == NACK_BAD_FRAME:
             return FrameType.NACK_FORMAT
 
         # It's not a NACK. Check if it's a known command or an ACK.
@@ -144,25 +456,83 @@ class UARTProtocol:
         else:
             return FrameType.ACK
 
-    def evaluate_crc(self, frame: bytes) -> bool:
+    def evaluate_crc(self, frame: bytes, crc_ok: Optional[bool] = None) -> bool:
         """
         Validates the CRC of a well-formed frame and sends an ACK or NACK.
+
+        The time from the arrival of the frame's last chunk to the ACK being
+        handed to the UART is recorded in `ack_latency`.
+
+        Args:
+            frame: A structurally valid data frame.
+            crc_ok: CRC verdict recorded when the frame was extracted (None
+                to check it now, see check_crc())
         """
-        if crc_16.calculate_crc(frame) == crc_16.extract_checksum_received(frame):
+        if crc_ok is None:
+            crc_ok = self.check_crc(frame)
+        if crc_ok:
             ack_frame = self.ack(frame)
-            if uart.send_data(ack_frame):
+            if self._send_frame(ack_frame):
+                if self._rx_time:
+                    self.ack_latency.record(time.monotonic() - self._rx_time)
                 logging.info("Sent ACK to PIC")
             else:
                 logging.error("Failed to send ACK")
             return True
         else:
             nack_frame = self.nack(UARTError.INVALID_CHECKSUM)
-            if uart.send_data(nack_frame):
+            if self._send_frame(nack_frame):
                 logging.warning("Sent NACK to PIC (Invalid Checksum)")
             else:
                 logging.error("Failed to send NACK")
             return False
 
+    def process_frame(
+        self,
+        frame: bytes,
+        flash: Optional[Any] = None,
+        crc_ok: Optional[bool] = None,
+    ) -> FrameType:
+        """
+        Classifies a structurally valid frame and acts on it: COMMAND frames
+        get a CRC check (ACK/NACK) and are executed, ACK/NACK frames are logged.
+
+        Args:
+            frame: A structurally valid data frame.
+            flash: Optional FlashMemory instance for commands that need it
+            crc_ok: CRC verdict recorded when the frame was extracted (None
+                to check it now)
+
+        Returns:
+            The FrameType classification.
+
+        Raises:
+            ShutdownRequested: If the executed command requests shutdown
+        """
+        # Classify the frame to determine the next action
+        frame_type = self.classify_frame(frame)
+        logging.info(
+            f"Complete frame received: {frame.hex()} -> Type: {frame_type.name}"
+        )
+
+        # Evaluate frame based on its type
+        if frame_type == FrameType.COMMAND:
+            # Only COMMAND frames get a CRC check
+            if self.evaluate_crc(frame, crc_ok):
+                # If CRC is valid, execute the command
+                cmd_byte = frame[CMD_IDX]
+                logging.info(f"Executing received command: {cmd_byte}")
+                command_handler.execute_command(cmd_byte, flash)
+
+        elif frame_type == FrameType.ACK:
+            # Here it should be handled the logic for a successful command (Not much needed tbh)
+            logging.info("ACK received. Previous command successful.")
+        else:
+            # Here it should be handled NACKs, by re-transmitting.
+            logging.warning(f"{frame_type.name} received. Previous command failed.")
+
+        return frame_type
+
     @staticmethod
     def ack(buffer: bytes) -> bytes:
         """
@@ -190,26 +560,20 @@ class UARTProtocol:
             return b""
 
         # In NACK and ACK buffer, the content of "payload length" is always zero.
-        nack_buffer = bytearray([HEADER, 0x00, 0x00, 0x00, 0x00, STOP_BYTE])
-
         if error == UARTError.BAD_FRAME:
-            pass
+            return NACK_BAD_FRAME
         elif error == UARTError.INVALID_CHECKSUM:
-            nack_buffer[CMD_IDX] = NACK_INVALID_FIELD_VALUE
-            nack_buffer[CRC_MSB_IDX_OFFSET] = NACK_INVALID_FIELD_VALUE
-            nack_buffer[CRC_LSB_IDX_OFFSET] = NACK_INVALID_FIELD_VALUE
+            return NACK_INVALID_CHECKSUM
         else:
             return b""
 
-        return bytes(nack_buffer)
-
 
 if __name__ == "__main__":
     """
     Standalone UART protocol test script.
 
-    This script initializes the UART listener and continuously polls for
-    valid data frames from the hardware, processing them as they arrive.
+    This script initializes the UART listener, waits for data frames from the
+    hardware and processes every complete frame as soon as it arrives.
     """
     logging.info("--- Starting Standalone UART Protocol Test ---")
 
@@ -221,43 +585,16 @@ if __name__ == "__main__":
         logging.info("UART Listener started.")
 
         while True:
-            # Step 1: Pull all available data into the buffer
+            # Step 1: Sleep until the listener has buffered new bytes
+            uart.wait_for_data(STANDALONE_WAIT_TIMEOUT)
+
+            # Step 2: Pull all available data into the buffer
             protocol.pull_frame()
 
-            # Step 2: Try to validate and extract a frame from the buffer
-            frame = protocol.validate_and_extract_frame()
-
-            if frame:
-                # Step 3: Classify the frame to determine the next action
-                frame_type = protocol.classify_frame(frame)
-                logging.info(
-                    f"Complete frame received: {frame.hex()} -> Type: {frame_type.name}"
-                )
-
-                # Step 4: Evaluate frame based on its type
-                if frame_type == FrameType.COMMAND:
-                    # Only COMMAND frames get a CRC check
-                    if protocol.evaluate_crc(frame):
-                        # If CRC is valid, execute the command
-                        cmd_byte = frame[CMD_IDX]
-                        logging.info(f"Executing received command: {cmd_byte}")
-                        # We pass flash=None as this test script doesn't init it
-                        command_handler.execute_command(cmd_byte, flash=None)
-
-                elif frame_type == FrameType.ACK:
-                    # Here you would handle the logic for a successful command
-                    logging.info("ACK received. Previous command successful.")
-                else:
-                    # Here you would handle NACKs, e.g., by re-transmitting
-                    logging.warning(
-                        f"{frame_type.name} received. Previous command failed."
-                    )
-
-                # Clear queue after processing a frame
-                logging.info(f"Cleared {uart.clear_queue()} items from queue.")
-
-            # Small delay to prevent busy-waiting and high CPU usage (70ms)
-            time.sleep(0.07)
+            # Step 3: Classify, ACK/NACK and execute every complete frame.
+            # We pass flash=None as this test script doesn't init it
+            for frame in protocol.iter_frames():
+                protocol.process_frame(frame, flash=None)
 
     except KeyboardInterrupt:
         logging.info("Keyboard interrupt received. Shutting down.")